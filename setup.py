@@ -27,6 +27,9 @@ setup(name='tap-intercom',
               'pylint',
               'ipdb',
               'parameterized'
+          ],
+          'orjson': [
+              'orjson'
           ]
       }
       )
@@ -1,9 +1,14 @@
+import threading
+import time
+
 import backoff
 import requests
 import singer
 from requests.exceptions import ConnectionError, Timeout
 from simplejson.scanner import JSONDecodeError
-from singer import metrics, utils
+from singer import metrics
+
+from tap_intercom.json_stream import DEFAULT_CHUNK_SIZE, StreamedJSON
 
 LOGGER = singer.get_logger()
 
@@ -11,6 +16,14 @@ API_VERSION = '2.12'
 
 REQUEST_TIMEOUT = 300
 
+BASE_URL = 'https://api.intercom.io'
+
+# Size of the keep-alive connections pool, same as the default of `requests`
+DEFAULT_MAX_CONNECTIONS = 10
+
+# Start slowing down the requests when less than this fraction of the rate limit is remaining
+RATE_LIMIT_SLOWDOWN_RATIO = 0.1
+
 class Server5xxError(Exception):
     pass
 
@@ -211,17 +224,105 @@ def raise_for_error(response):
 
     raise exc(message) from None
 
-class IntercomClient(object):
+class RateLimiter(object):
+    """
+    Token bucket throttling the requests as per the rate limit headers of the Intercom responses.
+    https://developers.intercom.com/intercom-api-reference/reference/rate-limiting
+
+    The requests go at full speed while more than `RATE_LIMIT_SLOWDOWN_RATIO` of the limit is remaining.
+    Below that, the remaining requests are spread evenly until the `X-RateLimit-Reset` time.
+    It is shared by every thread using the client, so the state is updated under a lock.
+    """
+    def __init__(self, slowdown_ratio=RATE_LIMIT_SLOWDOWN_RATIO):
+        self.__lock = threading.Lock()
+        self.slowdown_ratio = slowdown_ratio
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.__next_slot = 0
+
+    def update(self, headers):
+        """Read the `X-RateLimit-Limit/Remaining/Reset` headers of the response"""
+        try:
+            limit = int(headers['X-RateLimit-Limit'])
+            remaining = int(headers['X-RateLimit-Remaining'])
+            reset_at = int(headers['X-RateLimit-Reset'])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        with self.__lock:
+            # Responses of concurrent requests may arrive out of order, keep the lowest remaining count of a window
+            if self.reset_at is not None and reset_at < self.reset_at:
+                return
+            if reset_at == self.reset_at and self.remaining is not None:
+                remaining = min(remaining, self.remaining)
+            else:
+                # New window, the requests are not paced from the slots of the previous one
+                self.__next_slot = 0
+            self.limit = limit
+            self.remaining = remaining
+            self.reset_at = reset_at
+
+    def reserve(self):
+        """Take a token and return the number of seconds to wait before sending the request"""
+        with self.__lock:
+            now = time.time()
+            if self.remaining is None:
+                return 0
+
+            if self.reset_at is not None and now >= self.reset_at:
+                # The window is reset, the next response will update the actual values and the reset time
+                self.remaining = self.limit
+                self.reset_at = None
+                self.__next_slot = 0
+
+            self.remaining -= 1
+            if self.reset_at is None or self.remaining >= self.limit * self.slowdown_ratio:
+                return 0
+
+            if self.remaining < 0:
+                # No token is left in this window, wait for the reset
+                start = max(now, self.reset_at, self.__next_slot)
+            else:
+                # Spread the remaining tokens over the time left in the window
+                start = max(now, self.__next_slot)
+                self.__next_slot = start + max(self.reset_at - start, 0) / (self.remaining + 1)
+            return start - now
+
+    def wait(self):
+        """Block the thread until a request can be sent"""
+        delay = self.reserve()
+        if delay > 0:
+            LOGGER.info("Approaching the rate limit, waiting for {:.2f} seconds".format(delay))
+            time.sleep(delay)
+
+
+class IntercomClient(object): # pylint: disable=too-many-instance-attributes
     def __init__(self,
                  access_token,
                  config_request_timeout, # request_timeout parameter
-                 user_agent=None):
+                 user_agent=None,
+                 max_connections=DEFAULT_MAX_CONNECTIONS,
+                 base_url=None,
+                 json_backend=None,
+                 response_cache=None):
         self.__access_token = access_token
         self.__user_agent = user_agent
-        # Rate limit initial values, reset by check_access_token headers
+        # Rate limit initial values, reset by the headers of every response.
+        # Shared by all the threads using this client.
+        self.rate_limiter = RateLimiter()
         self.__session = requests.Session()
+        # Keep-alive connections pool, sized for the threads sending concurrent requests
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_connections)
+        self.__session.mount('https://', adapter)
+        self.__session.mount('http://', adapter)
         self.__verified = False
-        self.base_url = 'https://api.intercom.io'
+        # The API can be replaced by a local server, e.g. to benchmark the tap
+        self.base_url = (base_url or BASE_URL).rstrip('/')
+        # Backend of `serialization` decoding the responses, None for `response.json()`
+        self.json_backend = json_backend
+        # `ResponseCache` of the GET requests with `cache=True`, None to not cache the responses
+        self.response_cache = response_cache
 
         # Set request timeout to config param `request_timeout` value.
         # If value is 0,"0","" or not passed then it set default to 300 seconds.
@@ -239,13 +340,15 @@ class IntercomClient(object):
         return self
 
     def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def close(self):
         self.__session.close()
 
     @backoff.on_exception(backoff.expo,
                           (Server5xxError, ConnectionError, IntercomRateLimitError),
                           max_tries=7,
                           factor=3)
-    @utils.ratelimit(1000, 60)
     def check_access_token(self):
         if self.__access_token is None:
             raise Exception('Error: Missing access_token.')
@@ -255,11 +358,13 @@ class IntercomClient(object):
         headers['Authorization'] = 'Bearer {}'.format(self.__access_token)
         headers['Accept'] = 'application/json'
         headers['Intercom-Version'] = API_VERSION
+        self.rate_limiter.wait()
         response = self.__session.get(
             # Simple endpoint that returns 1 Account record (to check API/access_token access):
             url='{}/{}'.format(self.base_url, 'tags'),
             timeout=self.__request_timeout, # Pass request timeout
             headers=headers)
+        self.rate_limiter.update(response.headers)
         if response.status_code != 200:
             LOGGER.error('Error status_code = {}'.format(response.status_code))
             raise_for_error(response)
@@ -276,11 +381,82 @@ class IntercomClient(object):
                           (Server5xxError, ConnectionError, IntercomBadResponseError, IntercomRateLimitError, IntercomScrollExistsError),
                           max_tries=7,
                           factor=3)
-    @utils.ratelimit(1000, 60)
     def request(self, method, path=None, url=None, **kwargs):
         if not self.__verified:
             self.__verified = self.check_access_token()
 
+        url, endpoint, kwargs = self.prepare_request(method, path, url, **kwargs)
+        self.rate_limiter.wait()
+        response = self.send_request(method, url, endpoint, **kwargs)
+        return self.handle_response(response)
+
+    @backoff.on_exception(backoff.expo, Timeout, max_tries=5, factor=2) # Backoff for request timeout
+    @backoff.on_exception(backoff.expo,
+                          (Server5xxError, ConnectionError, IntercomRateLimitError, IntercomScrollExistsError),
+                          max_tries=7,
+                          factor=3)
+    def stream(self, method, path=None, data_key=None, url=None, **kwargs):
+        """
+        Same as `request`, except that the JSON response is parsed incrementally.
+        Returns a `StreamedJSON` yielding the items of the array at the `data_key` path of the response.
+        The errors of the response status are retried, an error while reading the response is raised.
+        """
+        if not self.__verified:
+            self.__verified = self.check_access_token()
+
+        url, endpoint, kwargs = self.prepare_request(method, path, url, **kwargs)
+        self.rate_limiter.wait()
+        response = self.send_request(method, url, endpoint, stream=True, **kwargs)
+        if response.status_code != 200:
+            raise_for_error(response)
+        return StreamedJSON(response.iter_content(DEFAULT_CHUNK_SIZE), data_key, close=response.close)
+
+    @backoff.on_exception(backoff.expo, Timeout, max_tries=5, factor=2) # Backoff for request timeout
+    @backoff.on_exception(backoff.expo,
+                          (Server5xxError, ConnectionError, IntercomBadResponseError, IntercomRateLimitError, IntercomScrollExistsError),
+                          max_tries=7,
+                          factor=3)
+    def conditional_request(self, method, path=None, url=None, etag=None, **kwargs):
+        """
+        Same as `request`, with the `If-None-Match` header of the `etag`.
+        Returns None if the response is not modified, otherwise the JSON response and its ETag.
+        """
+        if not self.__verified:
+            self.__verified = self.check_access_token()
+
+        if etag:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'If-None-Match': etag})
+        url, endpoint, kwargs = self.prepare_request(method, path, url, **kwargs)
+        self.rate_limiter.wait()
+        response = self.send_request(method, url, endpoint, **kwargs)
+        if etag and response.status_code == 304:
+            return None
+        return self.handle_response(response), response.headers.get('ETag')
+
+    def get_cached(self, path=None, url=None, **kwargs):
+        """
+        Returns the JSON response of the GET request from the `response_cache` while it is fresh,
+        then the cached response is validated with its ETag.
+        """
+        key = self.response_cache.get_key(url or '{}/{}'.format(self.base_url, path), kwargs.get('params'), self.__access_token)
+        entry = self.response_cache.get(key)
+        if entry is not None and self.response_cache.is_fresh(entry):
+            return entry['body']
+
+        result = self.conditional_request('GET', path, url, etag=entry.get('etag') if entry else None, **kwargs)
+        if result is None:
+            LOGGER.info("Not modified, using the cached response")
+            self.response_cache.validate(key, entry)
+            return entry['body']
+
+        body, etag = result
+        # Without an ETag or a TTL, the cached response could never be served
+        if etag is not None or self.response_cache.ttl:
+            self.response_cache.put(key, body, etag)
+        return body
+
+    def prepare_request(self, method, path=None, url=None, **kwargs):
+        """Returns the url, the metrics endpoint and the `requests` kwargs with the Intercom headers"""
         if not url and path:
             url = '{}/{}'.format(self.base_url, path)
 
@@ -304,20 +480,31 @@ class IntercomClient(object):
         if method == 'POST':
             kwargs['headers']['Content-Type'] = 'application/json'
 
+        return url, endpoint, kwargs
+
+    def send_request(self, method, url, endpoint, **kwargs):
+        """Sends the request and updates the rate limiter with the response headers"""
         with metrics.http_request_timer(endpoint) as timer:
             response = self.__session.request(method, url, timeout=self.__request_timeout, **kwargs) # Pass request timeout
             timer.tags[metrics.Tag.http_status_code] = response.status_code
+        self.rate_limiter.update(response.headers)
+        return response
 
+    def handle_response(self, response):
         if response.status_code != 200:
             raise_for_error(response)
 
         # Sometimes a 200 status code is returned with no content, which breaks JSON decoding.
         try:
+            if self.json_backend is not None:
+                return self.json_backend.decode_response(response)
             return response.json()
-        except JSONDecodeError as err:
+        except (JSONDecodeError, ValueError) as err: # The decoding errors of json and orjson are ValueError
             raise IntercomBadResponseError from err
 
-    def get(self, path, **kwargs):
+    def get(self, path, cache=False, **kwargs):
+        if cache and self.response_cache is not None:
+            return self.get_cached(path, **kwargs)
         return self.request('GET', path=path, **kwargs)
 
     def post(self, path, **kwargs):
@@ -0,0 +1,369 @@
+"""
+This module compiles the schema and the metadata of a stream into a transformer of its records, producing
+the same records as singer's `transform` with the `UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING` format.
+
+singer's `transform` interprets the schema and looks up the metadata of every field of every record.
+Here each node of the schema is compiled once into a function converting a value of the node, or returning
+`FAILED` where singer's `transform_recur` fails, and the fields filtered by the metadata are pruned.
+A record not matching the schema is transformed again by singer's `transform`, which raises its error.
+"""
+
+import datetime
+import functools
+
+from singer import Transformer, UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING
+from singer.transform import string_to_datetime, transform
+from singer.utils import strftime
+
+# Result of a compiled node when the value does not match the node
+FAILED = object()
+
+# Filter node of a field removed from the records by the metadata
+REMOVED = object()
+
+
+class FilterNode:
+    """
+    Fields filtered by the metadata under a breadcrumb, as singer's `filter_data_by_metadata` does.
+
+    :param fields: The filter nodes of the properties, by name, `REMOVED` for the filtered fields
+    :param items: The filter node of the items of a list, if any
+    """
+    def __init__(self):
+        self.fields = {}
+        self.items = None
+
+
+def is_filtered(field_metadata):
+    """Returns True if singer's `transform` removes the field of the metadata from the records."""
+    if field_metadata.get('inclusion') == 'automatic':
+        return False
+    return field_metadata.get('selected') is False or field_metadata.get('inclusion') == 'unsupported'
+
+
+def get_breadcrumb_steps(breadcrumb):
+    """
+    Returns the steps of a breadcrumb, `('properties', name)` or `('items',)`,
+    or None if it is not the breadcrumb of a field.
+    """
+    steps = []
+    index = 0
+    while index < len(breadcrumb):
+        if breadcrumb[index] == 'properties' and index + 1 < len(breadcrumb):
+            steps.append(('properties', breadcrumb[index + 1]))
+            index += 2
+        elif breadcrumb[index] == 'items':
+            steps.append(('items',))
+            index += 1
+        else:
+            return None
+    if not steps or steps[-1][0] != 'properties':
+        return None
+    return steps
+
+
+def compile_filter(stream_metadata):
+    """Returns the root `FilterNode` of the fields filtered by the metadata, None if no field is filtered."""
+    root = None
+    for breadcrumb, field_metadata in (stream_metadata or {}).items():
+        steps = get_breadcrumb_steps(breadcrumb)
+        if steps is None or not is_filtered(field_metadata):
+            continue
+        # singer does not filter the fields of an automatic field
+        parents = [sum(steps[:index], ()) for index in range(1, len(steps)) if steps[index - 1][0] == 'properties']
+        if any((stream_metadata.get(parent) or {}).get('inclusion') == 'automatic' for parent in parents):
+            continue
+        root = root or FilterNode()
+        node = root
+        for step in steps[:-1]:
+            if step[0] == 'items':
+                node.items = node.items or FilterNode()
+                child = node.items
+            else:
+                child = node.fields.setdefault(step[1], FilterNode())
+            if child is REMOVED:
+                # A parent of the field is removed
+                break
+            node = child
+        else:
+            node.fields[steps[-1][1]] = REMOVED
+    return root
+
+
+def filter_record(data, filter_node):
+    """Removes the fields filtered by the metadata from the data in place."""
+    if isinstance(data, dict):
+        for name, child in filter_node.fields.items():
+            if name not in data:
+                continue
+            if child is REMOVED:
+                del data[name]
+            else:
+                filter_record(data[name], child)
+    elif isinstance(data, list) and filter_node.items is not None:
+        for item in data:
+            filter_record(item, filter_node.items)
+
+
+# Same as singer's `unix_milliseconds_to_datetime`, cached for the most recent values
+@functools.lru_cache(maxsize=4096)
+def milliseconds_to_datetime(value):
+    dtime = datetime.datetime.fromtimestamp(float(value) / 1000.0, datetime.timezone.utc)
+    if dtime.year < 1000:
+        # singer's `strftime` pads the years depending on the platform
+        return strftime(dtime)
+    # e.g. 2021-01-01T00:00:00.000000+00:00 -> 2021-01-01T00:00:00.000000Z
+    return dtime.isoformat(timespec='microseconds')[:-6] + 'Z'
+
+
+def transform_datetime(value):
+    if value is None or value == "":
+        return FAILED
+    try:
+        return milliseconds_to_datetime(value)
+    except Exception: # pylint: disable=broad-except
+        # Same as singer, the values which are not epoch milliseconds are parsed as date-time strings
+        transformed = string_to_datetime(value)
+    return FAILED if transformed is None else transformed
+
+
+def transform_null(value):
+    return None if value is None or value == "" else FAILED
+
+
+def transform_string(value):
+    if type(value) is str: # pylint: disable=unidiomatic-typecheck
+        return value
+    if value is None:
+        return FAILED
+    try:
+        return str(value)
+    except Exception: # pylint: disable=broad-except
+        return FAILED
+
+
+def transform_integer(value):
+    if type(value) is int: # pylint: disable=unidiomatic-typecheck
+        return value
+    if isinstance(value, str):
+        value = value.replace(",", "")
+    try:
+        return int(value)
+    except Exception: # pylint: disable=broad-except
+        return FAILED
+
+
+def transform_number(value):
+    if type(value) is float: # pylint: disable=unidiomatic-typecheck
+        return value
+    if isinstance(value, str):
+        value = value.replace(",", "")
+    try:
+        return float(value)
+    except Exception: # pylint: disable=broad-except
+        return FAILED
+
+
+def transform_boolean(value):
+    if isinstance(value, str) and value.lower() == "false":
+        return False
+    try:
+        return bool(value)
+    except Exception: # pylint: disable=broad-except
+        return FAILED
+
+
+def transform_any(value):
+    return value
+
+
+# Python types of the values returned unchanged by the scalar types
+UNCHANGED_TYPES = {'string': str, 'integer': int, 'number': float, 'boolean': bool}
+
+
+def get_unchanged_types(schema):
+    """
+    Returns the Python types of the values returned unchanged by the schema node, e.g. `str` and `NoneType`
+    for `["null", "string"]`, so the fields of these values are copied without calling the node.
+    """
+    if 'anyOf' in schema or 'type' not in schema:
+        return frozenset()
+    types = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+    other_types = [typ for typ in types if typ != 'null']
+    if len(other_types) != 1:
+        return frozenset()
+    typ = other_types[0]
+    fmt = schema.get('format')
+    unchanged_types = set()
+    if typ in UNCHANGED_TYPES and fmt is None:
+        unchanged_types.add(UNCHANGED_TYPES[typ])
+    # None is converted to False by the boolean type
+    none_fails = fmt == 'date-time' or (fmt is None and typ in ('string', 'integer', 'number', 'object')) \
+        or (fmt is None and typ == 'array' and 'items' in schema)
+    if 'null' in types and none_fails:
+        unchanged_types.add(type(None))
+    return frozenset(unchanged_types)
+
+
+def compile_singer_type(typ, schema):
+    """Returns the conversion of singer's `_transform`, for the types and formats which are not compiled."""
+    def transform_singer_type(value):
+        success, transformed = Transformer(UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING)._transform(value, typ, schema, [])
+        return transformed if success else FAILED
+
+    return transform_singer_type
+
+
+def compile_object(schema, filter_node):
+    properties = schema.get('properties', {})
+    if properties == {}:
+        # The objects without properties are not transformed
+        return lambda value: value if isinstance(value, dict) else FAILED
+
+    fields = {}
+    for name, field_schema in properties.items():
+        field_filter = filter_node.fields.get(name) if filter_node else None
+        # The fields filtered by the metadata are removed from the records before they are transformed
+        if field_filter is not REMOVED:
+            fields[name] = (get_unchanged_types(field_schema), compile_node(field_schema, field_filter))
+
+    def transform_object(value):
+        if not isinstance(value, dict):
+            return FAILED
+        result = {}
+        for name, field_value in value.items():
+            field = fields.get(name)
+            # The fields which are not in the schema are removed
+            if field is None:
+                continue
+            if type(field_value) in field[0]:
+                result[name] = field_value
+                continue
+            transformed = field[1](field_value)
+            if transformed is FAILED:
+                return FAILED
+            result[name] = transformed
+        return result
+
+    return transform_object
+
+
+def compile_array(schema, filter_node):
+    unchanged_types = get_unchanged_types(schema['items'])
+    transform_item = compile_node(schema['items'], filter_node.items if filter_node else None)
+
+    def transform_array(value):
+        if not isinstance(value, list):
+            return FAILED
+        result = []
+        for item in value:
+            if type(item) in unchanged_types:
+                result.append(item)
+                continue
+            transformed = transform_item(item)
+            if transformed is FAILED:
+                return FAILED
+            result.append(transformed)
+        return result
+
+    return transform_array
+
+
+SCALAR_TRANSFORMS = {
+    'string': transform_string,
+    'integer': transform_integer,
+    'number': transform_number,
+    'boolean': transform_boolean,
+}
+
+
+def compile_type(typ, schema, filter_node):
+    """Returns the conversion of a value to one type of the node, as singer's `_transform`."""
+    if typ == 'null':
+        return transform_null
+    if schema.get('format') == 'date-time':
+        return transform_datetime
+    is_decimal = schema.get('format') == 'singer.decimal'
+    if typ in SCALAR_TRANSFORMS and not is_decimal:
+        return SCALAR_TRANSFORMS[typ]
+    if typ == 'object' and not (is_decimal or schema.get('patternProperties')):
+        return compile_object(schema, filter_node)
+    if typ == 'array' and not is_decimal and 'items' in schema:
+        return compile_array(schema, filter_node)
+    # e.g. the singer.decimal format
+    return compile_singer_type(typ, schema)
+
+
+def compile_node(schema, filter_node=None):
+    """
+    Returns the function converting a value of the schema node, as singer's `transform_recur`.
+    The types are tried in order, except `null` which is tried last.
+    """
+    if 'anyOf' in schema:
+        branches = [compile_node(subschema, filter_node) for subschema in schema['anyOf']]
+
+        def transform_any_of(value):
+            for branch in branches:
+                transformed = branch(value)
+                if transformed is not FAILED:
+                    return transformed
+            return FAILED
+
+        return transform_any_of
+
+    if 'type' not in schema:
+        return transform_any
+
+    types = schema['type']
+    types = list(types) if isinstance(types, list) else [types]
+    if 'null' in types:
+        types.remove('null')
+        types.append('null')
+    conversions = [compile_type(typ, schema, filter_node) for typ in types]
+
+    if len(conversions) == 1:
+        return conversions[0]
+    if len(conversions) == 2 and types[1] == 'null':
+        # e.g. ["null", "string"]
+        convert = conversions[0]
+
+        def transform_nullable(value):
+            transformed = convert(value)
+            if transformed is FAILED and (value is None or value == ""):
+                return None
+            return transformed
+
+        return transform_nullable
+
+    def transform_types(value):
+        for convert in conversions:
+            transformed = convert(value)
+            if transformed is not FAILED:
+                return transformed
+        return FAILED
+
+    return transform_types
+
+
+def compile_transformer(schema, stream_metadata=None):
+    """
+    Returns the function transforming a record of the stream, the same as
+    `transform(record, schema, integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING, metadata=stream_metadata)`.
+    As singer's `transform`, the fields filtered by the metadata are removed from the record in place.
+    """
+    filter_root = compile_filter(stream_metadata)
+    transform_root = compile_node(schema, filter_root)
+
+    def transform_record(record):
+        if filter_root is not None:
+            filter_record(record, filter_root)
+        transformed = transform_root(record)
+        if transformed is FAILED:
+            # The record does not match the schema, singer's transform raises the errors
+            return transform(record,
+                             schema,
+                             integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING,
+                             metadata=stream_metadata)
+        return transformed
+
+    return transform_record
@@ -0,0 +1,93 @@
+"""
+This module defines the thread pools used to send the API requests concurrently.
+The requests of all the workers share the rate limiter of the client.
+"""
+
+import contextlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Number of items buffered by `merge_concurrently` before the workers wait for the consumer
+DEFAULT_BUFFER_SIZE = 150
+
+
+@contextlib.contextmanager
+def worker_pool(max_workers):
+    """
+    Yields a thread pool with `max_workers` workers or None if `max_workers` is 1.
+    Queued tasks are cancelled if the pool is closed by an exception.
+    """
+    if max_workers <= 1:
+        yield None
+        return
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        yield executor
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Marker yielded by `merge_concurrently` after the last item of an iterable
+PARTITION_DONE = object()
+
+
+def merge_concurrently(iterables, max_workers, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Consume the iterables in a pool of `max_workers` threads and yield their items as (index, item) tuples.
+    (index, PARTITION_DONE) is yielded after the last item of the iterable at `index`.
+    The items of an iterable are yielded in order, the iterables are interleaved.
+    An exception raised by an iterable is raised by this generator.
+    """
+    results = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+
+    def put(result):
+        # Do not block the worker forever if the consumer stopped
+        while not stop.is_set():
+            try:
+                results.put(result, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def consume(index, iterable):
+        try:
+            for item in iterable:
+                if not put((index, item, None)):
+                    return
+            put((index, PARTITION_DONE, None))
+        except Exception as err: # pylint: disable=broad-except
+            put((index, None, err))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for index, iterable in enumerate(iterables):
+            executor.submit(consume, index, iterable)
+
+        remaining = len(iterables)
+        while remaining:
+            index, item, error = results.get()
+            if error:
+                raise error
+            if item is PARTITION_DONE:
+                remaining -= 1
+            yield index, item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def prefetch(iterable, depth):
+    """
+    Yield the items of the iterable, consumed by a background thread up to `depth` items ahead of the consumer,
+    e.g. the next pages are requested while the records of the current page are written.
+    The iterable is consumed by the calling thread if `depth` is 0.
+    """
+    if depth <= 0:
+        yield from iterable
+        return
+    for _, item in merge_concurrently([iterable], 1, buffer_size=depth):
+        if item is not PARTITION_DONE:
+            yield item
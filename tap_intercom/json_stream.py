@@ -0,0 +1,138 @@
+"""
+This module parses the JSON responses incrementally, so the records of a response are processed
+while the rest of the response is downloading, without loading the whole response in memory.
+"""
+
+import codecs
+import json
+
+WHITESPACE = ' \t\n\r'
+# Characters after a complete value
+VALUE_END = WHITESPACE + ',:]}'
+
+# Bytes read from the response at a time
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class StreamedJSON: # pylint: disable=too-many-instance-attributes
+    """
+    Parses a JSON object from chunks of bytes and yields the items of the array at the `path` of keys one at a time,
+    e.g. ['conversations'] for a page of search results or ['conversation_parts', 'conversation_parts']
+    for the parts of a conversation.
+
+    `envelope` is the object without the array, its values are set as they are parsed.
+    So the values before the array are available while the items are yielded and all of them once the iteration is done.
+    `item_count` is the number of items yielded so far.
+    """
+    def __init__(self, chunks, path, close=None):
+        self.chunks = iter(chunks)
+        self.path = [path] if isinstance(path, str) else list(path)
+        self.envelope = {}
+        self.item_count = 0
+        self.is_complete = False
+        self.__close = close
+        self.__decoder = json.JSONDecoder()
+        self.__utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.__buffer = ''
+        self.__position = 0
+        self.__eof = False
+
+    def __iter__(self):
+        try:
+            yield from self.iter_object(self.envelope, 0)
+            self.is_complete = True
+        finally:
+            self.close()
+
+    def close(self):
+        if self.__close is not None:
+            self.__close()
+            self.__close = None
+
+    def read(self, min_size=1):
+        """Read chunks until `min_size` more characters are buffered. Returns False at the end of the response."""
+        # Drop the parsed characters
+        self.__buffer = self.__buffer[self.__position:]
+        self.__position = 0
+        size = len(self.__buffer) + min_size
+        while len(self.__buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.__buffer += self.__utf8.decode(b'', final=True)
+                self.__eof = True
+                return False
+            self.__buffer += self.__utf8.decode(chunk)
+        return True
+
+    def peek(self):
+        """Returns the next character after the whitespaces or an empty string at the end of the response."""
+        while True:
+            while self.__position < len(self.__buffer) and self.__buffer[self.__position] in WHITESPACE:
+                self.__position += 1
+            if self.__position < len(self.__buffer):
+                return self.__buffer[self.__position]
+            if not self.read():
+                return ''
+
+    def expect(self, character):
+        if self.peek() != character:
+            raise json.JSONDecodeError("Expecting '{}'".format(character), self.__buffer, self.__position)
+        self.__position += 1
+
+    def value(self):
+        """Decode the next value, reading the response until the value is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buffer, self.__position)
+                # A number may continue in the next chunk, e.g. "12." of "12.5",
+                # a value is complete when it is followed by a separator
+                if (end < len(self.__buffer) and self.__buffer[end] in VALUE_END) or self.__eof:
+                    self.__position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.__eof:
+                    raise
+            # Double the buffered characters of the value to decode it again, so large values are not decoded too often
+            self.read(max(len(self.__buffer) - self.__position, 1))
+
+    def iter_object(self, envelope, depth):
+        self.expect('{')
+        if self.peek() == '}':
+            self.__position += 1
+            return
+
+        while True:
+            key = self.value()
+            self.expect(':')
+            if key != self.path[depth]:
+                envelope[key] = self.value()
+            elif depth == len(self.path) - 1 and self.peek() == '[':
+                yield from self.iter_array()
+            elif depth < len(self.path) - 1 and self.peek() == '{':
+                envelope[key] = {}
+                yield from self.iter_object(envelope[key], depth + 1)
+            else:
+                # E.g. null instead of the array
+                envelope[key] = self.value()
+
+            if self.peek() == ',':
+                self.__position += 1
+                continue
+            self.expect('}')
+            return
+
+    def iter_array(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.__position += 1
+            return
+
+        while True:
+            self.item_count += 1
+            yield self.value()
+            if self.peek() == ',':
+                self.__position += 1
+                continue
+            self.expect(']')
+            return
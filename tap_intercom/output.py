@@ -0,0 +1,198 @@
+"""
+This module writes the Singer messages of the tap to stdout.
+
+All the messages go through a single writer, so the messages of the streams synced in parallel
+are written one at a time and never interleaved mid-line.
+"""
+
+import copy
+import sys
+import threading
+import time
+
+import singer
+
+
+class MessageWriter: # pylint: disable=too-many-instance-attributes
+    """
+    Serializes the SCHEMA, RECORD and STATE messages of all the threads.
+
+    When the streams are synced in parallel, every stream works on its own copy of the state
+    with its bookmarks only. `shared_state` is then the state of the whole tap, the bookmarks
+    written by each stream are merged into it before it is written.
+
+    `json_backend` is the backend of `serialization` encoding the messages,
+    None to write them with singer-python.
+
+    When `buffer_size` is set, the RECORD messages are buffered and written to stdout at once
+    when the buffer reaches `buffer_size` characters or `flush_interval` seconds after the last write.
+    A timer writes the buffer when no record is written in the meantime, e.g. during a rate limit backoff.
+    The buffer is always written before the other messages, so a STATE never gets ahead of its records.
+
+    When `state_interval` or `state_record_count` is set, the STATE messages are coalesced: the last state
+    is written once `state_interval` seconds or `state_record_count` records have passed since the last
+    STATE message, and only if it changed. The state is encoded when it is written, i.e. with the bookmarks
+    of the records written so far. `force` writes it at the stream boundaries.
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.shared_state = None
+        self.json_backend = None
+        self.buffer_size = 0
+        self.flush_interval = 1
+        self.buffer = []
+        self.buffered_size = 0
+        self.flushed_at = time.monotonic()
+        self.flush_timer = None
+        self.state_interval = 0
+        self.state_record_count = 0
+        self.pending_state = None
+        self.written_state = None
+        self.records_since_state = 0
+        self.state_written_at = time.monotonic()
+
+    def format_message(self, message):
+        if self.json_backend is None:
+            return singer.format_message(message)
+        return self.json_backend.dumps(message.asdict())
+
+    def write_message(self, message):
+        with self.lock:
+            if isinstance(message, singer.RecordMessage):
+                self.records_since_state += 1
+            if self.buffer_size and isinstance(message, singer.RecordMessage):
+                self.buffer_message(message)
+                return
+
+            self.flush()
+            if self.json_backend is None:
+                singer.write_message(message)
+            else:
+                sys.stdout.write(self.format_message(message) + '\n')
+                sys.stdout.flush()
+
+    def buffer_message(self, message):
+        self.buffer_line(self.format_message(message) + '\n')
+
+    def buffer_line(self, line):
+        with self.lock:
+            self.buffer.append(line)
+            self.buffered_size += len(line)
+            if self.buffered_size >= self.buffer_size or time.monotonic() - self.flushed_at >= self.flush_interval:
+                self.flush()
+            elif self.flush_timer is None:
+                self.schedule_flush()
+
+    def schedule_flush(self):
+        """Starts the timer writing the buffer `flush_interval` seconds after the last write."""
+        delay = max(self.flushed_at + self.flush_interval - time.monotonic(), 0)
+        self.flush_timer = threading.Timer(delay, self.flush_on_timer)
+        # The buffer of an interrupted sync is written by `flush_state`
+        self.flush_timer.daemon = True
+        self.flush_timer.start()
+
+    def flush_on_timer(self):
+        with self.lock:
+            self.flush_timer = None
+            if not self.buffer:
+                return
+            # The buffer may have been written and filled again since the timer was started
+            if time.monotonic() - self.flushed_at >= self.flush_interval:
+                self.flush()
+            else:
+                self.schedule_flush()
+
+    def flush(self):
+        """Writes the buffered messages to stdout."""
+        with self.lock:
+            if self.buffer:
+                sys.stdout.write(''.join(self.buffer))
+                sys.stdout.flush()
+                self.buffer = []
+                self.buffered_size = 0
+            self.flushed_at = time.monotonic()
+
+    def write_lines(self, lines):
+        """Writes RECORD messages already encoded by `format_message`, e.g. by the workers of `transform_pool`."""
+        if not lines:
+            return
+        with self.lock:
+            self.records_since_state += len(lines)
+            if self.buffer_size:
+                for line in lines:
+                    self.buffer_line(line + '\n')
+                return
+
+            self.flush()
+            sys.stdout.write(''.join(line + '\n' for line in lines))
+            sys.stdout.flush()
+
+    def write_record(self, stream_name, record, time_extracted=None):
+        with self.lock:
+            if self.json_backend is None and not self.buffer_size:
+                self.records_since_state += 1
+                singer.write_record(stream_name, record, time_extracted=time_extracted)
+            else:
+                self.write_message(singer.RecordMessage(stream=stream_name, record=record, time_extracted=time_extracted))
+
+    def write_schema(self, stream_name, schema, key_properties, bookmark_properties=None):
+        with self.lock:
+            self.flush()
+            singer.write_schema(stream_name, schema, key_properties, bookmark_properties)
+
+    def write_state(self, state, force=False):
+        with self.lock:
+            state = self.merge_state(state)
+            if self.state_interval or self.state_record_count:
+                self.pending_state = state
+                if force or self.is_state_due():
+                    self.flush_state()
+            elif self.json_backend is None and not self.buffer_size:
+                singer.write_state(state)
+            else:
+                self.write_message(singer.StateMessage(value=state))
+
+    def is_state_due(self):
+        with self.lock:
+            if self.state_interval and time.monotonic() - self.state_written_at >= self.state_interval:
+                return True
+            return bool(self.state_record_count) and self.records_since_state >= self.state_record_count
+
+    def flush_state(self):
+        """Writes the buffered records and the coalesced state, if it changed since the last STATE message."""
+        with self.lock:
+            self.flush()
+            if self.pending_state is None:
+                return
+            message = self.format_message(singer.StateMessage(value=self.pending_state))
+            self.pending_state = None
+            if message != self.written_state:
+                sys.stdout.write(message + '\n')
+                sys.stdout.flush()
+                self.written_state = message
+            self.records_since_state = 0
+            self.state_written_at = time.monotonic()
+
+    def merge_state(self, state):
+        """
+        Merge the bookmarks of the stream state into the shared state and return the shared state.
+        Returns the state as it is if the streams are not synced in parallel.
+        """
+        with self.lock:
+            if self.shared_state is None or state is self.shared_state:
+                return state
+            bookmarks = self.shared_state.setdefault('bookmarks', {})
+            for stream, bookmark in state.get('bookmarks', {}).items():
+                bookmarks[stream] = copy.deepcopy(bookmark)
+            return self.shared_state
+
+
+WRITER = MessageWriter()
+
+write_message = WRITER.write_message
+write_record = WRITER.write_record
+write_lines = WRITER.write_lines
+write_schema = WRITER.write_schema
+write_state = WRITER.write_state
+flush = WRITER.flush
+flush_state = WRITER.flush_state
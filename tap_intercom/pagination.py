@@ -0,0 +1,177 @@
+"""
+This module defines the pagination of the API endpoints. A paginator yields the responses of the pages
+of an endpoint, following the cursor of its strategy:
+    - NextUrlPaginator: the `pages.next` URL of the list endpoints
+    - StartingAfterPaginator: the `pages.next.starting_after` cursor of the search endpoints
+    - StreamedStartingAfterPaginator: the same cursor, read once the records of the streamed response are synced
+    - ScrollPaginator: the `scroll_param` of the Scroll API
+"""
+
+import singer
+from singer import metrics
+
+from tap_intercom.client import IntercomNotFoundError
+from tap_intercom.concurrency import prefetch
+
+LOGGER = singer.get_logger()
+
+# Timer metric of each page, from its request until it is ready to be synced, including the retries and `process_page`.
+# The page number is logged, it is not a tag of the metric.
+PAGE_DURATION = 'page_duration'
+
+
+class Paginator: # pylint: disable=too-many-instance-attributes
+    """
+    Base class of the pagination strategies.
+
+    :param client: The API client used to request the pages
+    :param path: The path of the endpoint
+    :param data_key: The key of the records in the responses
+    :param stream_name: The name of the stream, used in the logs and the metrics
+    :param process_page: Optional function applied to each response before it is yielded,
+        e.g. to fetch the lists of the records. It is run by the prefetch thread with `paginate`.
+    """
+    # Exceptions of the request meaning that there are no more pages
+    end_of_pages_errors = ()
+    # If true, the responses are parsed while their records are synced, they are read once the next page is requested
+    streamed = False
+
+    def __init__(self, client, path, data_key, stream_name, process_page=None):
+        self.client = client
+        self.path = path
+        self.data_key = data_key
+        self.stream_name = stream_name
+        self.process_page = process_page
+        self.page = 0
+        self.record_count = 0
+        self.done = False
+
+    def request_page(self):
+        """Returns the response of the current page"""
+        raise NotImplementedError("Child classes of Paginator require `request_page` implementation")
+
+    def advance(self, response):
+        """Sets the cursor of the next page from the response, or `done` after the last page"""
+        raise NotImplementedError("Child classes of Paginator require `advance` implementation")
+
+    def read_page(self, response):
+        """Returns the JSON object of the page, with the cursor of the next page, and its number of records"""
+        return response, len(response.get(self.data_key) or [])
+
+    def end_page(self, response):
+        page, self.record_count = self.read_page(response)
+        LOGGER.info("Synced: {} for page: {}, records: {}".format(self.stream_name, self.page, self.record_count))
+        self.advance(page)
+        if not self.done:
+            LOGGER.info("Syncing next page")
+
+    def get_pages(self):
+        """Yields the responses of the pages, the requests are retried by the client"""
+        while not self.done:
+            self.page += 1
+            with metrics.Timer(PAGE_DURATION, {metrics.Tag.endpoint: self.stream_name}):
+                try:
+                    response = self.request_page()
+                except self.end_of_pages_errors:
+                    LOGGER.info("Synced last page: {}, records: {}".format(self.stream_name, self.record_count))
+                    return
+
+                if not self.streamed:
+                    self.end_page(response)
+                    if self.process_page is not None:
+                        response = self.process_page(response)
+            yield response
+            if self.streamed:
+                self.end_page(response)
+
+
+class NextUrlPaginator(Paginator):
+    """
+    Pages of the `pages.next` URL of the previous response.
+
+    :param params: The query params of the requests
+    :param cache: If true, the responses are requested from the response cache of the client
+    """
+    def __init__(self, client, path, data_key, stream_name, params=None, cache=False, process_page=None):
+        super().__init__(client, path, data_key, stream_name, process_page)
+        self.params = params
+        self.cache = cache
+        self.next_page = None
+
+    def request_page(self):
+        # The path is not used by the client when the URL of the next page is set
+        return self.client.get(self.path, url=self.next_page, params=self.params, cache=self.cache)
+
+    def advance(self, response):
+        self.next_page = (response.get('pages') or {}).get('next')
+        self.done = not self.next_page
+
+
+class StartingAfterPaginator(Paginator):
+    """
+    Pages of the search query, with the `starting_after` cursor of the previous response.
+
+    :param query: The search query, its `pagination` is updated with the cursor of each page
+    :param params: The query params of the requests
+    """
+    def __init__(self, client, path, data_key, stream_name, query, params=None, process_page=None):
+        super().__init__(client, path, data_key, stream_name, process_page)
+        self.query = query
+        self.params = params
+
+    def request_page(self):
+        return self.client.post(self.path, params=self.params, json=self.query)
+
+    def advance(self, response):
+        next_page = (response.get('pages') or {}).get('next')
+        if next_page:
+            self.query['pagination'].update({'starting_after': next_page.get('starting_after')})
+        else:
+            self.done = True
+
+
+class StreamedStartingAfterPaginator(StartingAfterPaginator):
+    """
+    Same as `StartingAfterPaginator`, except that the responses are `StreamedJSON` of the records,
+    parsed while they are synced. The cursor of the next page is read once all the records of the page are synced.
+    """
+    streamed = True
+
+    def request_page(self):
+        return self.client.stream('POST', self.path, data_key=self.data_key, params=self.params, json=self.query)
+
+    def read_page(self, response):
+        return response.envelope, response.item_count
+
+
+class ScrollPaginator(Paginator):
+    """
+    Pages of the Scroll API, with the `scroll_param` of the previous response.
+    The API returns a 404 error after the last page.
+    """
+    end_of_pages_errors = (IntercomNotFoundError,)
+
+    def __init__(self, client, path, data_key, stream_name, process_page=None):
+        super().__init__(client, path, data_key, stream_name, process_page)
+        self.params = {}
+
+    def request_page(self):
+        return self.client.get(self.path, params=self.params)
+
+    def advance(self, response):
+        if response.get(self.data_key) is None:
+            LOGGER.warning('response is empty for "{}" stream'.format(self.stream_name))
+
+        # The next pages are requested with the scroll_param of the last page with records
+        if self.record_count > 0:
+            self.params = {'scroll_param': response.get('scroll_param')}
+
+
+def paginate(paginator, prefetch_depth=0):
+    """
+    Yields the responses of the pages of the paginator.
+    The pages are fetched up to `prefetch_depth` pages ahead by a background thread if it is more than 0,
+    so the next page is requested while the records of the current page are written.
+    The pages of a `streamed` paginator are not prefetched, the next page is only known once the records are synced.
+    """
+    return prefetch(paginator.get_pages(), 0 if paginator.streamed else prefetch_depth)
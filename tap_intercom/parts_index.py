@@ -0,0 +1,42 @@
+"""
+This module persists the conversation parts synced between the syncs, so the conversations
+whose parts did not change are not fetched again, e.g. when only their tags changed.
+"""
+
+import sqlite3
+
+
+class ConversationPartsIndex:
+    """
+    sqlite3 index of the synced conversations: conversation id -> total_parts, id and updated_at of the last part.
+
+    The changes are committed by `commit` when the conversations bookmark is written and once the stream is synced,
+    `close` discards the changes since the last bookmark of an interrupted sync. Those conversations are then fetched
+    again by the next sync, as their records may not be covered by a state.
+    """
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS conversation_parts ('
+                                'conversation_id TEXT PRIMARY KEY, '
+                                'total_parts INTEGER NOT NULL, '
+                                'last_part_id TEXT, '
+                                'last_part_updated_at INTEGER)')
+
+    def get(self, conversation_id):
+        """Returns the (total_parts, last_part_id, last_part_updated_at) of the conversation or None."""
+        return self.connection.execute('SELECT total_parts, last_part_id, last_part_updated_at '
+                                       'FROM conversation_parts WHERE conversation_id = ?',
+                                       (str(conversation_id),)).fetchone()
+
+    def put(self, conversation_id, total_parts, last_part_id, last_part_updated_at):
+        self.connection.execute('INSERT OR REPLACE INTO conversation_parts VALUES (?, ?, ?, ?)',
+                                (str(conversation_id), total_parts, last_part_id, last_part_updated_at))
+
+    def clear(self):
+        self.connection.execute('DELETE FROM conversation_parts')
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,127 @@
+"""
+This module caches the JSON responses of the reference streams on disk between the syncs,
+so their unchanged datasets are not downloaded again on every sync.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import singer
+
+from tap_intercom.client import API_VERSION
+
+LOGGER = singer.get_logger()
+
+# Default maximum size of the cache directory, in bytes
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+
+
+def get_content_hash(body):
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk cache of the JSON responses, one file per request keyed by the API version, the access token, the URL
+    and the params. The workspaces of different access tokens do not share their responses in the same directory.
+
+    A response is served from the cache for `ttl` seconds after it is stored or validated. After that, the request
+    is sent with the `If-None-Match` header of its ETag and a 304 Not Modified response is served from the cache.
+    The responses are checked against their content hash when they are read, a corrupted response is fetched again.
+    The least recently used responses are evicted when the cache is over `max_size` bytes.
+    """
+    def __init__(self, directory, ttl=0, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        # Size of the cached responses, computed when the first response is stored
+        self.size = None
+        # The responses may be stored by several workers at the same time
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def get_key(url, params=None, access_token=None):
+        token_hash = hashlib.sha256(access_token.encode('utf-8')).hexdigest() if access_token else None
+        key = json.dumps([API_VERSION, token_hash, url, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.directory, '{}.json'.format(key))
+
+    def get(self, key):
+        """Returns the cached entry of the key with its `body`, `etag` and `validated_at`, or None."""
+        path = self.get_path(key)
+        try:
+            with open(path) as cache_file:
+                entry = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+        if get_content_hash(entry.get('body')) != entry.get('content_hash'):
+            LOGGER.warning("Cached response {} is corrupted, fetching it again".format(path))
+            self.remove(path)
+            return None
+        # The modification time orders the least recently used responses
+        os.utime(path)
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry['validated_at'] < self.ttl
+
+    def put(self, key, body, etag=None):
+        entry = {
+            'etag': etag,
+            'content_hash': get_content_hash(body),
+            'validated_at': time.time(),
+            'body': body
+        }
+        path = self.get_path(key)
+        # Write the whole file before it replaces the cached response
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'w') as cache_file:
+            json.dump(entry, cache_file)
+
+        with self.lock:
+            replaced_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temporary_path, path)
+            if self.size is None:
+                self.size = sum(size for _, size, _ in self.list_files())
+            else:
+                self.size += os.path.getsize(path) - replaced_size
+            if self.max_size and self.size > self.max_size:
+                self.evict()
+
+    def validate(self, key, entry):
+        """Stores that the cached response is still the response of the API."""
+        self.put(key, entry['body'], entry.get('etag'))
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def list_files(self):
+        """Returns the (modification time, size, path) of the cached responses."""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def evict(self):
+        """Removes the least recently used responses while the cache is over `max_size` bytes."""
+        files = self.list_files()
+        self.size = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if self.size <= self.max_size:
+                break
+            self.remove(path)
+            self.size -= size
@@ -0,0 +1,87 @@
+"""
+This module selects the JSON library decoding the API responses and encoding the RECORD and STATE messages.
+
+By default the responses are decoded by `requests` and the messages encoded by singer-python, both with simplejson.
+The `json_backend` config param selects another library, e.g. orjson when it is installed.
+"""
+
+import json
+import re
+
+import simplejson
+import singer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LOGGER = singer.get_logger()
+
+DEFAULT_JSON_BACKEND = 'simplejson'
+
+# Integers of 20 digits or more may not fit in the 64 bits of orjson, which decodes them as floats
+LONG_NUMBER = re.compile(rb'\d{20}')
+
+
+def dumps_with_full_precision(value):
+    """Encodes the decimals and the integers above 64 bits with full precision, as singer-python does."""
+    return simplejson.dumps(value, use_decimal=True)
+
+
+class StdlibJSONBackend:
+    name = 'json'
+
+    @staticmethod
+    def decode_response(response):
+        return json.loads(response.content)
+
+    @staticmethod
+    def dumps(value):
+        try:
+            return json.dumps(value)
+        except TypeError:
+            # The decimals are not supported by the json module
+            return dumps_with_full_precision(value)
+
+
+class OrjsonBackend:
+    name = 'orjson'
+
+    @staticmethod
+    def decode_response(response):
+        if LONG_NUMBER.search(response.content):
+            # The json module decodes the integers with full precision
+            return json.loads(response.content)
+        return orjson.loads(response.content)
+
+    @staticmethod
+    def dumps(value):
+        try:
+            return orjson.dumps(value).decode('utf-8')
+        except TypeError:
+            # orjson raises for the decimals and the integers above 64 bits
+            return dumps_with_full_precision(value)
+
+
+JSON_BACKENDS = {
+    StdlibJSONBackend.name: StdlibJSONBackend,
+    OrjsonBackend.name: OrjsonBackend
+}
+
+
+def get_json_backend(name):
+    """
+    Returns the JSON backend of the config param `json_backend`.
+    Returns None for the default backend, i.e. `requests` and singer-python.
+    orjson falls back to the json module of the standard library when it is not installed.
+    """
+    if not name or name == DEFAULT_JSON_BACKEND:
+        return None
+    if name not in JSON_BACKENDS:
+        raise ValueError("Unknown json_backend '{}', expected one of: {}".format(
+            name, ', '.join([DEFAULT_JSON_BACKEND] + sorted(JSON_BACKENDS))))
+    if name == OrjsonBackend.name and orjson is None:
+        LOGGER.warning("orjson is not installed, the json module is used instead")
+        return StdlibJSONBackend
+    return JSON_BACKENDS[name]
@@ -1,8 +1,13 @@
 """
 This module defines the stream classes and their individual sync logic.
 """
+# pylint: disable=too-many-lines
 
 
+import collections
+import concurrent.futures
+import contextlib
+import copy
 import datetime
 import hashlib
 import time
@@ -12,13 +17,94 @@ import singer
 from singer import Transformer, metrics, metadata, UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING
 from singer.transform import transform, unix_milliseconds_to_datetime
 
-from tap_intercom.client import (IntercomClient, IntercomError, IntercomNotFoundError)
-from tap_intercom.transform import (transform_json, transform_times, find_datetimes_in_schema)
+from tap_intercom import output
+from tap_intercom.compiled_transform import REMOVED, compile_filter, compile_transformer, filter_record
+from tap_intercom.concurrency import PARTITION_DONE, merge_concurrently, worker_pool
+from tap_intercom.client import (IntercomClient, IntercomError)
+from tap_intercom.pagination import NextUrlPaginator, ScrollPaginator, StartingAfterPaginator, StreamedStartingAfterPaginator, paginate
+from tap_intercom.parts_index import ConversationPartsIndex
+from tap_intercom.transform_pool import transform_pool
+from tap_intercom.transform import (iter_transform_json, apply_datetime_plan, compile_datetime_plan, find_datetimes_in_schema,
+                                    to_epoch_milliseconds)
 
 LOGGER = singer.get_logger()
 
 MAX_PAGE_SIZE = 150
 
+# Minimum length of a time window of the parallel backfill
+MIN_BACKFILL_WINDOW_SECONDS = 24 * 60 * 60
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+# Sub-stream response of a parent whose sub-stream records did not change since the last sync
+UNCHANGED_RESPONSE = object()
+
+# Fields of the `company_attributes` and `contact_attributes` records hashed into their primary key
+HASHED_FIELDS = ['id', 'name', 'description']
+
+
+def get_config_int(config, key, default):
+    """
+    Returns the integer value of the config param `key`.
+    If value is 0,"0","" or not passed then it returns the `default` value.
+    """
+    value = config.get(key)
+    if value and int(float(value)) > 0:
+        return int(float(value))
+    return default
+
+
+def get_config_bool(config, key):
+    """
+    Returns True if the config param `key` is true or "true".
+    """
+    return str(config.get(key, '')).lower() == 'true'
+
+
+def datetime_to_epoch_microseconds(dt_object):
+    """Returns the exact epoch microseconds of a UTC datetime as an integer."""
+    return (dt_object - EPOCH) // ONE_MICROSECOND
+
+
+def epoch_microseconds_to_datetime(timestamp):
+    return EPOCH + datetime.timedelta(microseconds=timestamp)
+
+
+def epoch_milliseconds_to_microseconds(timestamp):
+    """
+    Returns the epoch microseconds of the epoch millis `timestamp` of a record,
+    same as the datetime parsed from its `epoch_milliseconds_to_dt_str` string.
+    """
+    if type(timestamp) is int: # pylint: disable=unidiomatic-typecheck
+        return timestamp * 1000
+    return datetime_to_epoch_microseconds(
+        datetime.datetime.fromtimestamp(float(timestamp) / 1000.0, datetime.timezone.utc))
+
+
+def split_time_windows(start, end, count):
+    """
+    Split the [start, end) epoch seconds range into `count` disjoint windows of equal length.
+    Returns a list of (window_start, window_end) tuples.
+    """
+    length = (end - start) / count
+    bounds = [int(start + length * i) for i in range(count)] + [int(end)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+@contextlib.contextmanager
+def substream_index(stream, state):
+    """
+    Opens the index of the sub-stream for the sync of its parent, the index is saved if the sync succeeds
+    and closed in any case.
+    """
+    stream.open_index(state)
+    try:
+        yield
+        stream.save_index()
+    finally:
+        stream.close_index()
+
 
 class BaseStream:
     """
@@ -37,11 +123,18 @@ class BaseStream:
     parent = None
     data_key = None
     child = None
+    # Fields of the records used by the sync, never pruned by `prune_deselected_fields`
+    required_fields = []
 
-    def __init__(self, client: IntercomClient, catalog, selected_streams):
+    def __init__(self, client: IntercomClient, catalog, selected_streams, config=None):
         self.client = client
         self.catalog = catalog
         self.selected_streams = selected_streams
+        self.config = config or {}
+        self.datetime_plan = None
+        self.record_transformer = None
+        # Fields pruned from the records as they are read, see `get_field_filter`
+        self.field_filter = None
 
     def get_records(self, bookmark_datetime: datetime = None, is_parent: bool = False, stream_metadata=None) -> list:
         """
@@ -58,6 +151,57 @@ class BaseStream:
         raise NotImplementedError("Child classes of BaseStream require "
                                   "`get_records` implementation")
 
+    def get_transform_pool(self, stream_schema, stream_metadata, version=None):
+        """
+            Returns the context of the pool of `transform_workers` processes transforming the records of the stream,
+            None if `transform_workers` is 1, i.e. the records are transformed by the syncing thread.
+        """
+        return transform_pool(self.tap_stream_id,
+                              stream_schema,
+                              stream_metadata,
+                              get_config_int(self.config, 'transform_workers', 1),
+                              json_backend=self.config.get('json_backend'),
+                              version=version,
+                              compiled_transform=get_config_bool(self.config, 'compiled_transform'))
+
+    def get_field_filter(self, stream_metadata, required_fields=()):
+        """
+            Returns the fields deselected in the stream metadata, pruned from the records as soon as they are read
+            with `prune_deselected_fields`, so they are not de-nested, hashed or transformed. None if no field is pruned.
+            The key properties, the replication key, the `required_fields` of the stream and the `required_fields`
+            of the parent records used by the child stream are never pruned.
+        """
+        if not get_config_bool(self.config, 'prune_deselected_fields'):
+            return None
+        field_filter = compile_filter(stream_metadata)
+        if field_filter is None:
+            return None
+        for field in [*self.key_properties, self.replication_key, *self.required_fields, *required_fields]:
+            if field_filter.fields.get(field) is REMOVED:
+                del field_filter.fields[field]
+        if not field_filter.fields and field_filter.items is None:
+            return None
+        return field_filter
+
+    def prune_record(self, record):
+        """Removes the fields of the `field_filter` from the record in place"""
+        if self.field_filter is not None:
+            filter_record(record, self.field_filter)
+        return record
+
+    def iter_page_records(self, response):
+        """Yields the records of the page response, pruned and de-nested"""
+        return iter_transform_json(response, self.tap_stream_id, self.data_key, self.field_filter)
+
+    def get_pages(self, paginator=None):
+        """
+            Yields the responses of the pages of the paginator, the cached `pages.next` URLs of the stream by default.
+            The pages are prefetched by a background thread with `page_prefetch_depth`.
+        """
+        if paginator is None:
+            paginator = NextUrlPaginator(self.client, self.path, self.data_key, self.tap_stream_id, params=self.params, cache=True)
+        return paginate(paginator, get_config_int(self.config, 'page_prefetch_depth', 0))
+
     def generate_record_hash(self, original_record):
         """
             Function to generate the hash of name, full_name and label to use it as a Primary Key
@@ -65,10 +209,9 @@ class BaseStream:
         # There are 2 types for data_attributes in Intercom
         # -> Default: As discussed with support, there is an 'id' for custom data_attributes and that will be unique
         # -> Custom: Used 'name' and 'description' for identifying the data uniquely
-        fields_to_hash = ['id', 'name', 'description']
         hash_string = ''
 
-        for key in fields_to_hash:
+        for key in HASHED_FIELDS:
             hash_string += str(original_record.get(key, ''))
 
         hash_string_bytes = hash_string.encode('utf-8')
@@ -88,33 +231,117 @@ class BaseStream:
     def dt_to_epoch_seconds(dt_object: datetime) -> float:
         return datetime.datetime.timestamp(dt_object)
 
-    def sync_substream(self, parent_id, stream_schema, stream_metadata, parent_replication_key, state):
+    def get_datetime_plan(self, stream_schema):
         """
-            Sync sub-stream data based on parent id and update the state to parent's replication value
+            Returns the plan transforming the date-time fields of the stream schema, compiled on the first call
+        """
+        if self.datetime_plan is None or self.datetime_plan[0] is not stream_schema:
+            self.datetime_plan = (stream_schema, compile_datetime_plan(find_datetimes_in_schema(stream_schema)))
+        return self.datetime_plan[1]
+
+    def transform_record(self, record, stream_schema, stream_metadata):
+        """
+            Transforms the record with the stream schema and metadata, by the transformer compiled from them
+            with `compiled_transform`, which returns the same record as singer's `transform`.
+        """
+        if not get_config_bool(self.config, 'compiled_transform'):
+            return transform(record,
+                             stream_schema,
+                             integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING,
+                             metadata=stream_metadata)
+        if self.record_transformer is None or self.record_transformer[0] is not stream_schema \
+                or self.record_transformer[1] is not stream_metadata:
+            # Compiled on the first record of the stream
+            self.record_transformer = (stream_schema, stream_metadata, compile_transformer(stream_schema, stream_metadata))
+        return self.record_transformer[2](record)
+
+    def get_parent_response(self, parent_record): # pylint: disable=unused-argument
+        """
+            Returns the sub-stream response known from the parent record, `UNCHANGED_RESPONSE` if the sub-stream
+            records did not change since the last sync, or None to fetch it.
+        """
+        return None
+
+    def open_index(self, state):
+        """
+            Open the index of the sub-stream records synced by the previous syncs, if any
+        """
+
+    def index_substream(self, parent_id, last_record, response):
+        """
+            Update the index with the sub-stream records of the parent id, `last_record` is the last one or None
+            and `response` is the sub-stream response
+        """
+
+    def save_index(self):
+        """
+            Save the index with the bookmarks, its records are covered by the state written
+        """
+
+    def close_index(self):
+        """
+            Close the index, the changes not saved are discarded
+        """
+
+    def get_streamed_substream_response(self, parent_id):
+        """
+            Returns the sub-stream response for the parent id, parsed as it is iterated
+        """
+        raise NotImplementedError("Child classes of BaseStream require "
+                                  "`get_streamed_substream_response` implementation")
+
+    def get_streamed_substream_records(self, parent_id, response):
+        """
+            Yields the sub-stream records of the parent id as the streamed response is parsed
+        """
+        raise NotImplementedError("Child classes of BaseStream require "
+                                  "`get_streamed_substream_records` implementation")
+
+    def get_substream_response(self, parent_id):
+        """
+            Fetch the sub-stream response for the parent id
         """
-        schema_datetimes = find_datetimes_in_schema(stream_schema)
         LOGGER.info("Syncing: {}, parent_stream: {}, parent_id: {}".format(self.tap_stream_id, self.parent.tap_stream_id, parent_id))
         call_path = self.path.format(parent_id)
-        response = self.client.get(call_path, params=self.params)
+        return self.client.get(call_path, params=self.params)
 
-        data_for_transform = {self.data_key: [response]}
-
-        transformed_records = transform_json(data_for_transform, self.tap_stream_id, self.data_key)
-        LOGGER.info("Synced: {}, parent_id: {}, records: {}".format(self.tap_stream_id, parent_id, len(transformed_records)))
+    def sync_substream(self, parent_id, stream_schema, stream_metadata, parent_replication_key, state, response=None):
+        """
+            Sync sub-stream data based on parent id and update the state to parent's replication value
+            If the `response` is already fetched(prefetched by a worker), then it is used instead of calling the API.
+        """
+        datetime_plan = self.get_datetime_plan(stream_schema)
+        streamed_response = None
+        if response is UNCHANGED_RESPONSE:
+            LOGGER.info("Skipped: {}, parent_id: {}, the records did not change".format(self.tap_stream_id, parent_id))
+            transformed_records = []
+        elif response is None and get_config_bool(self.config, 'stream_json_responses'):
+            # The records are written while the response is parsed
+            streamed_response = self.get_streamed_substream_response(parent_id)
+            transformed_records = self.get_streamed_substream_records(parent_id, streamed_response)
+        else:
+            if response is None:
+                response = self.get_substream_response(parent_id)
+
+            data_for_transform = {self.data_key: [response]}
+
+            transformed_records = self.iter_page_records(data_for_transform)
+        last_record = None
         with metrics.record_counter(self.tap_stream_id) as counter:
             # Iterate over conversation_parts records
             for record in transformed_records:
-                transform_times(record, schema_datetimes) # Transfrom datetimes fields of record
+                last_record = record
+                apply_datetime_plan(record, datetime_plan) # Transfrom datetimes fields of record
 
-                transformed_record = transform(record,
-                                                stream_schema,
-                                                integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING,
-                                                metadata=stream_metadata)
-                singer.write_record(self.tap_stream_id, transformed_record, time_extracted=singer.utils.now())
+                transformed_record = self.transform_record(record, stream_schema, stream_metadata)
+                output.write_record(self.tap_stream_id, transformed_record, time_extracted=singer.utils.now())
                 counter.increment()
 
             LOGGER.info("FINISHED Syncing: {}, total_records: {}.".format(self.tap_stream_id, counter.value))
 
+        if response is not UNCHANGED_RESPONSE:
+            self.index_substream(parent_id, last_record, response if streamed_response is None else streamed_response.envelope)
+
         # Conversations(parent) are coming in ascending order
         # so write state with updated_at of conversation after yielding conversation_parts for it.
         parent_bookmark_value = self.epoch_milliseconds_to_dt_str(parent_replication_key)
@@ -122,7 +349,7 @@ class BaseStream:
                                         self.tap_stream_id,
                                         self.replication_key,
                                         parent_bookmark_value)
-        singer.write_state(state)
+        output.write_state(state)
 
         return state
 
@@ -139,6 +366,13 @@ class IncrementalStream(BaseStream):
     last_processed = None
     last_sync_started_at = None
     skipped_parent_ids = []
+    # Config param of the number of `updated_at` windows fetched in parallel, see `set_backfill_windows`
+    backfill_windows_config = None
+    backfill_windows = None
+    # Windows of the interrupted sync as they were in the state
+    resumed_windows = []
+    # Index of the window of the last record yielded by `get_windows_records`
+    current_window = None
 
     def set_last_processed(self, state):
         self.last_processed = None
@@ -158,6 +392,91 @@ class IncrementalStream(BaseStream):
                                      self.replication_key,
                                      bookmark_value)
 
+    def set_backfill_windows(self, bookmark_datetime, end_datetime):
+        """
+        Split the `updated_at` range from the bookmark to `end_datetime` into `backfill_windows_config` windows
+        of at least a day. The windows of an interrupted sync are loaded by `load_backfill_windows` instead.
+        """
+        window_count = get_config_int(self.config, self.backfill_windows_config, 1) if self.backfill_windows_config else 1
+        if self.backfill_windows is not None or window_count == 1 or self.last_processed:
+            return
+
+        start = self.dt_to_epoch_seconds(bookmark_datetime)
+        end = self.dt_to_epoch_seconds(end_datetime)
+        # Do not split the range in windows shorter than a day
+        window_count = min(window_count, int((end - start) // MIN_BACKFILL_WINDOW_SECONDS))
+        if window_count <= 1:
+            return
+
+        self.backfill_windows = [{'start': window_start, 'end': window_end}
+                                 for window_start, window_end in split_time_windows(start, end, window_count)]
+        # The records updated during the sync are fetched by the last window
+        self.backfill_windows[-1]['end'] = None
+
+    def load_backfill_windows(self, state):
+        # Copy the windows as their progress is updated before the records are written
+        self.backfill_windows = copy.deepcopy(singer.get_bookmark(
+            state, self.tap_stream_id, "backfill_windows"))
+
+    def get_unfinished_windows(self):
+        return [dict(window) for window in self.backfill_windows if not window.get('done')]
+
+    def get_window_records(self, window):
+        """Returns the records of the window from its last progress"""
+        raise NotImplementedError("Streams with `backfill_windows_config` require "
+                                  "`get_window_records` implementation")
+
+    def set_window_progress(self, window, record):
+        """Update the resume point of the window with the record"""
+        raise NotImplementedError("Streams with `backfill_windows_config` require "
+                                  "`set_window_progress` implementation")
+
+    def get_windows_records(self):
+        """
+        Page each backfill window with its own cursor in its own worker and yield the records of all the windows.
+        The progress of a window is updated with a record when it is yielded, so the
+        intermediate bookmark written after the record is processed resumes after it.
+        """
+        self.resumed_windows = copy.deepcopy(self.backfill_windows)
+        workers = get_config_int(self.config, self.backfill_windows_config, 1)
+        LOGGER.info("Syncing: {} in {} windows".format(self.tap_stream_id, len(self.backfill_windows)))
+
+        windows_records = [self.get_window_records(window) for window in self.resumed_windows]
+        for index, record in merge_concurrently(windows_records, workers):
+            self.current_window = index
+            if record is PARTITION_DONE:
+                self.backfill_windows[index]['done'] = True
+                continue
+            self.set_window_progress(self.backfill_windows[index], record)
+            yield record
+
+    def get_child_bookmark_value(self, parent_replication_value):
+        """
+        Returns the value of the replication key of the parent record written as the child bookmark
+        once the child records of the parent are synced.
+        The records of the backfill windows are interleaved, so while the windows are synced it is at most
+        the start of the first unfinished window: the parents of the windows resumed after an interruption
+        are not filtered out by the child bookmark.
+        """
+        if self.current_window is None:
+            return parent_replication_value
+        first_window = next((window for window in self.backfill_windows if not window.get('done')), None)
+        if first_window is None:
+            return parent_replication_value
+        return min(parent_replication_value, first_window['start'] * 1000)
+
+    @staticmethod
+    def sync_prefetched_substreams(child_stream_obj, pending, child_schema, child_metadata, state, keep=0): # pylint: disable=too-many-arguments
+        """
+            Write the prefetched sub-stream responses in the parent order, leaving at most `keep` fetches in flight.
+            The `pending` deque holds (parent_id, child_bookmark_value, future) tuples.
+        """
+        while len(pending) > keep:
+            parent_id, child_bookmark_value, future = pending.popleft()
+            state = child_stream_obj.sync_substream(parent_id, child_schema, child_metadata, child_bookmark_value, state,
+                                                    response=future.result())
+        return state
+
     def write_intermediate_bookmark(self, state, last_processed, bookmark_value):
         if self.to_write_intermediate_bookmark:
             # Write bookmark and state after every page of records
@@ -165,11 +484,11 @@ class IncrementalStream(BaseStream):
                                           self.tap_stream_id,
                                           self.replication_key,
                                           singer.utils.strftime(bookmark_value))
-            singer.write_state(state)
+            output.write_state(state)
 
     # Disabled `unused-argument` as it causing pylint error.
     # Method which call this `sync` method is passing unused argument.So, removing argument would not work.
-    # pylint: disable=too-many-arguments,unused-argument
+    # pylint: disable=too-many-arguments,unused-argument,too-many-branches
     def sync(self,
              state: dict,
              stream_schema: dict,
@@ -205,7 +524,13 @@ class IncrementalStream(BaseStream):
         # And update the sync start date to minimum of parent bookmark or child bookmark
         child_bookmark_ts = None
         child_stream_obj = None
+        child_schema = None
         child_metadata = None
+        # Number of workers to prefetch the child records, the pool is used if `conversation_parts_workers` is more than 1
+        child_workers = 1
+        pending_children = collections.deque()
+        # Last update of the parents whose child records are synced, the child bookmark once the backfill windows are synced
+        max_child_parent_value = None
         if has_child:
             child_bookmark = singer.get_bookmark(state, child_stream.tap_stream_id, self.replication_key, config['start_date'])
             child_bookmark_utc = singer.utils.strptime_to_utc(child_bookmark)
@@ -222,48 +547,58 @@ class IncrementalStream(BaseStream):
                 sync_start_date = singer.utils.strptime_to_utc(child_bookmark)
 
             # Create child stream object and generate schema
-            child_stream_obj = child_stream(self.client, self.catalog, self.selected_streams)
+            child_stream_obj = child_stream(self.client, self.catalog, self.selected_streams, self.config)
             child_stream_ = self.catalog.get_stream(child_stream.tap_stream_id)
             child_schema = child_stream_.schema.to_dict()
             child_metadata = metadata.to_map(child_stream_.metadata)
             if is_child_selected:
+                child_stream_obj.field_filter = child_stream_obj.get_field_filter(child_metadata)
                 # Write schema for child stream as it will be synced by the parent stream
-                singer.write_schema(
+                output.write_schema(
                     child_stream.tap_stream_id,
                     child_schema,
                     child_stream.key_properties,
                     child_stream.replication_key
                 )
+                child_workers = get_config_int(self.config, 'conversation_parts_workers', 1)
+
+        # The fields of the parent used by the child sync are not pruned
+        self.field_filter = self.get_field_filter(stream_metadata, child_stream.parent_fields if is_child_selected else ())
 
         LOGGER.info("Stream: {}, initial max_bookmark_value: {}".format(self.tap_stream_id, sync_start_date))
-        max_datetime = sync_start_date
+        # The replication keys are compared as epoch microseconds, the datetime is built only to write a bookmark
+        parent_bookmark_timestamp = datetime_to_epoch_microseconds(parent_bookmark_utc)
+        max_timestamp = datetime_to_epoch_microseconds(sync_start_date)
         # We are not using singer's record counter as the counter reset after 60 seconds
         record_counter = 0
         all_counter = 0
-        schema_datetimes = find_datetimes_in_schema(stream_schema)
+        datetime_plan = self.get_datetime_plan(stream_schema)
 
-        with metrics.record_counter(self.tap_stream_id) as counter:
+        # The index is saved once the records are written, it is closed without saving if the sync fails
+        index_context = substream_index(child_stream_obj, state) if is_child_selected else contextlib.nullcontext()
+        with index_context, metrics.record_counter(self.tap_stream_id) as counter, worker_pool(child_workers) as child_executor, \
+                self.get_transform_pool(stream_schema, stream_metadata) as records_pool:
             for record in self.get_records(sync_start_date, stream_metadata=stream_metadata):
                 # In case of interrupted sync, skip records last synced conversations
                 all_counter += 1
-                transform_times(record, schema_datetimes)
+                # Before the datetimes of the parent record are transformed, as in the response of the child
+                child_response = child_stream_obj.get_parent_response(record) if is_child_selected else None
+                apply_datetime_plan(record, datetime_plan)
 
-                record_datetime = singer.utils.strptime_to_utc(
-                    self.epoch_milliseconds_to_dt_str(
-                        record[self.replication_key])
-                )
+                record_timestamp = epoch_milliseconds_to_microseconds(record[self.replication_key])
 
                 # Write the record if the parent is selected
-                if is_parent_selected and record_datetime >= parent_bookmark_utc:
+                if is_parent_selected and record_timestamp >= parent_bookmark_timestamp:
                     record_counter += 1
-                    transformed_record = transform(record,
-                                                   stream_schema,
-                                                   integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING,
-                                                   metadata=stream_metadata)
-                    # Write record if a parent is selected
-                    singer.write_record(self.tap_stream_id, transformed_record, time_extracted=singer.utils.now())
+                    if records_pool is not None:
+                        # The record is transformed and written by the pool
+                        records_pool.submit(record)
+                    else:
+                        transformed_record = self.transform_record(record, stream_schema, stream_metadata)
+                        # Write record if a parent is selected
+                        output.write_record(self.tap_stream_id, transformed_record, time_extracted=singer.utils.now())
                     counter.increment()
-                    max_datetime = max(record_datetime, max_datetime)
+                    max_timestamp = max(record_timestamp, max_timestamp)
 
                 # Sync child stream, if the child is selected and if we have records greater than the child stream bookmark
                 if has_child and is_child_selected and (record[self.replication_key] >= child_bookmark_ts):
@@ -272,17 +607,46 @@ class IncrementalStream(BaseStream):
                     if self.skip_records(record):
                         self.skipped_parent_ids.append((record.get('id'), record[self.replication_key]))
                         continue
-                    state = child_stream_obj.sync_substream(record.get('id'), child_schema, child_metadata, record[self.replication_key], state)
+                    child_bookmark_value = self.get_child_bookmark_value(record[self.replication_key])
+                    max_child_parent_value = max(record[self.replication_key], max_child_parent_value or 0)
+                    if child_executor:
+                        # Prefetch the child response in the pool and write the child records in the parent order
+                        if child_response is not None:
+                            future = concurrent.futures.Future()
+                            future.set_result(child_response)
+                        else:
+                            future = child_executor.submit(child_stream_obj.get_substream_response, record.get('id'))
+                        pending_children.append((record.get('id'), child_bookmark_value, future))
+                        state = self.sync_prefetched_substreams(child_stream_obj, pending_children, child_schema,
+                                                                child_metadata, state, keep=MAX_PAGE_SIZE)
+                    else:
+                        state = child_stream_obj.sync_substream(record.get('id'), child_schema, child_metadata, child_bookmark_value, state,
+                                                                response=child_response)
 
                 if record_counter == MAX_PAGE_SIZE:
-                    self.write_intermediate_bookmark(state, record.get("id"), max_datetime)
+                    # Child records of the parents processed so far must be written before the intermediate bookmark
+                    state = self.sync_prefetched_substreams(child_stream_obj, pending_children, child_schema, child_metadata, state)
+                    # Records of the pool must be written before the intermediate bookmark
+                    if records_pool is not None:
+                        records_pool.flush()
+                    self.write_intermediate_bookmark(state, record.get("id"), epoch_microseconds_to_datetime(max_timestamp))
+                    if is_child_selected:
+                        # The index moves with the state, the parents synced so far are not synced again
+                        child_stream_obj.save_index()
                     # Reset counter
                     record_counter = 0
 
                 if all_counter % 1000 == 0:
                     LOGGER.info("Still Syncing: {}, total_records written so far: {}. total seen {}".format(self.tap_stream_id, record_counter, all_counter))
 
-            bookmark_date = singer.utils.strftime(max_datetime)
+            state = self.sync_prefetched_substreams(child_stream_obj, pending_children, child_schema, child_metadata, state)
+            if self.current_window is not None and max_child_parent_value is not None:
+                # All the windows are synced, the child bookmark is the last parent updated
+                state = singer.write_bookmark(state,
+                                              child_stream.tap_stream_id,
+                                              child_stream.replication_key,
+                                              self.epoch_milliseconds_to_dt_str(max_child_parent_value))
+            bookmark_date = singer.utils.strftime(epoch_microseconds_to_datetime(max_timestamp))
             LOGGER.info("FINISHED Syncing: {}, total_records: {}.".format(self.tap_stream_id, record_counter))
 
         LOGGER.info("Stream: {}, writing final bookmark".format(self.tap_stream_id))
@@ -320,16 +684,19 @@ class FullTableStream(BaseStream):
         :param config: A dictionary containing tap config data
         :return: State data in the form of a dictionary
         """
-        schema_datetimes = find_datetimes_in_schema(stream_schema)
+        datetime_plan = self.get_datetime_plan(stream_schema)
+        self.field_filter = self.get_field_filter(stream_metadata)
+        activate_version = None
         if self.sync_with_version:
             # Write activate version message
             activate_version = int(time.time() * 1000)
             activate_version_message = singer.ActivateVersionMessage(
                 stream=self.tap_stream_id,
                 version=activate_version)
-            singer.write_message(activate_version_message)
+            output.write_message(activate_version_message)
 
-        with metrics.record_counter(self.tap_stream_id) as counter:
+        with metrics.record_counter(self.tap_stream_id) as counter, \
+                self.get_transform_pool(stream_schema, stream_metadata, activate_version) as records_pool:
             for record in self.get_records():
 
                 # For company and contact attributes, it is difficult to define a Primary Key
@@ -337,25 +704,28 @@ class FullTableStream(BaseStream):
                 if self.tap_stream_id in ['company_attributes', 'contact_attributes']:
                     record = self.generate_record_hash(record)
 
-                transform_times(record, schema_datetimes)
+                apply_datetime_plan(record, datetime_plan)
+
+                if records_pool is not None:
+                    # The record is transformed and written by the pool, with the version if it is set
+                    records_pool.submit(record)
+                    counter.increment()
+                    continue
 
-                transformed_record = transform(record,
-                                                stream_schema,
-                                                integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING,
-                                                metadata=stream_metadata)
+                transformed_record = self.transform_record(record, stream_schema, stream_metadata)
                 # Write records with time_extracted field
                 if self.sync_with_version:
                     # Using "write_message" if the version is found. As "write_record" params do not contain "version"
-                    singer.write_message(singer.RecordMessage(stream=self.tap_stream_id, record=transformed_record, version=activate_version, time_extracted=singer.utils.now()))
+                    output.write_message(singer.RecordMessage(stream=self.tap_stream_id, record=transformed_record, version=activate_version, time_extracted=singer.utils.now()))
                 else:
-                    singer.write_record(self.tap_stream_id, transformed_record, time_extracted=singer.utils.now())
+                    output.write_record(self.tap_stream_id, transformed_record, time_extracted=singer.utils.now())
                 counter.increment()
 
             LOGGER.info("FINISHED Syncing: {}, total_records: {}.".format(self.tap_stream_id, counter.value))
 
         # Write activate version after syncing
         if self.sync_with_version:
-            singer.write_message(activate_version_message)
+            output.write_message(activate_version_message)
 
         return state
 
@@ -373,7 +743,7 @@ class AdminList(FullTableStream):
     data_key = 'admins'
 
     def get_records(self, bookmark_datetime=None, is_parent=False) -> Iterator[list]:
-        response = self.client.get(self.path)
+        response = self.client.get(self.path, cache=True)
 
         if not response.get(self.data_key):
             LOGGER.critical('response is empty for {} stream'.format(self.tap_stream_id))
@@ -404,20 +774,30 @@ class Admins(FullTableStream):
         :return: A list of records
         """
         # pylint: disable=not-callable
-        parent = self.parent(self.client, self.catalog, self.selected_streams)
+        parent = self.parent(self.client, self.catalog, self.selected_streams, self.config)
         return parent.get_records(bookmark_datetime, is_parent=True)
 
     def get_records(self, bookmark_datetime=None, is_parent=False) -> Iterator[list]:
         LOGGER.info("Syncing: {}".format(self.tap_stream_id))
-        admins = []
-
-        for record in self.get_parent_data():
-            call_path = self.path.format(record)
-            results = self.client.get(call_path)
-
-            admins.append(results)
-
-        yield from admins
+        call_paths = (self.path.format(record) for record in self.get_parent_data())
+
+        workers = get_config_int(self.config, 'admin_workers', 1)
+        with worker_pool(workers) as executor:
+            if executor is None:
+                for call_path in call_paths:
+                    yield self.prune_record(self.client.get(call_path, cache=True))
+                return
+
+            # The admins are yielded in the order they are fetched, with at most 2 requests per worker queued
+            pending = set()
+            for call_path in call_paths:
+                pending.add(executor.submit(self.client.get, call_path, cache=True))
+                if len(pending) >= 2 * workers:
+                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        yield self.prune_record(future.result())
+            for future in concurrent.futures.as_completed(pending):
+                yield self.prune_record(future.result())
 
 
 class Companies(IncrementalStream):
@@ -434,31 +814,9 @@ class Companies(IncrementalStream):
     data_key = 'data'
 
     def get_records(self, bookmark_datetime=None, is_parent=False, stream_metadata=None) -> Iterator[list]:
-        scrolling = True
-        params = {}
         LOGGER.info("Syncing: {}".format(self.tap_stream_id))
-        records = []
-
-        while True:
-            try:
-                response = self.client.get(self.path, params=params)
-            except IntercomNotFoundError as err:
-                LOGGER.info("Synced last page: {}, records: {}".format(self.tap_stream_id, len(records)))
-                break
-
-            if response.get(self.data_key) is None:
-                LOGGER.warning('response is empty for "{}" stream'.format(self.tap_stream_id))
-
-            records = transform_json(response, self.tap_stream_id, self.data_key)
-            LOGGER.info("Synced: {}, records: {}".format(self.tap_stream_id, len(records)))
-
-            # stop scrolling if 'data' array is empty
-            if len(records) > 0:
-                scroll_param = response.get('scroll_param')
-                params = {'scroll_param': scroll_param}
-                LOGGER.info("Syncing next page")
-
-            yield from records
+        for response in self.get_pages(ScrollPaginator(self.client, self.path, self.data_key, self.tap_stream_id)):
+            yield from self.iter_page_records(response)
 
 
 class CompanyAttributes(FullTableStream):
@@ -476,24 +834,12 @@ class CompanyAttributes(FullTableStream):
     # As we are preparing the hash of ['id', 'name', 'description'] and using it as the Primary Key and there are chances
     # of field value being updated, thus, on the target side, there will be a redundant entry of the same record.
     sync_with_version = True
+    required_fields = HASHED_FIELDS
 
     def get_records(self, bookmark_datetime=None, is_parent=False) -> Iterator[list]:
-        paging = True
-        next_page = None
         LOGGER.info("Syncing: {}".format(self.tap_stream_id))
-
-        while paging:
-            response = self.client.get(self.path, url=next_page, params=self.params)
-
-            LOGGER.info("Synced: {}, records: {}".format(self.tap_stream_id, len(response.get(self.data_key, []))))
-            if 'pages' in response and response.get('pages', {}).get('next'):
-                next_page = response.get('pages', {}).get('next')
-                self.path = None
-                LOGGER.info("Syncing next page")
-            else:
-                paging = False
-
-            yield from response.get(self.data_key,  [])
+        for response in self.get_pages():
+            yield from self.iter_page_records(response)
 
 
 class CompanySegments(IncrementalStream):
@@ -514,22 +860,9 @@ class CompanySegments(IncrementalStream):
     data_key = 'segments'
 
     def get_records(self, bookmark_datetime=None, is_parent=False, stream_metadata=None) -> Iterator[list]:
-        paging = True
-        next_page = None
         LOGGER.info("Syncing: {}".format(self.tap_stream_id))
-
-        while paging:
-            response = self.client.get(self.path, url=next_page, params=self.params)
-
-            LOGGER.info("Synced: {}, records: {}".format(self.tap_stream_id, len(response.get(self.data_key, []))))
-            if 'pages' in response and response.get('pages', {}).get('next'):
-                next_page = response.get('pages', {}).get('next')
-                self.path = None
-                LOGGER.info("Syncing next page")
-            else:
-                paging = False
-
-            yield from response.get(self.data_key)
+        for response in self.get_pages():
+            yield from self.iter_page_records(response)
 
 
 class Conversations(IncrementalStream):
@@ -547,10 +880,12 @@ class Conversations(IncrementalStream):
     data_key = 'conversations'
     per_page = MAX_PAGE_SIZE
     child = 'conversation_parts'
+    backfill_windows_config = 'conversations_backfill_windows'
 
     def set_last_processed(self, state):
         self.last_processed = singer.get_bookmark(
             state, self.tap_stream_id, "last_processed")
+        self.load_backfill_windows(state)
 
     def set_last_sync_started_at(self, state):
         last_sync_started_at = singer.get_bookmark(
@@ -558,6 +893,10 @@ class Conversations(IncrementalStream):
         self.last_sync_started_at = last_sync_started_at or singer.utils.strftime(singer.utils.now())
 
     def skip_records(self, record):
+        if self.current_window is not None:
+            # Last processed id of the window in the interrupted sync
+            last_processed = self.resumed_windows[self.current_window].get('last_processed')
+            return last_processed and record.get("id") <= last_processed
         # If last processed id exists then check if current record id is less than last processed id
         return self.last_processed and record.get("id") <= self.last_processed
 
@@ -573,28 +912,40 @@ class Conversations(IncrementalStream):
         if "last_processed" in state.get("bookmarks", {}).get(self.tap_stream_id, {}):
             del state["bookmarks"][self.tap_stream_id]["last_processed"]
 
+        if "backfill_windows" in state.get("bookmarks", {}).get(self.tap_stream_id, {}):
+            del state["bookmarks"][self.tap_stream_id]["backfill_windows"]
+
         return singer.write_bookmark(state,
                                      self.tap_stream_id,
                                      self.replication_key,
                                      bookmark_value)
 
     def write_intermediate_bookmark(self, state, last_processed, bookmark_value):
-        # In scenarios where sync is interrupted, we should resume from the last id processed
-        state = singer.write_bookmark(state,
-                                      self.tap_stream_id,
-                                      "last_processed",
-                                      last_processed)
+        if self.current_window is not None:
+            # Write the progress of the unfinished windows of the parallel backfill
+            state = singer.write_bookmark(state,
+                                          self.tap_stream_id,
+                                          "backfill_windows",
+                                          self.get_unfinished_windows())
+        else:
+            # In scenarios where sync is interrupted, we should resume from the last id processed
+            state = singer.write_bookmark(state,
+                                          self.tap_stream_id,
+                                          "last_processed",
+                                          last_processed)
 
         # This should be set as new bookmark once all conversation records are synced
         state = singer.write_bookmark(state,
                                       self.tap_stream_id,
                                       "last_sync_started_at",
                                       self.last_sync_started_at)
-        singer.write_state(state)
+        output.write_state(state)
 
-    def get_records(self, bookmark_datetime=None, is_parent=False, stream_metadata=None) -> Iterator[list]:
-        paging = True
-        starting_after = None
+    def get_search_query(self, bookmark_datetime, last_processed, end_epoch_seconds=None):
+        """
+        Returns the search query of the conversations updated since the bookmark, sorted by id.
+        The `end_epoch_seconds` limits the query to the conversations updated before it.
+        """
         search_query = {
             'pagination': {
                 'per_page': self.per_page
@@ -608,12 +959,12 @@ class Conversations(IncrementalStream):
                             {
                                 'field': 'id',
                                 'operator': '>',
-                                'value': self.last_processed or ""
+                                'value': last_processed or ""
                             },
                             {
                                 'field': 'id',
                                 'operator': '=',
-                                'value': self.last_processed or ""
+                                'value': last_processed or ""
                             }]
                     },
                     {
@@ -636,25 +987,65 @@ class Conversations(IncrementalStream):
                 "order": "ascending"
             }
         }
-        LOGGER.info("Syncing: {}".format(self.tap_stream_id))
+        if end_epoch_seconds is not None:
+            search_query['query']['value'].append({
+                'field': self.replication_key,
+                'operator': '<',
+                'value': end_epoch_seconds
+            })
+        return search_query
 
-        while paging:
-            response = self.client.post(self.path, json=search_query)
+    def get_search_params(self):
+        """
+        Returns the query params of the search, the conversations are requested as plaintext with
+        `embedded_conversation_parts`, so the bodies of their parts are the same as in `conversations/{id}`.
+        """
+        if get_config_bool(self.config, 'embedded_conversation_parts'):
+            return self.params
+        return None
+
+    def get_search_records(self, search_query):
+        paginator = StartingAfterPaginator(self.client, self.path, self.data_key, self.tap_stream_id, search_query,
+                                           params=self.get_search_params())
+        for response in self.get_pages(paginator):
+            yield from self.iter_page_records(response)
+
+    def get_records_of_search(self, search_query):
+        if get_config_bool(self.config, 'stream_json_responses'):
+            return self.get_streamed_search_records(search_query)
+        return self.get_search_records(search_query)
+
+    def get_streamed_search_records(self, search_query):
+        """
+        Same as `get_search_records`, except that the records of a page are yielded as the response is parsed.
+        The next page is requested once all the records of the page are parsed, the pages are not prefetched.
+        """
+        paginator = StreamedStartingAfterPaginator(self.client, self.path, self.data_key, self.tap_stream_id, search_query,
+                                                   params=self.get_search_params())
+        for response in self.get_pages(paginator):
+            for record in response:
+                yield from self.iter_page_records({self.data_key: [record]})
 
-            if 'pages' in response and response.get('pages', {}).get('next'):
-                starting_after = response.get('pages').get('next').get('starting_after')
-                search_query['pagination'].update({'starting_after': starting_after})
-            else:
-                paging = False
+    def get_window_records(self, window):
+        window_start = datetime.datetime.fromtimestamp(window['start'], datetime.timezone.utc)
+        return self.get_records_of_search(self.get_search_query(window_start, window.get('last_processed'), window.get('end')))
 
-            records = transform_json(response, self.tap_stream_id, self.data_key)
-            LOGGER.info("Synced: {} for page: {}, records: {}".format(self.tap_stream_id, response.get('pages', {}).get('page'), len(records)))
+    def set_window_progress(self, window, record):
+        window['last_processed'] = record.get('id')
 
-            if is_parent:
-                for record in records:
-                    yield record.get('id')
-            else:
-                yield from records
+    def get_records(self, bookmark_datetime=None, is_parent=False, stream_metadata=None) -> Iterator[list]:
+        self.set_backfill_windows(bookmark_datetime, singer.utils.strptime_to_utc(self.last_sync_started_at))
+        if self.backfill_windows:
+            records = self.get_windows_records()
+        else:
+            LOGGER.info("Syncing: {}".format(self.tap_stream_id))
+            records = self.get_records_of_search(self.get_search_query(bookmark_datetime, self.last_processed))
+
+        if is_parent:
+            for record in records:
+                yield record.get('id')
+        else:
+            yield from records
 
 
 class ConversationParts(BaseStream):
@@ -672,6 +1063,134 @@ class ConversationParts(BaseStream):
     parent = Conversations
     params = {'display_as': 'plaintext'}
     data_key = 'conversations'
+    parts_index = None
+    # The number of parts of the conversation is saved in the index
+    required_fields = ['conversation_total_parts']
+    # Fields of the conversations used to sync their parts, not pruned from the conversations
+    parent_fields = ['created_at', 'updated_at', 'conversation_parts']
+
+    def open_index(self, state):
+        """
+        Opens the index of the `conversation_parts_index` config param, the index is cleared when there is no bookmark,
+        i.e. when all the conversations are synced.
+        """
+        if self.config.get('conversation_parts_index'):
+            self.parts_index = ConversationPartsIndex(self.config['conversation_parts_index'])
+            if singer.get_bookmark(state, self.tap_stream_id, self.replication_key) is None:
+                self.parts_index.clear()
+
+    def save_index(self):
+        if self.parts_index is not None:
+            self.parts_index.commit()
+
+    def close_index(self):
+        if self.parts_index is not None:
+            self.parts_index.close()
+            self.parts_index = None
+
+    def index_substream(self, parent_id, last_record, response):
+        if self.parts_index is None:
+            return
+        if last_record is not None:
+            if last_record.get('conversation_total_parts') is not None:
+                self.parts_index.put(parent_id,
+                                     last_record['conversation_total_parts'],
+                                     last_record.get('id'),
+                                     last_record.get('updated_at'))
+        elif self.get_total_parts(response or {}) == 0:
+            # The conversations without parts are indexed without a last part
+            self.parts_index.put(parent_id, 0, None, None)
+
+    @staticmethod
+    def get_total_parts(conversation):
+        """Returns the `conversation_parts.total_parts` of the conversation, None if it is unknown."""
+        conversation_parts = conversation.get('conversation_parts')
+        if isinstance(conversation_parts, dict):
+            return conversation_parts.get('total_parts')
+        return None
+
+    def is_unchanged(self, parent_record):
+        """
+        Returns True if the conversation has the same number of parts as when its parts were synced,
+        and the same last part, with the same `updated_at`, when all its parts are in the search results.
+        The number of parts is only known from the `conversation_parts.total_parts` of the search results,
+        the `statistics.count_conversation_parts` may not count the same parts.
+        An edited or redacted part does not change the number of parts, it is only detected on the embedded last part.
+        """
+        total_parts = self.get_total_parts(parent_record)
+        indexed = self.parts_index.get(parent_record.get('id')) if total_parts is not None else None
+        if indexed is None or indexed[0] != total_parts:
+            return False
+        embedded_parts = (parent_record.get('conversation_parts') or {}).get('conversation_parts')
+        if embedded_parts and len(embedded_parts) == total_parts:
+            last_part = embedded_parts[-1]
+            # The parts of the search results are in epoch seconds, the indexed parts in epoch milliseconds once transformed
+            updated_at, indexed_updated_at = last_part.get('updated_at'), indexed[2]
+            return last_part.get('id') == indexed[1] and \
+                (to_epoch_milliseconds(updated_at) or updated_at) == (to_epoch_milliseconds(indexed_updated_at) or indexed_updated_at)
+        return True
+
+    def get_parent_response(self, parent_record):
+        if self.parts_index is not None and self.is_unchanged(parent_record):
+            return UNCHANGED_RESPONSE
+        if get_config_bool(self.config, 'embedded_conversation_parts'):
+            return self.get_embedded_response(parent_record)
+        return None
+
+    def get_embedded_response(self, parent_record):
+        """
+        Returns the conversation of the search results as the response of `conversations/{id}`
+        if it has all its parts, i.e. as many parts as `total_parts`.
+        """
+        conversation_parts = parent_record.get('conversation_parts')
+        if not isinstance(conversation_parts, dict) or not isinstance(conversation_parts.get('conversation_parts'), list):
+            return None
+        total_parts = conversation_parts.get('total_parts')
+        if total_parts is None or len(conversation_parts['conversation_parts']) < total_parts:
+            return None
+        return {
+            'id': parent_record.get('id'),
+            'created_at': parent_record.get('created_at'),
+            'updated_at': parent_record.get('updated_at'),
+            'conversation_parts': conversation_parts
+        }
+
+    def get_streamed_substream_response(self, parent_id):
+        LOGGER.info("Syncing: {}, parent_stream: {}, parent_id: {}".format(self.tap_stream_id, self.parent.tap_stream_id, parent_id))
+        return self.client.stream('GET',
+                                  self.path.format(parent_id),
+                                  data_key=['conversation_parts', 'conversation_parts'],
+                                  params=self.params)
+
+    def get_streamed_substream_records(self, parent_id, response):
+        """
+        Yields the parts of the conversation as the response is parsed, like `transform_conversation_parts`.
+        The parts are held until the fields of the conversation added to them are parsed,
+        i.e. until the end of the response if `total_parts` is not before the parts.
+        """
+        conversation = response.envelope
+        pending_parts = []
+        record_count = 0
+        for part in response:
+            pending_parts.append(self.prune_record(part))
+            if all(key in conversation for key in ['id', 'created_at', 'updated_at']) and \
+                    'total_parts' in conversation.get('conversation_parts', {}):
+                yield from self.add_conversation_fields(pending_parts, conversation)
+                record_count += len(pending_parts)
+                pending_parts = []
+
+        yield from self.add_conversation_fields(pending_parts, conversation)
+        record_count += len(pending_parts)
+        LOGGER.info("Synced: {}, parent_id: {}, records: {}".format(self.tap_stream_id, parent_id, record_count))
+
+    @staticmethod
+    def add_conversation_fields(parts, conversation):
+        for part in parts:
+            part['conversation_id'] = conversation.get('id')
+            part['conversation_total_parts'] = (conversation.get('conversation_parts') or {}).get('total_parts')
+            part['conversation_created_at'] = conversation.get('created_at')
+            part['conversation_updated_at'] = conversation.get('updated_at')
+            yield part
 
 class ContactAttributes(FullTableStream):
     """
@@ -688,24 +1207,12 @@ class ContactAttributes(FullTableStream):
     # As we are preparing the hash of ['id', 'name', 'description'] and using it as the Primary Key and there are chances
     # of field value being updated, thus, on the target side, there will be a redundant entry of the same record.
     sync_with_version = True
+    required_fields = HASHED_FIELDS
 
     def get_records(self, bookmark_datetime=None, is_parent=False) -> Iterator[list]:
         LOGGER.info("Syncing: {}".format(self.tap_stream_id))
-        paging = True
-        next_page = None
-
-        while paging:
-            response = self.client.get(self.path, url=next_page, params=self.params)
-
-            LOGGER.info("Synced: {}, records: {}".format(self.tap_stream_id, len(response.get(self.data_key, []))))
-            if 'pages' in response and response.get('pages', {}).get('next'):
-                next_page = response.get('pages', {}).get('next')
-                self.path = None
-                LOGGER.info("Syncing next page")
-            else:
-                paging = False
-
-            yield from response.get(self.data_key,  [])
+        for response in self.get_pages():
+            yield from self.iter_page_records(response)
 
 
 class Contacts(IncrementalStream):
@@ -724,20 +1231,32 @@ class Contacts(IncrementalStream):
     # addressable_list_fields = ['tags', 'notes', 'companies']
     addressable_list_fields = ['tags', 'companies']
     to_write_intermediate_bookmark = True
+    backfill_windows_config = 'contacts_backfill_windows'
+    stream_metadata = None
 
-    def get_addressable_list(self, contact_list: dict, stream_metadata: dict) -> dict:
+    def set_last_processed(self, state):
+        self.load_backfill_windows(state)
+
+    def get_addressable_list_values(self, endpoint: str) -> list:
+        """Returns all the pages of the addressable list at `endpoint`."""
         params = {
             'display_as': 'plaintext',
             'per_page': 60 # addressable_list endpoints have a different max page size in Intercom's API v2.0
         }
+        paginator = NextUrlPaginator(self.client, endpoint, self.data_key, self.tap_stream_id, params=params)
+        # List of values from the API
+        values = []
+        for response in self.get_pages(paginator):
+            values.extend(response.get(self.data_key, []))
+        return values
 
+    def get_addressable_list(self, contact_list: dict, stream_metadata: dict) -> dict:
+        # The addressable lists of the whole page are collected first
+        # so that they can be fetched concurrently with `addressable_list_workers`
+        lists_to_fetch = []
         for record in contact_list.get(self.data_key):
             for addressable_list_field in self.addressable_list_fields:
-                # List of values from the API
-                values = []
                 data = record.get(addressable_list_field)
-                paging = True
-                next_page = None
                 endpoint = data.get('url')
 
                 # Do not do the API call to get addressable fields:
@@ -749,23 +1268,56 @@ class Contacts(IncrementalStream):
                         not data.get('has_more'):
                     continue
 
-                while paging:
-                    response = self.client.get(endpoint, url=next_page, params=params)
+                lists_to_fetch.append((record, addressable_list_field, endpoint))
 
-                    if 'pages' in response and response.get('pages', {}).get('next'):
-                        next_page = response.get('pages', {}).get('next')
-                        endpoint = None
-                    else:
-                        paging = False
+        if not lists_to_fetch:
+            return contact_list
 
-                    values.extend(response.get(self.data_key, []))
+        workers = get_config_int(self.config, 'addressable_list_workers', 1)
+        endpoints = [endpoint for _, _, endpoint in lists_to_fetch]
+        with worker_pool(min(workers, len(lists_to_fetch))) as executor:
+            # `map` keeps the order of the endpoints, so the values are joined back onto their record
+            all_values = executor.map(self.get_addressable_list_values, endpoints) if executor \
+                else map(self.get_addressable_list_values, endpoints)
+            for (record, addressable_list_field, _), values in zip(lists_to_fetch, all_values):
                 record[addressable_list_field][self.data_key] = values
 
         return contact_list
 
-    def get_records(self, bookmark_datetime=None, is_parent=False, stream_metadata=None) -> Iterator[list]:
-        paging = True
-        starting_after = None
+    def write_intermediate_bookmark(self, state, last_processed, bookmark_value):
+        if self.current_window is None:
+            super().write_intermediate_bookmark(state, last_processed, bookmark_value)
+            return
+
+        # The records of the windows are interleaved, so the bookmark is the progress of the first unfinished window.
+        # All the records updated before it are written.
+        unfinished_windows = self.get_unfinished_windows()
+        if unfinished_windows:
+            window = unfinished_windows[0]
+            bookmark_value = datetime.datetime.fromtimestamp(window.get('last_updated_at') or window['start'],
+                                                             datetime.timezone.utc)
+        state = singer.write_bookmark(state,
+                                      self.tap_stream_id,
+                                      self.replication_key,
+                                      singer.utils.strftime(bookmark_value))
+        state = singer.write_bookmark(state,
+                                      self.tap_stream_id,
+                                      "backfill_windows",
+                                      unfinished_windows)
+        output.write_state(state)
+
+    def write_bookmark(self, state, bookmark_value):
+        # Delete the windows of the parallel backfill once all the records are synced
+        if "backfill_windows" in state.get("bookmarks", {}).get(self.tap_stream_id, {}):
+            del state["bookmarks"][self.tap_stream_id]["backfill_windows"]
+
+        return super().write_bookmark(state, bookmark_value)
+
+    def get_search_query(self, bookmark_datetime, end_epoch_seconds=None):
+        """
+        Returns the search query of the contacts updated since the bookmark, sorted by `updated_at`.
+        The `end_epoch_seconds` limits the query to the contacts updated before it.
+        """
         search_query = {
             'pagination': {
                 'per_page': self.per_page
@@ -788,24 +1340,41 @@ class Contacts(IncrementalStream):
                 'order': 'ascending'
                 }
         }
-        LOGGER.info("Syncing: {}".format(self.tap_stream_id))
-
-        while paging:
-            response = self.client.post(self.path, json=search_query)
+        if end_epoch_seconds is not None:
+            search_query['query'] = {
+                'operator': 'AND',
+                'value': [
+                    search_query['query'],
+                    {
+                        'field': self.replication_key,
+                        'operator': '<',
+                        'value': end_epoch_seconds
+                    }]
+            }
+        return search_query
 
-            if 'pages' in response and response.get('pages', {}).get('next'):
-                starting_after = response.get('pages').get('next').get('starting_after')
-                search_query['pagination'].update({'starting_after': starting_after})
-            else:
-                paging = False
+    def get_search_records(self, search_query, stream_metadata):
+        # Check each contact for any records in each addressable-list object (tags, notes, companies)
+        paginator = StartingAfterPaginator(self.client, self.path, self.data_key, self.tap_stream_id, search_query,
+                                           process_page=lambda response: self.get_addressable_list(response, stream_metadata))
+        for response in self.get_pages(paginator):
+            yield from self.iter_page_records(response)
 
-            # Check each contact for any records in each addressable-list object (tags, notes, companies)
-            response = self.get_addressable_list(response, stream_metadata=stream_metadata)
+    def get_window_records(self, window):
+        window_start = datetime.datetime.fromtimestamp(window.get('last_updated_at') or window['start'], datetime.timezone.utc)
+        return self.get_search_records(self.get_search_query(window_start, window.get('end')), self.stream_metadata)
 
-            records = transform_json(response, self.tap_stream_id, self.data_key)
-            LOGGER.info("Synced: {} for page: {}, records: {}".format(self.tap_stream_id, response.get('pages', {}).get('page'), len(records)))
+    def set_window_progress(self, window, record):
+        window['last_updated_at'] = record.get(self.replication_key)
 
-            yield from records
+    def get_records(self, bookmark_datetime=None, is_parent=False, stream_metadata=None) -> Iterator[list]:
+        self.stream_metadata = stream_metadata
+        self.set_backfill_windows(bookmark_datetime, singer.utils.now())
+        if self.backfill_windows:
+            yield from self.get_windows_records()
+        else:
+            LOGGER.info("Syncing: {}".format(self.tap_stream_id))
+            yield from self.get_search_records(self.get_search_query(bookmark_datetime), stream_metadata)
 
 
 class Segments(IncrementalStream):
@@ -823,22 +1392,9 @@ class Segments(IncrementalStream):
     data_key = 'segments'
 
     def get_records(self, bookmark_datetime=None, is_parent=False, stream_metadata=None) -> Iterator[list]:
-        paging = True
-        next_page = None
         LOGGER.info("Syncing: {}".format(self.tap_stream_id))
-
-        while paging:
-            response = self.client.get(self.path, url=next_page, params=self.params)
-
-            LOGGER.info("Synced: {}, records: {}".format(self.tap_stream_id, len(response.get(self.data_key, []))))
-            if 'pages' in response and response.get('pages', {}).get('next'):
-                next_page = response.get('pages', {}).get('next')
-                self.path = None
-                LOGGER.info("Syncing next page")
-            else:
-                paging = False
-
-            yield from response.get(self.data_key,  [])
+        for response in self.get_pages():
+            yield from self.iter_page_records(response)
 
 
 class Tags(FullTableStream):
@@ -853,22 +1409,9 @@ class Tags(FullTableStream):
     data_key = 'data'
 
     def get_records(self, bookmark_datetime=None, is_parent=False) -> Iterator[list]:
-        paging = True
-        next_page = None
         LOGGER.info("Syncing: {}".format(self.tap_stream_id))
-
-        while paging:
-            response = self.client.get(self.path, url=next_page, params=self.params)
-
-            LOGGER.info("Synced: {}, records: {}".format(self.tap_stream_id, len(response.get(self.data_key, []))))
-            if 'pages' in response and response.get('pages', {}).get('next'):
-                next_page = response.get('pages', {}).get('next')
-                self.path = None
-                LOGGER.info("Syncing next page")
-            else:
-                paging = False
-
-            yield from response.get(self.data_key,  [])
+        for response in self.get_pages():
+            yield from self.iter_page_records(response)
 
 
 class Teams(FullTableStream):
@@ -883,22 +1426,9 @@ class Teams(FullTableStream):
     data_key = 'teams'
 
     def get_records(self, bookmark_datetime=None, is_parent=False) -> Iterator[list]:
-        paging = True
-        next_page = None
         LOGGER.info("Syncing: {}".format(self.tap_stream_id))
-
-        while paging:
-            response = self.client.get(self.path, url=next_page, params=self.params)
-
-            LOGGER.info("Synced: {}, records: {}".format(self.tap_stream_id, len(response.get(self.data_key, []))))
-            if 'pages' in response and response.get('pages', {}).get('next'):
-                next_page = response.get('pages', {}).get('next')
-                self.path = None
-                LOGGER.info("Syncing next page")
-            else:
-                paging = False
-
-            yield from response.get(self.data_key,  [])
+        for response in self.get_pages():
+            yield from self.iter_page_records(response)
 
 
 STREAMS = {
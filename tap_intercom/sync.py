@@ -1,10 +1,16 @@
 
+import copy
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import singer
 from singer import Transformer, metadata
 
 
-from tap_intercom.client import IntercomClient
-from tap_intercom.streams import STREAMS, Admins
+from tap_intercom import output
+from tap_intercom.client import DEFAULT_MAX_CONNECTIONS, IntercomClient
+from tap_intercom.response_cache import DEFAULT_MAX_SIZE, ResponseCache
+from tap_intercom.serialization import get_json_backend
+from tap_intercom.streams import STREAMS, Admins, get_config_int
 
 LOGGER = singer.get_logger()
 
@@ -62,41 +68,166 @@ def get_streams_to_sync(catalog, selected_streams, selected_stream_names):
 
     return streams_to_sync
 
+def get_stream_state(state, tap_stream_id):
+    """
+    Returns a copy of the state with the bookmarks of the stream and its child stream only,
+    to be used by the stream synced in parallel with the other streams.
+    """
+    stream_ids = [tap_stream_id]
+    if STREAMS[tap_stream_id].child:
+        stream_ids.append(STREAMS[tap_stream_id].child)
+
+    bookmarks = state.get('bookmarks', {})
+    return {'bookmarks': {stream_id: copy.deepcopy(bookmarks[stream_id]) for stream_id in stream_ids if stream_id in bookmarks}}
+
+def get_currently_syncing(state):
+    """
+    Returns the list of streams that were syncing when the last sync was interrupted.
+    The `currently_syncing` is a list of streams when the streams are synced in parallel.
+    """
+    currently_syncing = state.get('currently_syncing')
+    if not currently_syncing:
+        return []
+    if isinstance(currently_syncing, list):
+        return currently_syncing
+    return [currently_syncing]
+
+def sync_stream(client, config, state, catalog, stream, selected_stream_names, transformer):
+    """ Sync a stream and its child stream and return the updated state """
+    tap_stream_id = stream.tap_stream_id
+    stream_obj = STREAMS[tap_stream_id](client, catalog, selected_stream_names, config)
+    stream_schema = stream.schema.to_dict()
+    stream_metadata = metadata.to_map(stream.metadata)
+
+    LOGGER.info('Starting sync for stream: %s', tap_stream_id)
+
+    output.write_schema(
+        tap_stream_id,
+        stream_schema,
+        stream_obj.key_properties,
+        stream.replication_key
+    )
+
+    state = stream_obj.sync(state, stream_schema, stream_metadata, config, transformer)
+    output.write_state(state, force=True)
+    return state
+
+def sync_parallel(client, config, state, catalog, streams_to_sync, selected_stream_names, max_parallel_streams):
+    """
+    Sync up to `max_parallel_streams` streams at a time against the shared client and its rate limiter.
+    Every stream works on its own copy of its bookmarks, which are merged into the shared state by the writer.
+    The `currently_syncing` is the list of the streams in progress.
+    """
+    # Resume the streams interrupted in the last sync first
+    interrupted = get_currently_syncing(state)
+    streams_to_sync = sorted(streams_to_sync, key=lambda stream: stream.tap_stream_id not in interrupted)
+    in_progress = set()
+
+    def set_currently_syncing(tap_stream_id, is_syncing):
+        with output.WRITER.lock:
+            if is_syncing:
+                in_progress.add(tap_stream_id)
+            else:
+                in_progress.discard(tap_stream_id)
+            state['currently_syncing'] = sorted(in_progress) or None
+            output.write_state(state, force=True)
+
+    def sync_stream_in_thread(stream):
+        set_currently_syncing(stream.tap_stream_id, True)
+        with output.WRITER.lock:
+            stream_state = get_stream_state(state, stream.tap_stream_id)
+        with Transformer() as transformer:
+            sync_stream(client, config, stream_state, catalog, stream, selected_stream_names, transformer)
+        set_currently_syncing(stream.tap_stream_id, False)
+
+    output.WRITER.shared_state = state
+    errors = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_parallel_streams) as executor:
+            futures = [executor.submit(sync_stream_in_thread, stream) for stream in streams_to_sync]
+            for future in as_completed(futures):
+                if not future.cancelled() and future.exception():
+                    errors.append(future.exception())
+                    # Do not start the remaining streams, the streams in progress are completed
+                    for pending_future in futures:
+                        pending_future.cancel()
+    finally:
+        output.WRITER.shared_state = None
+
+    if errors:
+        raise errors[0]
+
+    return state
+
+def get_max_connections(config):
+    """
+    Returns the size of the keep-alive connections pool of the client, the maximum number of requests
+    sent at the same time by the `max_parallel_streams` streams with the most concurrent requests:
+        - conversations: a thread paging each backfill window, and the conversation_parts workers or the syncing thread
+        - contacts: the addressable list workers of the page of each backfill window
+        - admins: the admin workers
+        - the other streams: one thread paging the stream
+    The pages prefetched by `page_prefetch_depth` are requested by the prefetch thread instead of the syncing thread.
+    """
+    max_parallel_streams = get_config_int(config, 'max_parallel_streams', 1)
+    stream_requests = [get_config_int(config, 'conversations_backfill_windows', 1) + get_config_int(config, 'conversation_parts_workers', 1),
+                       get_config_int(config, 'contacts_backfill_windows', 1) * get_config_int(config, 'addressable_list_workers', 1),
+                       get_config_int(config, 'admin_workers', 1)]
+    stream_requests += [1] * (len(STREAMS) - len(stream_requests))
+    return max(DEFAULT_MAX_CONNECTIONS, sum(sorted(stream_requests, reverse=True)[:max_parallel_streams]))
+
 def sync(config, state, catalog):
     """ Sync data from tap source """
 
     access_token = config.get('access_token')
-    client = IntercomClient(access_token, config.get('request_timeout'), config.get('user_agent')) # pass request_timeout parameter from config
+    max_parallel_streams = get_config_int(config, 'max_parallel_streams', 1)
+    json_backend = get_json_backend(config.get('json_backend'))
+    response_cache = None
+    if config.get('response_cache_dir'):
+        response_cache = ResponseCache(config['response_cache_dir'],
+                                       get_config_int(config, 'response_cache_ttl', 0),
+                                       get_config_int(config, 'response_cache_max_size', DEFAULT_MAX_SIZE))
+    client = IntercomClient(access_token,
+                            config.get('request_timeout'), # pass request_timeout parameter from config
+                            config.get('user_agent'),
+                            get_max_connections(config),
+                            config.get('base_url'),
+                            json_backend,
+                            response_cache)
+    output.WRITER.json_backend = json_backend
+    # Records buffered before they are written to stdout, 0 to write every record at once
+    output.WRITER.buffer_size = get_config_int(config, 'output_buffer_size', 0)
+    output.WRITER.flush_interval = get_config_int(config, 'output_flush_interval', 1)
+    # STATE messages coalesced, 0 to write every state
+    output.WRITER.state_interval = get_config_int(config, 'state_interval', 0)
+    output.WRITER.state_record_count = get_config_int(config, 'state_record_count', 0)
 
     # Translate state to the new format with replication key in the state
     state = translate_state(state)
 
     selected_stream_names = []
+    if max_parallel_streams == 1 and isinstance(state.get('currently_syncing'), list):
+        # Resume the first interrupted stream of a parallel sync
+        interrupted = get_currently_syncing(state)
+        state = singer.set_currently_syncing(state, interrupted[0] if interrupted else None)
     selected_streams = list(catalog.get_selected_streams(state))
     for stream in selected_streams:
         selected_stream_names.append(stream.tap_stream_id)
 
-    with Transformer() as transformer:
-        for stream in get_streams_to_sync(catalog, selected_streams, selected_stream_names):
-            tap_stream_id = stream.tap_stream_id
-            stream_obj = STREAMS[tap_stream_id](client, catalog, selected_stream_names)
-            stream_schema = stream.schema.to_dict()
-            stream_metadata = metadata.to_map(stream.metadata)
-
-            LOGGER.info('Starting sync for stream: %s', tap_stream_id)
-
-            state = singer.set_currently_syncing(state, tap_stream_id)
-            singer.write_state(state)
-
-            singer.write_schema(
-                tap_stream_id,
-                stream_schema,
-                stream_obj.key_properties,
-                stream.replication_key
-            )
-
-            state = stream_obj.sync(state, stream_schema, stream_metadata, config, transformer)
-            singer.write_state(state)
+    streams_to_sync = get_streams_to_sync(catalog, selected_streams, selected_stream_names)
+    try:
+        if max_parallel_streams > 1:
+            state = sync_parallel(client, config, state, catalog, streams_to_sync, selected_stream_names, max_parallel_streams)
+        else:
+            with Transformer() as transformer:
+                for stream in streams_to_sync:
+                    state = singer.set_currently_syncing(state, stream.tap_stream_id)
+                    output.write_state(state, force=True)
+
+                    state = sync_stream(client, config, state, catalog, stream, selected_stream_names, transformer)
+    finally:
+        # Write the buffered records and the coalesced state of an interrupted sync
+        output.flush_state()
 
     state = singer.set_currently_syncing(state, None)
-    singer.write_state(state)
+    output.write_state(state, force=True)
@@ -1,70 +1,100 @@
+import functools
 import math as m
 
 from singer.utils import strptime_to_utc
 
+from tap_intercom.compiled_transform import filter_record
+
+
+# De-nest each list node of a record up to record level
+def denest_record(record, data_key, list_nodes, addressable_list=False):
+    for list_node in list_nodes:
+        field = data_key if addressable_list else list_node
+        this_node = record.get(list_node, {}).get(field, [])
+        if not this_node == []:
+            record[list_node] = this_node
+        else:
+            record.pop(list_node, None)
+
 
 # De-nest each list node up to record level
 def denest_list_nodes(this_json, data_key, list_nodes, addressable_list=False):
-    new_json = this_json
-    i = 0
-    for record in list(this_json.get(data_key, [])):
-        for list_node in list_nodes:
-            field = data_key if addressable_list else list_node
-            this_node = record.get(list_node, {}).get(field, [])
-            if not this_node == []:
-                new_json[data_key][i][list_node] = this_node
-            else:
-                new_json[data_key][i].pop(list_node, None)
-        i = i + 1
-    return new_json
+    for record in this_json.get(data_key, []):
+        denest_record(record, data_key, list_nodes, addressable_list)
+    return this_json
+
+# Yield the conversation_parts of a conversation w/ key conversation fields
+def iter_conversation_parts(record):
+    conv_id = record.get('id')
+    conv_created = record.get('created_at')
+    conv_updated = record.get('updated_at')
+    conv_total_parts = record.get('conversation_parts', {}).get('total_parts')
+    conv_parts = record.get('conversation_parts', {}).get('conversation_parts', [])
+    for conv_part in conv_parts:
+        part = conv_part
+        part['conversation_id'] = conv_id
+        part['conversation_total_parts'] = conv_total_parts
+        part['conversation_created_at'] = conv_created
+        part['conversation_updated_at'] = conv_updated
+        yield part
 
-# De-nest conversation_parts from conversations w/ key conversation fields
+# De-nest conversation_parts from conversations w/ key conversation fields, yielded one at a time
 def transform_conversation_parts(this_json, data_key):
-    new_json = []
-    for record in list(this_json.get(data_key, [])):
-        conv_id = record.get('id')
-        conv_created = record.get('created_at')
-        conv_updated = record.get('updated_at')
-        conv_total_parts = record.get('conversation_parts', {}).get('total_parts')
-        conv_parts = record.get('conversation_parts', {}).get('conversation_parts', [])
-        for conv_part in conv_parts:
-            part = conv_part
-            part['conversation_id'] = conv_id
-            part['conversation_total_parts'] = conv_total_parts
-            part['conversation_created_at'] = conv_created
-            part['conversation_updated_at'] = conv_updated
-            new_json.append(part)
-    return new_json
+    for record in this_json.get(data_key, []):
+        yield from iter_conversation_parts(record)
+
+
+# List nodes de-nested by `transform_json` for each stream: (list nodes, addressable list)
+DENESTED_LIST_NODES = {
+    'users': (['companies', 'segments', 'social_profiles', 'tags'], False),
+    'companies': (['segments', 'tags'], False),
+    'conversations': (['tags', 'contacts'], False),
+    # De-nest the addressable list fields in 'Contacts' stream
+    'contacts': (['companies', 'tags'], True),
+}
 
 
 # Run other transforms, as needed: denest_list_nodes, transform_conversation_parts
+# The conversation_parts are yielded as they are de-nested
 def transform_json(this_json, stream_name, data_key):
     new_json = this_json
-    if stream_name == 'users':
-        list_nodes = ['companies', 'segments', 'social_profiles', 'tags']
-        denested_json = denest_list_nodes(new_json, data_key, list_nodes)
-        new_json = denested_json
-    elif stream_name == 'companies':
-        list_nodes = ['segments', 'tags']
-        denested_json = denest_list_nodes(new_json, data_key, list_nodes)
-        new_json = denested_json
-    elif stream_name == 'conversations':
-        list_nodes = ['tags', 'contacts']
-        denested_json = denest_list_nodes(new_json, data_key, list_nodes)
-        new_json = denested_json
-    elif stream_name == 'conversation_parts':
-        denested_json = transform_conversation_parts(new_json, data_key)
-        new_json = denested_json
-    elif stream_name == 'contacts':
-        # De-nest the addressable list fields in 'Contacts' stream
-        adressable_list_nodes = ['companies', 'tags']
-        denested_adressable_list_json = denest_list_nodes(new_json, data_key, adressable_list_nodes, True)
-        new_json = denested_adressable_list_json
+    if stream_name == 'conversation_parts':
+        return transform_conversation_parts(new_json, data_key)
+    if stream_name in DENESTED_LIST_NODES:
+        list_nodes, addressable_list = DENESTED_LIST_NODES[stream_name]
+        new_json = denest_list_nodes(new_json, data_key, list_nodes, addressable_list)
     if data_key in new_json:
         return new_json[data_key]
     return new_json
 
 
+def iter_transform_json(this_json, stream_name, data_key, field_filter=None):
+    """
+    Same as `transform_json` for a response with a list of records at `data_key`,
+    except that the records are transformed and yielded one at a time.
+    The records are removed from the response as they are yielded,
+    so a record is released once it is written instead of when the whole page is written.
+    The fields of the `field_filter`, see `compile_filter`, are removed from the records before they are de-nested.
+    """
+    records = this_json.get(data_key) or []
+    # Records are popped from the end of the list
+    records.reverse()
+    while records:
+        record = records.pop()
+        if stream_name == 'conversation_parts':
+            for part in iter_conversation_parts(record):
+                if field_filter is not None:
+                    filter_record(part, field_filter)
+                yield part
+            continue
+        if field_filter is not None:
+            filter_record(record, field_filter)
+        if stream_name in DENESTED_LIST_NODES:
+            list_nodes, addressable_list = DENESTED_LIST_NODES[stream_name]
+            denest_record(record, data_key, list_nodes, addressable_list)
+        yield record
+
+
 # Traverse schema and find all date-times where
 # a path is the array of keys needed to descend
 # the schema(tree) to locate the desired value.
@@ -126,17 +156,122 @@ def nested_set(dic, keys, value):
             if value[index] != -1000:
                 dic[keys[0]][index][keys[-1][0]] = value[index]
 
+# The same date-time strings are repeated across the records, e.g. the dates of the shared tags
+# Parsing is cached for the most recent strings
+@functools.lru_cache(maxsize=4096)
+def iso_to_epoch_milliseconds(datetime):
+    return strptime_to_utc(datetime).timestamp() * 1000
+
+
 # API returns date times, epoch seconds and epoch millis
 # Transform datetimes to epoch millis
 # Transform epoch seconds to millis
+def transform_path(record, datetime_path):
+    datetime = nested_get(record, datetime_path)
+
+    if datetime and isinstance(datetime, list):
+        nested_set(record, datetime_path, [dt * 1000 for dt in datetime])
+    elif datetime and isinstance(datetime, str):
+        converted_ts = iso_to_epoch_milliseconds(datetime)
+        nested_set(record, datetime_path, converted_ts)
+    elif datetime and get_integer_places(datetime) == 10:
+        nested_set(record, datetime_path, datetime * 1000)
+
+
 def transform_times(record, schema_datetimes):
     for datetime_path in schema_datetimes:
-        datetime = nested_get(record, datetime_path)
+        transform_path(record, datetime_path)
+
 
-        if datetime and isinstance(datetime, list):
-            nested_set(record, datetime_path, [dt * 1000 for dt in datetime])
-        elif datetime and isinstance(datetime, str):
-            converted_ts = strptime_to_utc(datetime).timestamp() * 1000
+# Returns the epoch millis of a date-time string or epoch seconds, None for other values
+def to_epoch_milliseconds(datetime):
+    if isinstance(datetime, str):
+        return iso_to_epoch_milliseconds(datetime)
+    if type(datetime) is int: # pylint: disable=unidiomatic-typecheck
+        # Epoch seconds have 10 integer places, `get_integer_places` counts 10 places for negative values
+        if datetime < 0 or 1000000000 <= datetime <= 9999999999:
+            return datetime * 1000
+        return None
+    if get_integer_places(datetime) == 10:
+        return datetime * 1000
+    return None
+
+
+# Compiled transform of a path of keys to a date-time field, e.g. ['statistics', 'first_close_at']
+# Same as `transform_path` with direct key lookups
+def compile_field_path(datetime_path):
+    parent_keys = datetime_path[:-1]
+    field = datetime_path[-1]
+    first_key = datetime_path[0]
+
+    def transform_field(record):
+        parent = record
+        for key in parent_keys:
+            if parent and key in parent:
+                parent = parent[key]
+            else:
+                return
+        if not (parent and field in parent):
+            return
+
+        datetime = parent[field]
+        if not datetime:
+            return
+        if isinstance(datetime, list):
+            transform_path(record, datetime_path)
+            return
+        converted_ts = to_epoch_milliseconds(datetime)
+        if converted_ts is None:
+            return
+
+        if isinstance(parent.get(first_key), list):
+            # `nested_set` sets the values of the list in this case
             nested_set(record, datetime_path, converted_ts)
-        elif datetime and get_integer_places(datetime) == 10:
-            nested_set(record, datetime_path, datetime * 1000)
+        else:
+            parent[field] = converted_ts
+
+    return transform_field
+
+
+# Compiled transform of a date-time field of the objects of a list, e.g. ['tags', ['applied_at']]
+# Same as `transform_path`, the missing values are left as they are
+def compile_list_path(datetime_path):
+    list_key = datetime_path[0]
+    field = datetime_path[1][0]
+
+    def transform_list(record):
+        if not (record and list_key in record):
+            return
+        elements = record[list_key]
+        if not isinstance(elements, list):
+            transform_path(record, datetime_path)
+            return
+
+        datetimes = [elem[field] * 1000 if field in elem else -1000 for elem in elements]
+        for elem, datetime in zip(elements, datetimes):
+            if datetime != -1000:
+                elem[field] = datetime
+
+    return transform_list
+
+
+def compile_datetime_plan(schema_datetimes):
+    """
+    Compile the paths returned by `find_datetimes_in_schema` into a list of functions,
+    each transforming the date-time field of a path of a record in place.
+    The plan is compiled once per stream and applied to every record with `apply_datetime_plan`.
+    """
+    plan = []
+    for datetime_path in schema_datetimes:
+        if all(isinstance(key, str) for key in datetime_path):
+            plan.append(compile_field_path(datetime_path))
+        elif len(datetime_path) == 2 and isinstance(datetime_path[0], str) and isinstance(datetime_path[1], list):
+            plan.append(compile_list_path(datetime_path))
+        else:
+            plan.append(functools.partial(transform_path, datetime_path=datetime_path))
+    return plan
+
+
+def apply_datetime_plan(record, datetime_plan):
+    for transform_field in datetime_plan:
+        transform_field(record)
@@ -0,0 +1,128 @@
+"""
+This module transforms the records of a stream with its schema and encodes their RECORD messages
+in a pool of processes, so this CPU bound work of a sync is not limited to one core.
+"""
+
+import collections
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import singer
+from singer import UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING
+from singer.transform import transform
+
+from tap_intercom import output
+from tap_intercom.compiled_transform import compile_transformer
+from tap_intercom.serialization import get_json_backend
+
+# Number of records sent to a worker at once
+BATCH_SIZE = 100
+
+# Stream of the worker process, set by `init_worker`
+WORKER_STREAM = {}
+
+
+def format_records(stream_name, schema, stream_metadata, records, version=None, transformer=None):
+    """
+    Returns the encoded RECORD messages of the records transformed with the schema,
+    by the `transformer` compiled from the schema if it is set.
+    """
+    lines = []
+    for record in records:
+        if transformer is not None:
+            transformed_record = transformer(record)
+        else:
+            transformed_record = transform(record,
+                                           schema,
+                                           integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING,
+                                           metadata=stream_metadata)
+        message = singer.RecordMessage(stream=stream_name, record=transformed_record, version=version,
+                                       time_extracted=singer.utils.now())
+        lines.append(output.WRITER.format_message(message))
+    return lines
+
+
+def init_worker(stream_name, schema, stream_metadata, json_backend, version, compiled_transform=False):
+    # The transformer is compiled once per worker, the compiled functions can not be sent to the processes
+    transformer = compile_transformer(schema, stream_metadata) if compiled_transform else None
+    WORKER_STREAM.update(stream_name=stream_name, schema=schema, stream_metadata=stream_metadata, version=version,
+                         transformer=transformer)
+    output.WRITER.json_backend = get_json_backend(json_backend)
+
+
+def format_worker_records(records):
+    return format_records(WORKER_STREAM['stream_name'], WORKER_STREAM['schema'], WORKER_STREAM['stream_metadata'],
+                          records, WORKER_STREAM['version'], WORKER_STREAM['transformer'])
+
+
+class TransformPool:
+    """
+    Transforms the records of a stream and encodes their RECORD messages in `workers` processes.
+
+    The records are sent to the workers in batches of `BATCH_SIZE` and their messages are written in the order
+    of the records. `flush` writes the messages of all the records submitted so far, so it must be called before
+    a bookmark covering them is written. The processes are started with the first full batch, a stream with fewer
+    records is transformed by the calling thread. With `compiled_transform`, the records are transformed by
+    the transformer of `compile_transformer` instead of singer's `transform`.
+    """
+    def __init__(self, stream_name, schema, stream_metadata, workers, json_backend=None, version=None, compiled_transform=False):
+        self.stream_settings = (stream_name, schema, stream_metadata, json_backend, version, compiled_transform)
+        self.workers = workers
+        self.executor = None
+        self.batch = []
+        self.pending = collections.deque()
+
+    def submit(self, record):
+        self.batch.append(record)
+        if len(self.batch) >= BATCH_SIZE:
+            self.submit_batch()
+        # Write the batches done so far without waiting for the others
+        while self.pending and self.pending[0].done():
+            output.write_lines(self.pending.popleft().result())
+
+    def submit_batch(self):
+        if self.executor is None:
+            # The workers are spawned, forking the threads of the sync is not safe
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                mp_context=multiprocessing.get_context('spawn'),
+                                                initializer=init_worker,
+                                                initargs=self.stream_settings)
+        self.pending.append(self.executor.submit(format_worker_records, self.batch))
+        self.batch = []
+        # Bound the records held in memory, at most 2 batches per worker are queued
+        while len(self.pending) > 2 * self.workers:
+            output.write_lines(self.pending.popleft().result())
+
+    def flush(self):
+        """Writes the messages of all the records submitted so far."""
+        if self.batch and self.executor is None:
+            stream_name, schema, stream_metadata, _, version, compiled_transform = self.stream_settings
+            transformer = compile_transformer(schema, stream_metadata) if compiled_transform else None
+            output.write_lines(format_records(stream_name, schema, stream_metadata, self.batch, version, transformer))
+            self.batch = []
+        elif self.batch:
+            self.submit_batch()
+        while self.pending:
+            output.write_lines(self.pending.popleft().result())
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+@contextlib.contextmanager
+def transform_pool(stream_name, schema, stream_metadata, workers, json_backend=None, version=None, compiled_transform=False):
+    """
+    Yields a `TransformPool` with `workers` processes or None if `workers` is 1.
+    The messages of the pool are written when the context exits without an exception.
+    """
+    if workers <= 1:
+        yield None
+        return
+    pool = TransformPool(stream_name, schema, stream_metadata, workers, json_backend, version, compiled_transform)
+    try:
+        yield pool
+        pool.flush()
+    finally:
+        pool.close()
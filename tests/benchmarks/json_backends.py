@@ -0,0 +1,127 @@
+"""
+Benchmark of the JSON backends of `tap_intercom.serialization` on synthetic conversation payloads:
+the decoding of the API responses and the encoding of the RECORD messages.
+
+The default backend is measured as the tap uses it, i.e. simplejson through `requests` and singer-python.
+
+Usage:
+    python tests/benchmarks/json_backends.py [--streams conversations conversation_parts] [--pages 10]
+                                             [--page-size 150] [--profile small|medium|large] [--repeat 3]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import requests
+import singer
+from singer import UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING
+from singer.transform import transform
+
+from tap_intercom.schema import get_schemas
+from tap_intercom.serialization import DEFAULT_JSON_BACKEND, JSON_BACKENDS, get_json_backend
+from tap_intercom.streams import STREAMS
+from tap_intercom.transform import apply_datetime_plan, transform_json
+
+from payloads import PROFILES, PayloadGenerator, get_data_key
+from pipeline import get_selected_metadata
+
+
+def get_response(content):
+    """Returns a `requests` response with the content, as received from the API."""
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = 'utf-8'
+    response._content = content # pylint: disable=protected-access
+    return response
+
+
+def get_records(stream_name, responses, schema, mdata):
+    """Returns the records of the responses as written by the tap."""
+    datetime_plan = STREAMS[stream_name](None, None, [stream_name]).get_datetime_plan(schema)
+    records = []
+    for response in responses:
+        for record in transform_json(json.loads(response), stream_name, get_data_key(stream_name)):
+            apply_datetime_plan(record, datetime_plan)
+            records.append(transform(record, schema, integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING,
+                                     metadata=mdata))
+    return records
+
+
+def measure(func, repeat):
+    """Returns the best time of `repeat` runs of the function."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def benchmark_backend(name, stream_name, contents, records, repeat):
+    backend = get_json_backend(name)
+    if backend is None:
+        def decode():
+            for content in contents:
+                get_response(content).json()
+
+        def encode():
+            for record in records:
+                singer.format_message(singer.RecordMessage(stream=stream_name, record=record))
+    else:
+        def decode():
+            for content in contents:
+                backend.decode_response(get_response(content))
+
+        def encode():
+            for record in records:
+                backend.dumps(singer.RecordMessage(stream=stream_name, record=record).asdict())
+
+    return {
+        'backend': name if backend is None else backend.name,
+        'decode': measure(decode, repeat),
+        'encode': measure(encode, repeat)
+    }
+
+
+def print_results(stream_name, contents, records, results, out=sys.stdout):
+    megabytes = sum(len(content) for content in contents) / 2**20
+    out.write('{}: {} responses, {:.1f} MiB, {} records\n'.format(stream_name, len(contents), megabytes, len(records)))
+    baseline = results[0]
+    for result in results:
+        out.write('    {:<12} decode {:>8.3f} s {:>8.1f} MiB/s {:>5.1f}x   encode {:>8.3f} s {:>10.0f} records/s {:>5.1f}x\n'.format(
+            result['backend'],
+            result['decode'], megabytes / result['decode'], baseline['decode'] / result['decode'],
+            result['encode'], len(records) / result['encode'], baseline['encode'] / result['encode']))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark of the JSON backends of tap-intercom')
+    parser.add_argument('--streams', nargs='+', default=['conversations', 'conversation_parts'])
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--page-size', type=int, default=150)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='medium')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each measure, the best time is reported')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    schemas, field_metadata = get_schemas()
+    generator = PayloadGenerator(seed=args.seed, profile=args.profile)
+
+    for stream_name in args.streams:
+        contents = [json.dumps(generator.response(stream_name, args.page_size)).encode('utf-8')
+                    for _ in range(args.pages)]
+        records = get_records(stream_name, contents, schemas[stream_name],
+                              get_selected_metadata(field_metadata[stream_name]))
+        results = [benchmark_backend(name, stream_name, contents, records, args.repeat)
+                   for name in [DEFAULT_JSON_BACKEND] + sorted(JSON_BACKENDS)]
+        print_results(stream_name, contents, records, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+"""
+Local stand-in for the Intercom API, serving synthetic records to benchmark the tap end to end.
+
+It implements the endpoints used by the tap, with a configurable latency, rate limit headers,
+429/5xx error injection and dataset size:
+    POST conversations/search, POST contacts/search, GET companies/scroll, GET conversations/{id},
+    GET admins, GET admins/{id}, GET data_attributes, GET segments, GET tags, GET teams,
+    GET contacts/{id}/tags, GET contacts/{id}/companies
+
+The GET responses have an ETag and a request with the `If-None-Match` of the response gets a 304 Not Modified.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from payloads import PayloadGenerator
+
+# Page size of the GET list endpoints
+LIST_PAGE_SIZE = 60
+
+# Number of contacts whose tags and companies are not all in the search response, i.e. `has_more` is true
+ADDRESSABLE_LIST_SIZE = 10
+
+
+class MockIntercomAPI:
+    """
+    Dataset and behavior of the mock server.
+
+    :param records: Number of records of the conversations, contacts and companies. The other streams have 1/10th.
+    :param profile: Payload profile of the records, see `payloads.PROFILES`
+    :param latency: Seconds to wait before each response
+    :param rate_limit: Number of requests allowed in each `rate_limit_window`, None to not send the rate limit headers
+    :param rate_limit_window: Seconds of a rate limit window, Intercom resets the limit every 10 seconds
+    :param error_rate: Ratio of the requests failing with a 500 error
+    :param rate_limit_error_rate: Ratio of the requests failing with a 429 error, in addition to the exceeded rate limit
+    :param embedded_parts: Number of parts of the conversations returned by the search, None to not return the parts
+    """
+    def __init__(self, records=1000, profile='medium', seed=0, latency=0.0, rate_limit=None, rate_limit_window=10,
+                 error_rate=0.0, rate_limit_error_rate=0.0, embedded_parts=None):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.error_rate = error_rate
+        self.rate_limit_error_rate = rate_limit_error_rate
+        self.embedded_parts = embedded_parts
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.status_codes = Counter()
+        self.window_reset_at = 0
+        self.window_remaining = 0
+        self.scroll_params = {}
+
+        generator = PayloadGenerator(seed=seed, profile=profile)
+        small_count = max(1, records // 10)
+        self.conversations = {}
+        for _ in range(records):
+            conversation = generator.conversation()
+            self.conversations[conversation['id']] = conversation
+        self.contacts = [generator.record('contacts') for _ in range(records)]
+        self.companies = [generator.record('companies') for _ in range(records)]
+        self.admins = [generator.record('admins') for _ in range(small_count)]
+        self.data_attributes = {
+            'company': [generator.record('company_attributes') for _ in range(small_count)],
+            'contact': [generator.record('contact_attributes') for _ in range(small_count)],
+        }
+        self.segments = {
+            'company': [generator.record('company_segments') for _ in range(small_count)],
+            'contact': [generator.record('segments') for _ in range(small_count)],
+        }
+        self.tags = [generator.record('tags') for _ in range(small_count)]
+        self.teams = [generator.record('teams') for _ in range(small_count)]
+
+        # Full lists of the contacts with more tags and companies than in the search response
+        self.addressable_lists = {}
+        for contact in self.contacts[::10]:
+            for field in ['tags', 'companies']:
+                values = [{'type': field[:-1], 'id': str(generator.random.randint(1, 10**9))}
+                          for _ in range(ADDRESSABLE_LIST_SIZE + 5)]
+                self.addressable_lists[(contact['id'], field)] = values
+                contact[field].update({'data': values[:ADDRESSABLE_LIST_SIZE],
+                                       'total_count': len(values),
+                                       'has_more': True})
+
+    def check_rate_limit(self):
+        """Returns the rate limit headers of the response and whether the limit is exceeded."""
+        if self.rate_limit is None:
+            return {}, False
+        now = time.time()
+        with self.lock:
+            if now >= self.window_reset_at:
+                self.window_reset_at = int(now) + self.rate_limit_window
+                self.window_remaining = self.rate_limit
+            self.window_remaining = max(self.window_remaining - 1, -1)
+            headers = {
+                'X-RateLimit-Limit': str(self.rate_limit),
+                'X-RateLimit-Remaining': str(max(self.window_remaining, 0)),
+                'X-RateLimit-Reset': str(self.window_reset_at)
+            }
+            return headers, self.window_remaining < 0
+
+    def inject_error(self):
+        """Returns the status code of an injected error or None."""
+        with self.lock:
+            draw = self.random.random()
+        if draw < self.error_rate:
+            return 500
+        if draw < self.error_rate + self.rate_limit_error_rate:
+            return 429
+        return None
+
+    def handle(self, method, path, query, body, base_url):
+        """Returns the status code and the JSON body of the response."""
+        parts = [part for part in path.split('/') if part]
+
+        if method == 'POST' and parts == ['conversations', 'search']:
+            records = [self.get_search_conversation(record) for record in self.conversations.values()]
+            return 200, search(records, body, 'conversations')
+        if method == 'POST' and parts == ['contacts', 'search']:
+            return 200, search(self.contacts, body, 'data')
+        if method != 'GET':
+            return 404, not_found()
+
+        if parts == ['companies', 'scroll']:
+            return self.scroll(query)
+        if len(parts) == 2 and parts[0] == 'conversations':
+            if parts[1] not in self.conversations:
+                return 404, not_found()
+            return 200, self.conversations[parts[1]]
+        if parts == ['admins']:
+            return 200, {'type': 'admin.list', 'admins': self.admins}
+        if len(parts) == 2 and parts[0] == 'admins':
+            admin = next((admin for admin in self.admins if str(admin['id']) == parts[1]), None)
+            return (200, admin) if admin else (404, not_found())
+        if len(parts) == 3 and parts[0] == 'contacts' and (parts[1], parts[2]) in self.addressable_lists:
+            return 200, list_page(self.addressable_lists[(parts[1], parts[2])], 'data', query, base_url + path)
+        if parts == ['data_attributes']:
+            return 200, {'type': 'list', 'data': self.data_attributes.get(query.get('model'), [])}
+        if parts == ['segments']:
+            segments = self.segments['company' if query.get('type') == 'company' else 'contact']
+            return 200, list_page(segments, 'segments', query, base_url + path)
+        if parts == ['tags']:
+            return 200, {'type': 'list', 'data': self.tags}
+        if parts == ['teams']:
+            return 200, list_page(self.teams, 'teams', query, base_url + path)
+        return 404, not_found()
+
+    def get_search_conversation(self, conversation):
+        """Returns the conversation as in the search results, with the first `embedded_parts` parts."""
+        record = {key: value for key, value in conversation.items() if key != 'conversation_parts'}
+        if self.embedded_parts is not None:
+            conversation_parts = conversation['conversation_parts']
+            record['conversation_parts'] = dict(conversation_parts,
+                                                conversation_parts=conversation_parts['conversation_parts'][:self.embedded_parts])
+        return record
+
+    def scroll(self, query):
+        """Companies of the Scroll API, a request with the scroll_param of the last page returns a 404."""
+        scroll_param = query.get('scroll_param')
+        with self.lock:
+            offset = self.scroll_params.get(scroll_param) if scroll_param else 0
+            if offset is None or offset >= len(self.companies):
+                return 404, not_found()
+            next_scroll_param = '{:x}'.format(self.random.getrandbits(64))
+            self.scroll_params[next_scroll_param] = offset + LIST_PAGE_SIZE
+        return 200, {'type': 'list',
+                     'data': self.companies[offset:offset + LIST_PAGE_SIZE],
+                     'scroll_param': next_scroll_param}
+
+
+def not_found():
+    return {'type': 'error.list', 'errors': [{'code': 'not_found', 'message': 'Resource Not Found'}]}
+
+
+def list_page(records, data_key, query, url):
+    """Returns a page of the records with the absolute url of the next page."""
+    page = int(query.get('page', 1))
+    per_page = int(query.get('per_page', LIST_PAGE_SIZE))
+    start = (page - 1) * per_page
+    response = {'type': 'list', data_key: records[start:start + per_page],
+                'pages': {'type': 'pages', 'page': page, 'per_page': per_page,
+                          'total_pages': (len(records) + per_page - 1) // per_page}}
+    if start + per_page < len(records):
+        response['pages']['next'] = '{}?{}'.format(url, urlencode(dict(query, page=page + 1)))
+    return response
+
+
+def matches(record, query):
+    """Evaluates the query of the Search API on the record."""
+    operator = query['operator']
+    if operator == 'AND':
+        return all(matches(record, condition) for condition in query['value'])
+    if operator == 'OR':
+        return any(matches(record, condition) for condition in query['value'])
+    value = record.get(query['field'])
+    if value is None:
+        return False
+    if operator == '>':
+        return value > query['value']
+    if operator == '<':
+        return value < query['value']
+    if operator == '=':
+        return value == query['value']
+    raise ValueError('Unsupported operator {}'.format(operator))
+
+
+def search(records, search_query, data_key):
+    """Returns a page of the records matching the search query, `starting_after` is the offset of the page."""
+    records = sorted((record for record in records if matches(record, search_query['query'])),
+                     key=lambda record: record.get(search_query['sort']['field']))
+    pagination = search_query.get('pagination', {})
+    per_page = pagination.get('per_page', LIST_PAGE_SIZE)
+    start = int(pagination.get('starting_after') or 0)
+    response = {'type': 'list', data_key: records[start:start + per_page], 'total_count': len(records),
+                'pages': {'type': 'pages', 'page': start // per_page + 1, 'per_page': per_page,
+                          'total_pages': (len(records) + per_page - 1) // per_page}}
+    if start + per_page < len(records):
+        response['pages']['next'] = {'page': start // per_page + 2, 'starting_after': str(start + per_page)}
+    return response
+
+
+class MockIntercomHandler(BaseHTTPRequestHandler):
+    # Keep-alive connections, like the API
+    protocol_version = 'HTTP/1.1'
+    # The headers and the body are sent in 2 writes, do not delay the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        pass
+
+    def do_GET(self):
+        self.respond('GET')
+
+    def do_POST(self):
+        self.respond('POST')
+
+    def respond(self, method):
+        api = self.server.api
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        # The addressable list urls of the records start with a slash, so the tap requests them with 2 slashes
+        url = urlparse('/' + self.path.lstrip('/'))
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if api.latency:
+            time.sleep(api.latency)
+
+        headers, is_rate_limited = api.check_rate_limit()
+        status_code = 429 if is_rate_limited else api.inject_error()
+        if status_code is not None:
+            response = {'type': 'error.list', 'errors': [{'code': 'rate_limit_exceeded' if status_code == 429 else 'server_error'}]}
+        else:
+            status_code, response = api.handle(method, url.path, query, body, self.server.base_url)
+            endpoint = '/'.join(part if not part.isdigit() else '{id}' for part in url.path.split('/') if part)
+            with api.lock:
+                api.requests[endpoint] += 1
+
+        content = json.dumps(response).encode('utf-8')
+        if status_code == 200 and method == 'GET':
+            # The GET responses are validated with their ETag like the API
+            headers['ETag'] = '"{}"'.format(hashlib.sha1(content).hexdigest())
+            if self.headers.get('If-None-Match') == headers['ETag']:
+                status_code = 304
+                content = b''
+        with api.lock:
+            api.status_codes[status_code] += 1
+
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class MockIntercomServer:
+    """
+    Serves the mock API on a local port in a background thread.
+
+        with MockIntercomServer(MockIntercomAPI(records=1000)) as server:
+            config['base_url'] = server.base_url
+    """
+    def __init__(self, api, host='127.0.0.1', port=0):
+        self.api = api
+        self.httpd = ThreadingHTTPServer((host, port), MockIntercomHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.api = api
+        self.base_url = 'http://{}:{}'.format(host, self.httpd.server_address[1])
+        self.httpd.base_url = self.base_url
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,150 @@
+"""
+Synthetic Intercom API responses for the benchmarks, generated from the JSON schemas of the tap.
+
+The responses have the shape returned by the API, i.e. the shape `transform_json` de-nests,
+and the values are random but reproducible for a seed.
+"""
+
+import random
+import string
+
+from tap_intercom.schema import get_schemas
+from tap_intercom.streams import STREAMS
+
+# First `updated_at` of the generated records, 2021-01-01T00:00:00Z
+START_EPOCH_SECONDS = 1609459200
+
+# Number of items of the arrays, by profile and field name. The `default` is used for the other arrays.
+PROFILES = {
+    'small': {'default': 1, 'conversation_parts': 2, 'tags': 2, 'companies': 1, 'contacts': 1},
+    'medium': {'default': 3, 'conversation_parts': 10, 'tags': 10, 'companies': 3, 'contacts': 2},
+    # Conversations with many parts and contacts with large tag lists
+    'large': {'default': 5, 'conversation_parts': 100, 'tags': 60, 'companies': 10, 'contacts': 5},
+}
+
+# Lists nested in an object of the API response: {field: {key: [...]}}, see `transform_json`
+LIST_NODES = {
+    'companies': {'segments': 'segments', 'tags': 'tags'},
+    'conversations': {'tags': 'tags', 'contacts': 'contacts'},
+    'contacts': {'companies': 'data', 'tags': 'data'},
+}
+
+# Fields of the conversation_parts records added from their conversation by `transform_conversation_parts`
+CONVERSATION_FIELDS = ['conversation_id', 'conversation_total_parts', 'conversation_created_at', 'conversation_updated_at']
+
+
+def get_data_key(stream_name):
+    stream = STREAMS[stream_name]
+    return stream.data_key or stream.tap_stream_id
+
+
+class PayloadGenerator:
+    """
+    Generates the records of the streams from their schema.
+
+    :param seed: Seed of the random values
+    :param profile: Name of the `PROFILES` entry with the number of items of the arrays
+    :param null_ratio: Ratio of the nullable fields set to None
+    :param datetime_string_ratio: Ratio of the date-time fields returned as strings instead of epoch seconds
+    """
+    def __init__(self, seed=0, profile='medium', null_ratio=0.1, datetime_string_ratio=0.1):
+        self.random = random.Random(seed)
+        self.list_sizes = PROFILES[profile]
+        self.null_ratio = null_ratio
+        self.datetime_string_ratio = datetime_string_ratio
+        self.schemas, _ = get_schemas()
+        self.updated_at = START_EPOCH_SECONDS
+
+    def string(self, length=8):
+        return ''.join(self.random.choices(string.ascii_lowercase, k=length))
+
+    def datetime(self, as_string=True):
+        epoch_seconds = START_EPOCH_SECONDS + self.random.randint(0, 365 * 24 * 60 * 60)
+        if as_string and self.random.random() < self.datetime_string_ratio:
+            # Some of the dates are returned as strings by the API
+            return '{}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}Z'.format(
+                2021, self.random.randint(1, 12), self.random.randint(1, 28),
+                self.random.randint(0, 23), self.random.randint(0, 59), self.random.randint(0, 59))
+        return epoch_seconds
+
+    def value(self, schema, name=None, in_array=False):
+        """
+        Returns a random value for the schema of the field `name`.
+        The values in the arrays are not null and their date-times are epoch seconds, like the `applied_at` of the tags.
+        """
+        if 'anyOf' in schema:
+            schema = next((option for option in schema['anyOf'] if option.get('type') != 'null'), schema['anyOf'][0])
+
+        types = schema.get('type', [])
+        types = [types] if isinstance(types, str) else types
+        non_null_types = [schema_type for schema_type in types if schema_type != 'null']
+        if not non_null_types or (not in_array and 'null' in types and self.random.random() < self.null_ratio):
+            return None
+        schema_type = non_null_types[0]
+
+        if schema_type == 'object':
+            if 'properties' not in schema:
+                # Custom attributes
+                return {'attribute_{}'.format(i): self.string() for i in range(self.list_sizes['default'])}
+            return {key: self.value(field_schema, key, in_array) for key, field_schema in schema['properties'].items()}
+        if schema_type == 'array':
+            size = self.list_sizes.get(name, self.list_sizes['default'])
+            return [self.value(schema.get('items', {}), name, True) for _ in range(size)]
+        if schema.get('format') == 'date-time':
+            return self.datetime(as_string=not in_array)
+        if schema_type == 'string':
+            if name and (name == 'id' or name.endswith('_id')):
+                return str(self.random.randint(1, 10**12))
+            return self.string(self.random.randint(4, 40))
+        if schema_type == 'integer':
+            return self.random.randint(0, 10**6)
+        if schema_type == 'number':
+            return self.random.random() * 10**6
+        if schema_type == 'boolean':
+            return self.random.random() < 0.5
+        return self.string()
+
+    def record(self, stream_name):
+        """Returns a record of the stream as returned by the API."""
+        schema = self.schemas[stream_name]
+        record = {key: self.value(field_schema, key) for key, field_schema in schema['properties'].items()}
+
+        if 'id' in record:
+            # Primary key of the records
+            record['id'] = str(self.random.randint(1, 10**12))
+        if 'updated_at' in record:
+            # Records of the incremental streams are sorted by the replication key
+            self.updated_at += self.random.randint(1, 600)
+            record['updated_at'] = self.updated_at
+
+        for field, key in LIST_NODES.get(stream_name, {}).items():
+            values = record.get(field) or []
+            record[field] = {'type': 'list', key: values}
+            if stream_name == 'contacts':
+                record[field].update({'url': '/contacts/{}/{}'.format(record.get('id'), field),
+                                      'total_count': len(values),
+                                      'has_more': False})
+        return record
+
+    def conversation(self):
+        """Returns a conversation with its parts, as returned by the `conversations/{id}` endpoint."""
+        conversation = self.record('conversations')
+        part_schema = self.schemas['conversation_parts']
+        parts = []
+        for _ in range(self.list_sizes['conversation_parts']):
+            parts.append({key: self.value(field_schema, key)
+                          for key, field_schema in part_schema['properties'].items() if key not in CONVERSATION_FIELDS})
+        conversation['conversation_parts'] = {
+            'type': 'conversation_part.list',
+            'conversation_parts': parts,
+            'total_parts': len(parts)
+        }
+        return conversation
+
+    def response(self, stream_name, count):
+        """Returns a page of `count` records of the stream as returned by the API."""
+        if stream_name == 'conversation_parts':
+            records = [self.conversation() for _ in range(count)]
+        else:
+            records = [self.record(stream_name) for _ in range(count)]
+        return {'type': 'list', get_data_key(stream_name): records}
@@ -0,0 +1,169 @@
+"""
+Benchmark of the record pipeline of the tap on synthetic API responses:
+transform_json -> transform_times -> singer transform -> write_record
+
+Reports the records per second, the time of each stage and the peak memory of every stream.
+The records are written to /dev/null.
+
+Usage:
+    python tests/benchmarks/pipeline.py [--streams conversations contacts] [--pages 10] [--page-size 150]
+                                        [--profile small|medium|large] [--seed 0] [--no-memory]
+                                        [--output-buffer-size 65536] [--compiled-transform]
+"""
+
+import argparse
+import contextlib
+import copy
+import os
+import sys
+import time
+import tracemalloc
+
+from singer import metadata, UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING
+from singer.transform import transform
+
+from tap_intercom import output
+from tap_intercom.compiled_transform import compile_transformer
+from tap_intercom.schema import get_schemas
+from tap_intercom.streams import STREAMS
+from tap_intercom.transform import apply_datetime_plan, transform_json
+
+from payloads import PROFILES, PayloadGenerator, get_data_key
+
+STAGES = ['transform_json', 'transform_times', 'transform', 'write_record']
+
+
+def get_selected_metadata(field_metadata):
+    """Returns the metadata map of the stream with all the fields selected."""
+    mdata = metadata.to_map(field_metadata)
+    for breadcrumb in mdata:
+        mdata[breadcrumb]['selected'] = True
+    return mdata
+
+
+def run_pipeline(stream_name, responses, schema, mdata, compiled_transform=False):
+    """
+    Runs the pipeline of the stream on the responses, with the transformer compiled from the schema
+    instead of singer `transform` if `compiled_transform` is true.
+    Returns the number of records written and the seconds spent in each stage.
+    """
+    stream = STREAMS[stream_name]
+    data_key = get_data_key(stream_name)
+    # Same datetime plan as the sync of the stream
+    datetime_plan = stream(None, None, [stream_name]).get_datetime_plan(schema)
+    stage_times = dict.fromkeys(STAGES, 0.0)
+    record_count = 0
+    # Compiled once per stream, as the sync does
+    transformer = compile_transformer(schema, mdata) if compiled_transform else None
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for response in responses:
+            start = time.perf_counter()
+            # The conversation_parts are de-nested lazily, they are listed to time the stage
+            records = list(transform_json(response, stream_name, data_key))
+            stage_times['transform_json'] += time.perf_counter() - start
+
+            for record in records:
+                start = time.perf_counter()
+                apply_datetime_plan(record, datetime_plan)
+                transformed_at = time.perf_counter()
+                if transformer is not None:
+                    transformed_record = transformer(record)
+                else:
+                    transformed_record = transform(record,
+                                                   schema,
+                                                   integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING,
+                                                   metadata=mdata)
+                written_at = time.perf_counter()
+                output.write_record(stream_name, transformed_record)
+                end = time.perf_counter()
+
+                stage_times['transform_times'] += transformed_at - start
+                stage_times['transform'] += written_at - transformed_at
+                stage_times['write_record'] += end - written_at
+                record_count += 1
+
+        start = time.perf_counter()
+        output.flush()
+        stage_times['write_record'] += time.perf_counter() - start
+
+    return record_count, stage_times
+
+
+def measure_peak_memory(stream_name, responses, schema, mdata, compiled_transform=False):
+    """Returns the peak memory in bytes allocated while running the pipeline."""
+    tracemalloc.start()
+    try:
+        run_pipeline(stream_name, responses, schema, mdata, compiled_transform)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def benchmark_stream(stream_name, generator, pages, page_size, schema, mdata, with_memory=True, compiled_transform=False):
+    responses = [generator.response(stream_name, page_size) for _ in range(pages)]
+    # The pipeline updates the responses in place, the memory is measured on a copy
+    memory_responses = copy.deepcopy(responses) if with_memory else None
+
+    record_count, stage_times = run_pipeline(stream_name, responses, schema, mdata, compiled_transform)
+    result = {
+        'stream': stream_name,
+        'records': record_count,
+        'seconds': sum(stage_times.values()),
+        'stages': stage_times,
+        'peak_memory': None
+    }
+    if with_memory:
+        result['peak_memory'] = measure_peak_memory(stream_name, memory_responses, schema, mdata, compiled_transform)
+    return result
+
+
+def print_result(result, out=sys.stdout):
+    seconds = result['seconds']
+    records_per_second = result['records'] / seconds if seconds else 0
+    out.write('{:<20} {:>8} records {:>10.0f} records/s'.format(result['stream'], result['records'], records_per_second))
+    if result['peak_memory'] is not None:
+        out.write(' {:>8.1f} MiB peak'.format(result['peak_memory'] / 2**20))
+    out.write('\n')
+    for stage in STAGES:
+        stage_seconds = result['stages'][stage]
+        share = stage_seconds / seconds * 100 if seconds else 0
+        out.write('    {:<18} {:>9.3f} s {:>5.1f}%\n'.format(stage, stage_seconds, share))
+
+
+def parse_args(argv=None):
+    schemas, _ = get_schemas()
+    parser = argparse.ArgumentParser(description='Benchmark of the record pipeline of tap-intercom')
+    parser.add_argument('--streams', nargs='+', choices=sorted(schemas), default=sorted(schemas))
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--page-size', type=int, default=150)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='medium')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='Do not measure the peak memory')
+    parser.add_argument('--output-buffer-size', type=int, default=0, help='`output_buffer_size` of the writer, 0 to not buffer')
+    parser.add_argument('--compiled-transform', action='store_true', help='Transform the records with the `compiled_transform` transformer')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    schemas, field_metadata = get_schemas()
+    generator = PayloadGenerator(seed=args.seed, profile=args.profile)
+    output.WRITER.buffer_size = args.output_buffer_size
+
+    sys.stdout.write('Profile: {}, {} pages of {} records\n'.format(args.profile, args.pages, args.page_size))
+    for stream_name in args.streams:
+        result = benchmark_stream(stream_name,
+                                  generator,
+                                  args.pages,
+                                  args.page_size,
+                                  schemas[stream_name],
+                                  get_selected_metadata(field_metadata[stream_name]),
+                                  with_memory=not args.no_memory,
+                                  compiled_transform=args.compiled_transform)
+        print_result(result)
+
+
+if __name__ == '__main__':
+    main()
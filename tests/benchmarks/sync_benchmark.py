@@ -0,0 +1,161 @@
+"""
+End to end benchmark of `sync.sync` against the local mock Intercom API of `mock_server`.
+
+Reports the requests per second, the records per second and the status codes of the responses.
+The Singer messages are counted and dropped.
+
+Usage:
+    python tests/benchmarks/sync_benchmark.py [--records 1000] [--profile medium] [--latency 0.05]
+                                              [--rate-limit 166] [--error-rate 0.01] [--rate-limit-error-rate 0.01]
+                                              [--streams conversations contacts] [--config tap_config.json]
+                                              [--embedded-parts 20]
+
+The `--config` file adds the tap settings to benchmark, e.g. {"max_parallel_streams": 4}.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import sys
+import time
+from collections import Counter
+
+from singer import metadata
+
+from tap_intercom.discover import discover
+from tap_intercom.sync import sync
+
+from mock_server import MockIntercomAPI, MockIntercomServer
+from payloads import PROFILES
+
+
+class MessageCounter(io.TextIOBase):
+    """Stdout replacement counting the Singer messages by type and stream."""
+    def __init__(self):
+        super().__init__()
+        self.messages = Counter()
+        self.records = Counter()
+        self.buffer = ''
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.buffer += text
+        *lines, self.buffer = self.buffer.split('\n')
+        for line in lines:
+            if line:
+                message = json.loads(line)
+                self.messages[message['type']] += 1
+                if message['type'] == 'RECORD':
+                    self.records[message['stream']] += 1
+        return len(text)
+
+
+def get_catalog(stream_names=None):
+    """Returns the catalog of the tap with all the fields of the streams selected."""
+    catalog = discover()
+    for stream in catalog.streams:
+        if stream_names and stream.tap_stream_id not in stream_names:
+            continue
+        mdata = metadata.to_map(stream.metadata)
+        for breadcrumb in mdata:
+            mdata[breadcrumb]['selected'] = True
+        stream.metadata = metadata.to_list(mdata)
+    return catalog
+
+
+def run_sync(api, tap_config=None, stream_names=None, state=None, port=0):
+    """
+    Runs the sync against the mock API and returns the statistics of the run.
+    The responses cached by `response_cache_dir` are keyed by their URL, the runs comparing them need the same `port`.
+    """
+    counter = MessageCounter()
+    with MockIntercomServer(api, port=port) as server:
+        config = {
+            'access_token': 'benchmark_token',
+            'start_date': '2020-01-01T00:00:00Z',
+            'user_agent': 'tap-intercom benchmark',
+            'base_url': server.base_url
+        }
+        config.update(tap_config or {})
+        catalog = get_catalog(stream_names)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(counter):
+            sync(config, state or {}, catalog)
+        seconds = time.perf_counter() - start
+
+    return {
+        'seconds': seconds,
+        # Including the requests failed by the rate limit and the injected errors
+        'requests': sum(api.status_codes.values()),
+        'endpoints': api.requests,
+        'status_codes': api.status_codes,
+        'records': sum(counter.records.values()),
+        'streams': counter.records,
+        'messages': counter.messages
+    }
+
+
+def print_result(result, out=sys.stdout):
+    seconds = result['seconds']
+    out.write('Synced in {:.2f} s\n'.format(seconds))
+    out.write('{:>10} requests {:>10.1f} requests/s\n'.format(result['requests'], result['requests'] / seconds))
+    out.write('{:>10} records  {:>10.1f} records/s\n'.format(result['records'], result['records'] / seconds))
+    out.write('Status codes: {}\n'.format(dict(sorted(result['status_codes'].items()))))
+    out.write('Messages: {}\n'.format(dict(sorted(result['messages'].items()))))
+    out.write('Records by stream:\n')
+    for stream, count in sorted(result['streams'].items()):
+        out.write('    {:<20} {:>8}\n'.format(stream, count))
+    out.write('Successful requests by endpoint:\n')
+    for endpoint, count in sorted(result['endpoints'].items()):
+        out.write('    {:<30} {:>8}\n'.format(endpoint, count))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='End to end benchmark of tap-intercom against a mock API')
+    parser.add_argument('--records', type=int, default=1000,
+                        help='Number of conversations, contacts and companies, the other streams have 1/10th')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='medium')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each response')
+    parser.add_argument('--rate-limit', type=int, default=None, help='Requests allowed in each rate limit window')
+    parser.add_argument('--rate-limit-window', type=int, default=10, help='Seconds of a rate limit window')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Ratio of the requests failing with a 500 error')
+    parser.add_argument('--rate-limit-error-rate', type=float, default=0.0, help='Ratio of the requests failing with a 429 error')
+    parser.add_argument('--embedded-parts', type=int, default=None,
+                        help='Number of parts of the conversations returned by the search, they are not returned by default')
+    parser.add_argument('--streams', nargs='+', default=None, help='Streams to sync, all the streams by default')
+    parser.add_argument('--config', default=None, help='JSON file with the tap config to benchmark')
+    parser.add_argument('--port', type=int, default=0, help='Port of the mock API, a free port by default')
+    parser.add_argument('--verbose', action='store_true', help='Show the logs of the tap')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tap_config = {}
+    if args.config:
+        with open(args.config) as config_file:
+            tap_config = json.load(config_file)
+    if not args.verbose:
+        # singer resets the level of the root logger, the INFO logs are disabled instead
+        logging.disable(logging.INFO)
+
+    api = MockIntercomAPI(records=args.records,
+                          profile=args.profile,
+                          seed=args.seed,
+                          latency=args.latency,
+                          rate_limit=args.rate_limit,
+                          rate_limit_window=args.rate_limit_window,
+                          error_rate=args.error_rate,
+                          rate_limit_error_rate=args.rate_limit_error_rate,
+                          embedded_parts=args.embedded_parts)
+    print_result(run_sync(api, tap_config, args.streams, port=args.port))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import threading
+
+# Seconds a call waits for the other calls of its batch before the test fails
+BATCH_TIMEOUT = 10
+
+
+class OutOfOrderCalls:
+    """
+    Mocked endpoint called by a pool of `workers`, forcing the calls to be concurrent and to complete out of order,
+    without depending on the timing of the test runner.
+
+    The calls wait until `workers` calls are in flight, or all the `expected_calls` left, then they return in the
+    reverse order they started in, i.e. the first call of each batch returns last. A call waiting longer than
+    `BATCH_TIMEOUT` seconds fails, e.g. when the calls are not concurrent.
+
+    :param respond: The function returning the response of a call
+    :param expected_calls: The number of calls of the test
+    :param workers: The number of calls expected in flight at the same time
+    """
+    def __init__(self, respond, expected_calls, workers):
+        self.respond = respond
+        self.remaining = expected_calls
+        self.workers = workers
+        self.condition = threading.Condition()
+        # Calls of the batch being filled, in the order they started in
+        self.batch = []
+        self.max_in_flight = 0
+        self.call_count = 0
+        self.returned = []
+
+    def __call__(self, *args, **kwargs):
+        with self.condition:
+            call = object()
+            batch = self.batch
+            batch.append(call)
+            self.call_count += 1
+            self.max_in_flight = max(self.max_in_flight, len(batch))
+            if len(batch) >= min(self.workers, self.remaining):
+                self.remaining -= len(batch)
+                self.batch = []
+                self.condition.notify_all()
+            if not self.condition.wait_for(lambda: self.batch is not batch and batch[-1] is call, BATCH_TIMEOUT):
+                raise AssertionError("{} calls in flight, expected {}".format(len(batch), self.workers))
+
+        try:
+            response = self.respond(*args, **kwargs)
+            self.returned.append(response)
+            return response
+        finally:
+            with self.condition:
+                batch.pop()
+                self.condition.notify_all()
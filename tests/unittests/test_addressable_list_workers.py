@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+from tap_intercom.client import IntercomClient
+from tap_intercom.streams import Contacts
+from concurrency_helpers import OutOfOrderCalls
+
+METADATA = {
+    (): {'selected': True},
+    ('properties', 'tags'): {'selected': True},
+    ('properties', 'companies'): {'selected': True}
+}
+
+
+def get_contact_page(count):
+    """Page of `count` contacts, each with its tags and companies in the same record"""
+    contacts = []
+    for i in range(count):
+        contact = {'id': str(i)}
+        for field in ['tags', 'companies']:
+            contact[field] = {
+                'type': 'list',
+                'data': [],
+                'url': '/contacts/{}/{}'.format(i, field),
+                'total_count': 20,
+                'has_more': True
+            }
+        contacts.append(contact)
+    return {'data': contacts}
+
+
+def get_addressable_list_page(path, url=None, params=None, cache=False):
+    """Mocked addressable list endpoints with 2 pages"""
+    endpoint = url or path
+    if url is None:
+        return {
+            'data': [{'id': '{}_1'.format(endpoint)}],
+            'pages': {'next': '{}/page_2'.format(endpoint)}
+        }
+    return {'data': [{'id': endpoint}], 'pages': {}}
+
+
+class TestAddressableListWorkers(unittest.TestCase):
+    """
+        Test cases to verify the addressable lists of a page are fetched concurrently
+    """
+
+    @parameterized.expand([
+        ['without_workers', {}, 1],
+        ['with_workers', {'addressable_list_workers': 4}, 4],
+    ])
+    def test_values_joined_to_records(self, name, config, expected_max_in_flight):
+        """
+            Verify that every record gets the values of its own addressable lists
+        """
+        calls = OutOfOrderCalls(get_addressable_list_page, expected_calls=40, workers=expected_max_in_flight)
+        client = IntercomClient('test_access_token', 100, None)
+        contacts = Contacts(client, None, ['contacts'], config)
+
+        with mock.patch.object(client, 'get', side_effect=calls) as mocked_get:
+            data = contacts.get_addressable_list(get_contact_page(10), METADATA)
+
+        self.assertEqual(mocked_get.call_count, 40)
+        self.assertEqual(calls.max_in_flight, expected_max_in_flight)
+        for contact in data['data']:
+            for field in ['tags', 'companies']:
+                endpoint = '/contacts/{}/{}'.format(contact['id'], field)
+                self.assertEqual(contact[field]['data'],
+                                 [{'id': '{}_1'.format(endpoint)}, {'id': '{}/page_2'.format(endpoint)}])
+
+    def test_error_raised(self):
+        """
+            Verify that an error of a concurrent fetch is raised
+        """
+        client = IntercomClient('test_access_token', 100, None)
+        contacts = Contacts(client, None, ['contacts'], {'addressable_list_workers': 4})
+
+        with mock.patch.object(client, 'get', side_effect=Exception('API error')):
+            with self.assertRaises(Exception) as e:
+                contacts.get_addressable_list(get_contact_page(10), METADATA)
+
+        self.assertEqual(str(e.exception), 'API error')
@@ -0,0 +1,71 @@
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+from tap_intercom.client import IntercomClient
+from tap_intercom.streams import Admins
+from concurrency_helpers import OutOfOrderCalls
+
+ADMIN_IDS = [str(i) for i in range(10)]
+
+
+def get_admin(path, cache=False):
+    """Mocked `admins/{id}` endpoint"""
+    return {'id': path.split('/')[-1], 'type': 'admin'}
+
+
+class TestAdminWorkers(unittest.TestCase):
+    """
+        Test cases to verify the admins are fetched concurrently
+    """
+
+    def setUp(self):
+        patcher = mock.patch('tap_intercom.streams.AdminList.get_records', side_effect=lambda *args, **kwargs: iter(ADMIN_IDS))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def get_records(config, get):
+        client = IntercomClient('test_access_token', 100, None)
+        client.get = get
+        return Admins(client, None, ['admins'], config).get_records()
+
+    @parameterized.expand([
+        ['without_workers', {}, 1],
+        ['with_workers', {'admin_workers': 4}, 4],
+    ])
+    def test_all_admins_fetched(self, name, config, expected_max_in_flight):
+        """
+            Verify that every admin is fetched once and the requests in flight are bounded by the workers
+        """
+        calls = OutOfOrderCalls(get_admin, expected_calls=len(ADMIN_IDS), workers=expected_max_in_flight)
+
+        records = list(self.get_records(config, calls))
+
+        self.assertEqual(sorted(record['id'] for record in records), sorted(ADMIN_IDS))
+        self.assertEqual(calls.call_count, len(ADMIN_IDS))
+        self.assertEqual(calls.max_in_flight, expected_max_in_flight)
+
+    def test_order_without_workers(self):
+        """
+            Verify that the admins are yielded in the order of the admin list without workers
+        """
+        records = list(self.get_records({}, get_admin))
+
+        self.assertEqual([record['id'] for record in records], ADMIN_IDS)
+
+    @parameterized.expand([
+        ['without_workers', {}],
+        ['with_workers', {'admin_workers': 2}],
+    ])
+    def test_yielded_before_all_fetched(self, name, config):
+        """
+            Verify that the first admin is yielded before all the admins are fetched
+        """
+        get = mock.Mock(side_effect=get_admin)
+        records = self.get_records(config, get)
+
+        next(records)
+
+        self.assertLess(get.call_count, len(ADMIN_IDS))
+        records.close()
@@ -0,0 +1,43 @@
+import unittest
+from unittest import mock
+
+from tap_intercom.client import IntercomClient
+from tap_intercom.sync import sync
+from test_conversation_part_bookmarks import Catalog
+
+
+class TestBaseUrl(unittest.TestCase):
+    """
+        Test cases to verify the API base URL can be replaced, e.g. by a local mock server
+    """
+
+    @mock.patch('requests.Session.request')
+    def test_requests_sent_to_base_url(self, mocked_request):
+        """
+            Verify that the requests are sent to the `base_url` of the client
+        """
+        mocked_request.return_value.status_code = 200
+        mocked_request.return_value.json.return_value = {'type': 'list'}
+        client = IntercomClient('test_access_token', 300, base_url='http://127.0.0.1:8080/')
+
+        with mock.patch.object(client, 'check_access_token', return_value=True):
+            client.get('tags')
+
+        self.assertEqual(mocked_request.call_args[0], ('GET', 'http://127.0.0.1:8080/tags'))
+
+    def test_default_base_url(self):
+        """
+            Verify that the requests are sent to the Intercom API by default
+        """
+        client = IntercomClient('test_access_token', 300)
+
+        self.assertEqual(client.base_url, 'https://api.intercom.io')
+
+    @mock.patch('tap_intercom.sync.IntercomClient')
+    def test_base_url_config(self, mocked_client):
+        """
+            Verify that the sync passes the `base_url` config param to the client
+        """
+        sync({'base_url': 'http://127.0.0.1:8080'}, {}, Catalog([]))
+
+        self.assertEqual(mocked_client.call_args[0][4], 'http://127.0.0.1:8080')
@@ -0,0 +1,212 @@
+import io
+import json
+import unittest
+from copy import deepcopy
+from unittest import mock
+
+from parameterized import parameterized
+from singer import metadata, UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING
+from singer.transform import SchemaMismatch, transform
+from tap_intercom.client import IntercomClient
+from tap_intercom.compiled_transform import compile_transformer
+from tap_intercom.schema import get_schemas
+from tap_intercom.streams import Conversations
+from tap_intercom.transform_pool import BATCH_SIZE
+from test_conversation_part_bookmarks import Catalog
+
+VALUES = [None, '', 'abc', '1,234', '12.5', 'false', 'False', 'true', '2022-08-01T09:35:09Z', '2022-08-01T09:35:09.123+05:30',
+          0, 1, -5, 1.5, float('nan'), True, False, 1659346509000, 1659346509000.5, -62135596800000, [], [1, '2'], {}, {'a': 1}]
+
+TYPES = [['null', 'string'], ['null', 'integer'], ['null', 'number'], ['null', 'boolean'], ['null', 'object'], ['null', 'array'],
+         'string', 'integer', 'number', 'boolean', 'null', ['string', 'integer', 'null'], ['boolean', 'string'], ['null', 'foo']]
+
+FORMATS = ['date-time', 'singer.decimal']
+
+# Values of the fields of the records of the stream schemas, by type
+SCHEMA_VALUES = {
+    'string': ['abc', 12, None, ''],
+    'integer': [12, '1,234', None, 1.5],
+    'number': [1.5, 2, '3.5', None],
+    'boolean': [True, 'false', None, 0],
+    'date-time': [1659346509000, '2022-08-01T09:35:09Z', None, 1659346509000.5],
+}
+
+
+def get_record(schema, index=0, datetime_values=SCHEMA_VALUES['date-time']):
+    """Returns a value of the schema node with all its properties, the arrays have 2 items"""
+    if 'anyOf' in schema:
+        return get_record(schema['anyOf'][index % len(schema['anyOf'])], index, datetime_values)
+    types = schema.get('type', [])
+    types = types if isinstance(types, list) else [types]
+    if 'object' in types:
+        record = {name: get_record(field_schema, index + position, datetime_values) for position, (name, field_schema)
+                  in enumerate(schema.get('properties', {}).items())}
+        # The fields which are not in the schema are removed
+        record['not_in_schema'] = index
+        return record
+    if 'array' in types:
+        return [get_record(schema['items'], index + position, datetime_values) for position in range(2)]
+    if schema.get('format') == 'date-time':
+        values = datetime_values
+    else:
+        values = next((SCHEMA_VALUES[typ] for typ in types if typ in SCHEMA_VALUES), [None])
+    return values[index % len(values)]
+
+
+def get_selected_metadata(stream_name):
+    _, field_metadata = get_schemas()
+    mdata = metadata.to_map(field_metadata[stream_name])
+    for breadcrumb in mdata:
+        mdata[breadcrumb]['selected'] = True
+    return mdata
+
+
+class TestCompiledTransform(unittest.TestCase):
+    """
+        Test cases to verify the compiled transformer returns the same records as singer's `transform`
+    """
+
+    def get_result(self, transform_record, record):
+        try:
+            return repr(transform_record(record)), record
+        except Exception as error: # pylint: disable=broad-except
+            # e.g. SchemaMismatch, or KeyError for an array without items
+            return '{}: {}'.format(type(error).__name__, error), record
+
+    def assert_same_transform(self, record, schema, stream_metadata=None):
+        """
+            Verify the transformed record, or the error, and the record filtered in place by the metadata
+        """
+        expected = self.get_result(lambda data: transform(data,
+                                                          deepcopy(schema),
+                                                          integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING,
+                                                          metadata=stream_metadata),
+                                   deepcopy(record))
+        # `repr` differs for the values of different types, e.g. 1, 1.0 and True
+        self.assertEqual(self.get_result(compile_transformer(schema, stream_metadata), deepcopy(record)), expected)
+
+    @parameterized.expand([[str(typ), typ] for typ in TYPES])
+    def test_types(self, name, typ):
+        for value in VALUES:
+            with self.subTest(value=value):
+                self.assert_same_transform({'field': value}, {'type': 'object', 'properties': {'field': {'type': typ}}})
+
+    @parameterized.expand([['{}_{}'.format(fmt, typ), fmt, typ] for fmt in FORMATS for typ in [['null', 'string'], 'string', 'integer']])
+    def test_formats(self, name, fmt, typ):
+        for value in VALUES:
+            with self.subTest(value=value):
+                self.assert_same_transform({'field': value}, {'type': 'object', 'properties': {'field': {'type': typ, 'format': fmt}}})
+
+    @parameterized.expand([
+        ['any_of', {'anyOf': [{'type': 'array', 'items': {'type': 'integer'}}, {'type': ['null', 'string'], 'format': 'date-time'}, {'type': 'boolean'}]}],
+        ['without_type', {}],
+        ['object_without_properties', {'type': ['null', 'object']}],
+        ['object_with_empty_properties', {'type': 'object', 'properties': {}}],
+        ['pattern_properties', {'type': 'object', 'properties': {'id': {'type': 'integer'}}, 'patternProperties': {'^a': {'type': 'string'}}}],
+        ['nested_arrays', {'type': 'array', 'items': {'type': ['null', 'array'], 'items': {'type': ['null', 'integer']}}}],
+        ['array_of_objects', {'type': ['null', 'array'], 'items': {'type': 'object', 'properties': {'id': {'type': 'integer'}, 'a': {'type': 'string'}}}}],
+    ])
+    def test_schema_nodes(self, name, field_schema):
+        values = VALUES + [[{'id': '1', 'a': 2, 'b': 3}], {'id': 1, 'a': 'b', 'abc': 1, 'c': 2}, [[1, '2'], None, []], [[None, 'a']]]
+        for value in values:
+            with self.subTest(value=value):
+                self.assert_same_transform({'field': value}, {'type': 'object', 'properties': {'field': field_schema}})
+
+    def test_schema_mismatch(self):
+        """
+            Verify that a record not matching the schema raises the error of singer's `transform`
+        """
+        schema = {'type': 'object', 'properties': {'id': {'type': 'integer'}, 'tags': {'type': 'array', 'items': {'type': 'integer'}}}}
+        with self.assertRaises(SchemaMismatch):
+            compile_transformer(schema)({'id': 'abc', 'tags': [1, 'b']})
+        self.assert_same_transform({'id': 'abc', 'tags': [1, 'b']}, schema)
+
+    @parameterized.expand([
+        ['deselected', {'selected': False}],
+        ['unsupported', {'inclusion': 'unsupported'}],
+        ['automatic', {'inclusion': 'automatic', 'selected': False}],
+        ['selected', {'selected': True, 'inclusion': 'available'}],
+    ])
+    def test_metadata(self, name, field_metadata):
+        """
+            Verify the fields filtered by the metadata, at the top level, in an object and in the objects of an array
+        """
+        schema = {'type': 'object', 'properties': {
+            'id': {'type': 'integer'},
+            'source': {'type': ['null', 'object'], 'properties': {'id': {'type': 'integer'}, 'body': {'type': 'string'}}},
+            'parts': {'type': ['null', 'array'], 'items': {'type': 'object', 'properties': {'id': {'type': 'integer'}, 'body': {'type': 'string'}}}},
+        }}
+        record = {'id': 1, 'source': {'id': 2, 'body': 'a'}, 'parts': [{'id': 3, 'body': 'b'}, {'id': 4}, None], 'other': {'body': 'c'}}
+        for breadcrumb in [('properties', 'source'), ('properties', 'source', 'properties', 'body'),
+                           ('properties', 'parts', 'items', 'properties', 'body'), ('properties', 'other', 'properties', 'body')]:
+            with self.subTest(breadcrumb=breadcrumb):
+                stream_metadata = {(): {'selected': True}, breadcrumb: field_metadata}
+                self.assert_same_transform(record, schema, stream_metadata)
+
+    def test_fields_of_automatic_field(self):
+        """
+            Verify that the fields of an automatic field are not filtered, as singer does
+        """
+        schema = {'type': 'object', 'properties': {'source': {'type': 'object', 'properties': {'id': {'type': 'integer'}, 'body': {'type': 'string'}}}}}
+        stream_metadata = {('properties', 'source'): {'inclusion': 'automatic'},
+                           ('properties', 'source', 'properties', 'body'): {'selected': False}}
+        self.assert_same_transform({'source': {'id': 1, 'body': 'a'}}, schema, stream_metadata)
+
+    @parameterized.expand([[stream_name] for stream_name in sorted(get_schemas()[0])])
+    def test_stream_schema(self, stream_name):
+        """
+            Verify the records of the stream schema, with all the fields selected, with one field out of 3 deselected
+            and without metadata
+        """
+        schema = get_schemas()[0][stream_name]
+        selected_metadata = get_selected_metadata(stream_name)
+        deselected_metadata = deepcopy(selected_metadata)
+        for index, breadcrumb in enumerate(deselected_metadata):
+            if breadcrumb and index % 3 == 0:
+                deselected_metadata[breadcrumb]['selected'] = False
+
+        for index in range(4):
+            for stream_metadata in [selected_metadata, deselected_metadata, None]:
+                with self.subTest(index=index, stream_metadata=stream_metadata is selected_metadata):
+                    self.assert_same_transform(get_record(schema, index), schema, stream_metadata)
+
+
+@mock.patch('tap_intercom.streams.MAX_PAGE_SIZE', BATCH_SIZE)
+class TestSyncCompiledTransform(unittest.TestCase):
+
+    def sync(self, config, schema, stream_metadata, records):
+        stdout = io.StringIO()
+        config = dict(config, start_date='2021-12-25T00:00:00Z')
+        conversations = Conversations(IntercomClient('dummy_token', None), Catalog(['conversations']), ['conversations'], config)
+        with mock.patch('sys.stdout', stdout), \
+                mock.patch('tap_intercom.streams.Conversations.get_records', return_value=deepcopy(records)):
+            conversations.sync({}, schema, stream_metadata, config, None)
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    @parameterized.expand([
+        ['syncing_thread', {}],
+        ['transform_workers', {'transform_workers': 2}],
+    ])
+    def test_same_messages(self, name, config):
+        """
+            Verify that the messages of the sync are the same with the compiled transformer
+        """
+        schema = get_schemas()[0]['conversations']
+        stream_metadata = get_selected_metadata('conversations')
+        stream_metadata[('properties', 'source')]['selected'] = False
+        records = []
+        for index in range(2 * BATCH_SIZE + 50):
+            # The date-times of the API are epoch seconds, transformed to milliseconds before the schema
+            record = get_record(schema, index, datetime_values=[1659346509, 1640636000])
+            record.update(id=str(index), updated_at=1640636000000 + index * 1000)
+            records.append(record)
+
+        expected_messages = self.sync(config, schema, stream_metadata, records)
+        messages = self.sync(dict(config, compiled_transform=True), schema, stream_metadata, records)
+
+        # The STATE messages are at the same positions
+        self.assertEqual([message['type'] for message in messages], [message['type'] for message in expected_messages])
+        transformed_records = [message['record'] for message in messages if message['type'] == 'RECORD']
+        self.assertEqual(transformed_records, [message['record'] for message in expected_messages if message['type'] == 'RECORD'])
+        self.assertEqual(len(transformed_records), 2 * BATCH_SIZE + 50)
+        self.assertTrue(all('source' not in record for record in transformed_records))
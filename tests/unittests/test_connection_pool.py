@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from tap_intercom.client import IntercomClient, IntercomNotFoundError
+
+CONCURRENT_REQUESTS = 4
+
+
+class FakeIntercomHandler(BaseHTTPRequestHandler):
+    """Fake `conversations/{id}` endpoint on keep-alive connections, the requests wait for each other at the barrier"""
+    protocol_version = 'HTTP/1.1'
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        super().handle()
+
+    def do_GET(self):
+        # Broken if the requests are not in flight at the same time
+        self.server.barrier.wait()
+        conversation_id = self.path.split('/')[-1]
+        if conversation_id == 'missing':
+            status_code, body = 404, {'type': 'error.list', 'errors': [{'code': 'not_found', 'message': 'Not Found'}]}
+        else:
+            status_code, body = 200, {'type': 'conversation', 'id': conversation_id}
+        content = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('X-RateLimit-Limit', '10000')
+        self.send_header('X-RateLimit-Remaining', '9000')
+        self.send_header('X-RateLimit-Reset', str(int(time.time()) + 10))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        pass
+
+
+class TestConnectionPool(unittest.TestCase):
+    """
+        Test cases to verify the requests of the threads sharing a client are sent concurrently
+        on the pooled keep-alive connections, against a local fake Intercom API
+    """
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeIntercomHandler)
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        self.server.barrier = threading.Barrier(CONCURRENT_REQUESTS, timeout=10)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.client = IntercomClient('dummy_token', 300, max_connections=CONCURRENT_REQUESTS,
+                                     base_url='http://127.0.0.1:{}'.format(self.server.server_address[1]))
+        self.client.check_access_token = mock.Mock(return_value=True)
+
+    def get_concurrently(self, conversation_ids):
+        with ThreadPoolExecutor(max_workers=CONCURRENT_REQUESTS) as executor:
+            return list(executor.map(lambda conversation_id: self.client.get('conversations/{}'.format(conversation_id)),
+                                     conversation_ids))
+
+    def test_concurrent_requests(self):
+        """
+            Verify the requests are in flight at the same time and the connections are reused by the next requests
+        """
+        for page in range(3):
+            conversation_ids = [str(page * CONCURRENT_REQUESTS + i) for i in range(CONCURRENT_REQUESTS)]
+            responses = self.get_concurrently(conversation_ids)
+            self.assertEqual([response['id'] for response in responses], conversation_ids)
+
+        self.assertEqual(self.server.connections, CONCURRENT_REQUESTS)
+        self.assertEqual(self.client.rate_limiter.limit, 10000)
+
+    def test_concurrent_error(self):
+        """
+            Verify the error of a concurrent request is raised with the same exception as a single request
+        """
+        with self.assertRaises(IntercomNotFoundError):
+            self.get_concurrently(['1', 'missing', '2', '3'])
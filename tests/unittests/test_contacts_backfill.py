@@ -0,0 +1,100 @@
+import copy
+import unittest
+from unittest import mock
+
+import singer
+from tap_intercom.client import IntercomClient
+from tap_intercom.streams import Contacts
+from test_conversation_part_bookmarks import Catalog
+
+DAY = 24 * 60 * 60
+START_DATE = '2021-01-01T00:00:00Z'
+START_EPOCH = 1609459200
+NOW = '2021-01-31T00:00:00.000000Z'
+# Contacts updated once a day
+CONTACTS = [{'id': str(day), 'updated_at': START_EPOCH + day * DAY + 10, 'tags': {}, 'companies': {}} for day in range(30)]
+SCHEMA = {'properties': {'updated_at': {'type': ['null', 'string'], 'format': 'date-time'}}}
+
+
+def search_contacts(path, params, json):
+    """Mocked contacts search, filtering CONTACTS by the window of the query, 2 records per page"""
+    query = json['query']
+    end = float('inf')
+    if query['operator'] == 'AND':
+        query, end = query['value'][0], query['value'][1]['value']
+    start = query['value'][0]['value']
+    records = [record for record in CONTACTS if start <= record['updated_at'] < end]
+    offset = int(json['pagination'].get('starting_after') or 0)
+    response = {'data': copy.deepcopy(records[offset:offset + 2]), 'pages': {}}
+    if offset + 2 < len(records):
+        response['pages']['next'] = {'starting_after': str(offset + 2)}
+    return response
+
+
+@mock.patch("tap_intercom.streams.transform", side_effect=lambda record, *args, **kwargs: record)
+@mock.patch("tap_intercom.streams.output.write_record")
+@mock.patch("tap_intercom.client.IntercomClient.post", side_effect=search_contacts)
+@mock.patch("tap_intercom.streams.MAX_PAGE_SIZE", 4)
+class TestContactsBackfill(unittest.TestCase):
+    """
+        Test cases to verify the time-sliced parallel backfill of contacts
+    """
+
+    def sync_contacts(self, state, config, written_states, mocked_write_record):
+        client = IntercomClient('dummy_token', None)
+        contacts = Contacts(client, Catalog(['contacts']), ['contacts'], config)
+        config['start_date'] = START_DATE
+
+        def write_state(state):
+            # Save the state with the ids of the records written before it
+            written_ids = {args[1]['id'] for args, _ in mocked_write_record.call_args_list}
+            written_states.append((copy.deepcopy(state), written_ids))
+
+        with mock.patch('singer.utils.now', return_value=singer.utils.strptime_to_utc(NOW)), \
+                mock.patch('tap_intercom.streams.output.write_state', side_effect=write_state):
+            return contacts.sync(state, SCHEMA, {}, config, None)
+
+    def test_backfill_windows(self, mocked_post, mocked_write_record, mocked_transform):
+        """
+            Verify all the records are written and the intermediate bookmark is the progress of the first unfinished window
+        """
+        written_states = []
+        state = self.sync_contacts({}, {'contacts_backfill_windows': 3}, written_states, mocked_write_record)
+
+        written_ids = sorted(int(args[1]['id']) for args, _ in mocked_write_record.call_args_list)
+        self.assertEqual(written_ids, list(range(30)))
+        self.assertEqual(mocked_post.call_count, 15)
+
+        self.assertTrue(written_states)
+        for written_state, ids_written_before in written_states:
+            bookmark = written_state['bookmarks']['contacts']
+            bookmark_epoch = singer.utils.strptime_to_utc(bookmark['updated_at']).timestamp()
+            windows = bookmark['backfill_windows']
+            if windows:
+                self.assertEqual(bookmark_epoch, windows[0].get('last_updated_at') or windows[0]['start'])
+            # All the records updated before the bookmark are written before the state
+            updated_before = {record['id'] for record in CONTACTS if record['updated_at'] < bookmark_epoch}
+            self.assertTrue(updated_before.issubset(ids_written_before))
+
+        self.assertEqual(state, {'bookmarks': {'contacts': {'updated_at': '2021-01-30T00:00:10.000000Z'}}})
+
+    def test_resume_backfill_windows(self, mocked_post, mocked_write_record, mocked_transform):
+        """
+            Verify only the unfinished windows are resumed from their last updated_at
+        """
+        windows = [{'start': START_EPOCH + 10 * DAY, 'end': START_EPOCH + 20 * DAY, 'last_updated_at': START_EPOCH + 17 * DAY + 10}]
+        state = {'bookmarks': {'contacts': {'updated_at': '2021-01-18T00:00:10.000000Z', 'backfill_windows': windows}}}
+        self.sync_contacts(state, {'contacts_backfill_windows': 3}, [], mocked_write_record)
+
+        written_ids = [args[1]['id'] for args, _ in mocked_write_record.call_args_list]
+        self.assertEqual(written_ids, ['17', '18', '19'])
+
+    def test_without_windows(self, mocked_post, mocked_write_record, mocked_transform):
+        """
+            Verify the contacts are fetched with a single cursor by default
+        """
+        state = self.sync_contacts({}, {}, [], mocked_write_record)
+
+        self.assertEqual(mocked_post.call_count, 15)
+        self.assertEqual(mocked_post.call_args_list[0][1]['json']['query']['operator'], 'OR')
+        self.assertEqual(state, {'bookmarks': {'contacts': {'updated_at': '2021-01-30T00:00:10.000000Z'}}})
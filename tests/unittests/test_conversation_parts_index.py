@@ -0,0 +1,200 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import singer
+from parameterized import parameterized
+
+from tap_intercom.client import IntercomClient
+from tap_intercom.parts_index import ConversationPartsIndex
+from tap_intercom.streams import UNCHANGED_RESPONSE, ConversationParts, Conversations
+from test_conversation_part_bookmarks import Catalog
+
+
+def get_conversation(conversation_id, total_parts=2):
+    """`conversations/{id}` response"""
+    return {
+        'id': conversation_id,
+        'created_at': 1640636000000,
+        'updated_at': 1640636000000 + int(conversation_id) * 1000,
+        'statistics': {'count_conversation_parts': total_parts},
+        'conversation_parts': {
+            'conversation_parts': [{'id': 'part_{}_{}'.format(conversation_id, i), 'updated_at': 1640636000 + i}
+                                   for i in range(total_parts)],
+            'total_parts': total_parts
+        }
+    }
+
+
+def get_search_record(conversation_id, total_parts=2):
+    """Conversation of the search results, with the number of its parts only"""
+    record = get_conversation(conversation_id, total_parts)
+    record['conversation_parts'] = {'total_parts': total_parts}
+    return record
+
+
+class TemporaryIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'conversation_parts.db')
+
+
+class TestConversationPartsIndex(TemporaryIndexTestCase):
+    """
+        Test cases to verify the index of the synced conversation parts
+    """
+
+    def test_persisted(self):
+        """
+            Verify that the conversations are in the index of the next sync once it is committed
+        """
+        parts_index = ConversationPartsIndex(self.path)
+        parts_index.put(1, 3, 'part_3', 1640636000000)
+        self.assertEqual(parts_index.get('1'), (3, 'part_3', 1640636000000))
+        parts_index.commit()
+        parts_index.close()
+
+        parts_index = ConversationPartsIndex(self.path)
+
+        self.assertEqual(parts_index.get('1'), (3, 'part_3', 1640636000000))
+        self.assertIsNone(parts_index.get('2'))
+
+    def test_not_closed(self):
+        """
+            Verify that the conversations of an interrupted sync are not in the index of the next sync
+        """
+        parts_index = ConversationPartsIndex(self.path)
+        parts_index.put('1', 3, 'part_3', 1640636000000)
+        parts_index.close()
+
+        self.assertIsNone(ConversationPartsIndex(self.path).get('1'))
+
+    def test_clear(self):
+        parts_index = ConversationPartsIndex(self.path)
+        parts_index.put('1', 3, 'part_3', 1640636000000)
+
+        parts_index.clear()
+
+        self.assertIsNone(parts_index.get('1'))
+
+
+class TestIsUnchanged(TemporaryIndexTestCase):
+
+    @parameterized.expand([
+        ['same_count', get_search_record('1', 2), True],
+        ['new_parts', get_search_record('1', 3), False],
+        ['not_indexed', get_search_record('2', 2), False],
+        ['unknown_count', {'id': '1', 'statistics': None}, False],
+        # The statistics may not count the same parts as `total_parts`
+        ['statistics_count', {'id': '1', 'statistics': {'count_conversation_parts': 2}}, False],
+        ['embedded_same_last_part', get_conversation('1', 2), True],
+        ['embedded_other_last_part', dict(get_conversation('1', 2), conversation_parts={
+            'conversation_parts': [{'id': 'part_1_0'}, {'id': 'part_1_9'}], 'total_parts': 2}), False],
+        ['embedded_last_part_in_seconds', dict(get_conversation('1', 2), conversation_parts={
+            'conversation_parts': [{'id': 'part_1_0'}, {'id': 'part_1_1', 'updated_at': 1640636001}], 'total_parts': 2}), True],
+        # The last part is edited, e.g. redacted, the number of parts is the same
+        ['embedded_edited_last_part', dict(get_conversation('1', 2), conversation_parts={
+            'conversation_parts': [{'id': 'part_1_0'}, {'id': 'part_1_1', 'updated_at': 1640636500}], 'total_parts': 2}), False],
+    ])
+    def test_is_unchanged(self, name, record, expected):
+        stream = ConversationParts(None, None, ['conversation_parts'], {'conversation_parts_index': self.path})
+        stream.parts_index = ConversationPartsIndex(self.path)
+        stream.parts_index.put('1', 2, 'part_1_1', 1640636001000)
+
+        self.assertEqual(stream.is_unchanged(record), expected)
+        self.assertEqual(stream.get_parent_response(record) is UNCHANGED_RESPONSE, expected)
+
+
+@mock.patch("singer.write_schema")
+@mock.patch("tap_intercom.streams.singer.write_bookmark", side_effect=singer.write_bookmark)
+@mock.patch("tap_intercom.streams.singer.write_record")
+@mock.patch("tap_intercom.client.IntercomClient.get", side_effect=lambda path, params=None: get_conversation(path.split('/')[-1]))
+class TestSyncWithIndex(TemporaryIndexTestCase):
+    """
+        Test cases to verify that the conversations whose parts did not change are not fetched
+    """
+
+    def sync_conversations(self, state, parent_records, streams=('conversation_parts',)):
+        client = IntercomClient('dummy_token', None)
+        streams = list(streams)
+        config = {'start_date': '2021-12-25T00:00:00Z', 'conversation_parts_index': self.path}
+        conversations = Conversations(client=client, catalog=Catalog(streams), selected_streams=streams, config=config)
+        with mock.patch("tap_intercom.streams.Conversations.get_records", return_value=parent_records):
+            return conversations.sync(state, {}, {}, config, None)
+
+    def test_unchanged_skipped(self, mocked_client_get, mocked_write_record, mocked_write_bookmark, mocked_write_schema):
+        """
+            Verify that only the conversations with new parts are fetched again and the bookmark is updated
+        """
+        state = self.sync_conversations({}, [get_search_record(str(i)) for i in range(1, 4)])
+        self.assertEqual(mocked_client_get.call_count, 3)
+        mocked_client_get.reset_mock()
+        mocked_write_record.reset_mock()
+
+        state['bookmarks']['conversation_parts']['updated_at'] = '2021-12-25T00:00:00.000000Z'
+        records = [get_search_record('1'), get_search_record('2', 3), get_search_record('3')]
+        state = self.sync_conversations(state, records)
+
+        self.assertEqual([args[0] for args, _ in mocked_client_get.call_args_list], ['conversations/2'])
+        self.assertEqual(mocked_write_record.call_count, 2)
+        self.assertEqual(state['bookmarks']['conversation_parts']['updated_at'], '2021-12-27T20:13:23.000000Z')
+
+    def test_conversation_without_parts(self, mocked_client_get, mocked_write_record, mocked_write_bookmark, mocked_write_schema):
+        """
+            Verify that the conversations without parts are indexed and not fetched again
+        """
+        mocked_client_get.side_effect = lambda path, params=None: get_conversation(path.split('/')[-1], 0)
+        state = self.sync_conversations({}, [get_search_record('1', 0)])
+        self.assertEqual(ConversationPartsIndex(self.path).get('1'), (0, None, None))
+
+        state['bookmarks']['conversation_parts']['updated_at'] = '2021-12-25T00:00:00.000000Z'
+        self.sync_conversations(state, [get_search_record('1', 0)])
+
+        self.assertEqual(mocked_client_get.call_count, 1)
+        mocked_write_record.assert_not_called()
+
+    def test_cleared_without_bookmark(self, mocked_client_get, mocked_write_record, mocked_write_bookmark, mocked_write_schema):
+        """
+            Verify that all the conversations are fetched when there is no bookmark, e.g. the state is reset
+        """
+        records = [get_search_record(str(i)) for i in range(1, 4)]
+        self.sync_conversations({}, records)
+        self.sync_conversations({}, records)
+
+        self.assertEqual(mocked_client_get.call_count, 6)
+
+    def test_index_not_saved_on_error(self, mocked_client_get, mocked_write_record, mocked_write_bookmark, mocked_write_schema):
+        """
+            Verify that the conversations synced before an error are fetched again by the next sync
+        """
+        mocked_client_get.side_effect = [get_conversation('1'), Exception('sync error')]
+        with self.assertRaises(Exception):
+            self.sync_conversations({}, [get_search_record('1'), get_search_record('2')])
+
+        parts_index = ConversationPartsIndex(self.path)
+        self.assertIsNone(parts_index.get('1'))
+        # The index of the failed sync is closed, it does not lock the database
+        parts_index.put('2', 1, 'part_2_0', 1640636000000)
+        parts_index.commit()
+        parts_index.close()
+
+    @mock.patch("tap_intercom.streams.output.write_state")
+    @mock.patch("tap_intercom.streams.MAX_PAGE_SIZE", 1)
+    def test_index_saved_with_bookmark(self, mocked_write_state, mocked_client_get, mocked_write_record, mocked_write_bookmark,
+                                       mocked_write_schema):
+        """
+            Verify that the conversations covered by the intermediate bookmark before an error are saved in the index
+        """
+        mocked_client_get.side_effect = [get_conversation('1'), Exception('sync error')]
+        with self.assertRaises(Exception):
+            self.sync_conversations({}, [get_search_record('1'), get_search_record('2')], ['conversations', 'conversation_parts'])
+
+        self.assertEqual(mocked_write_state.call_args[0][0]['bookmarks']['conversations']['last_processed'], '1')
+        parts_index = ConversationPartsIndex(self.path)
+        self.assertEqual(parts_index.get('1'), (2, 'part_1_1', 1640636001))
+        self.assertIsNone(parts_index.get('2'))
+        parts_index.close()
@@ -0,0 +1,86 @@
+import unittest
+from unittest import mock
+
+import singer
+from tap_intercom.client import IntercomClient
+from tap_intercom.streams import Conversations
+from concurrency_helpers import OutOfOrderCalls
+from test_conversation_part_bookmarks import Catalog
+
+# Mocked parent records
+PARENT_RECORDS = [{"id": str(i), "updated_at": 1640636000000 + i * 1000} for i in range(1, 11)]
+
+
+def get_conversation(path, params=None):
+    """Mocked `conversations/{id}` response"""
+    conversation_id = path.split('/')[-1]
+    return {
+        'id': conversation_id,
+        'conversation_parts': {
+            'conversation_parts': [{'id': 'part_{}'.format(conversation_id)}]
+        }
+    }
+
+
+@mock.patch("singer.write_schema")
+@mock.patch("tap_intercom.streams.singer.write_bookmark", side_effect=singer.write_bookmark)
+@mock.patch("tap_intercom.streams.singer.write_record")
+@mock.patch("tap_intercom.streams.Conversations.get_records", return_value=PARENT_RECORDS)
+@mock.patch("tap_intercom.client.IntercomClient.get", side_effect=get_conversation)
+class TestConversationPartsPrefetch(unittest.TestCase):
+    """
+        Test cases to verify the conversation_parts prefetching with a pool of workers
+    """
+
+    def sync_conversations(self, config):
+        client = IntercomClient('dummy_token', None)
+        streams = ['conversation_parts']
+        conversations = Conversations(client=client, catalog=Catalog(streams), selected_streams=streams, config=config)
+        config['start_date'] = '2021-12-25T00:00:00Z'
+        return conversations.sync({}, {}, {}, config, None)
+
+    def test_prefetch_records_order(self, mocked_client_get, mocked_parent_records, mocked_write_record, mocked_write_bookmark, mocked_write_schema):
+        """
+            Verify that the child records and bookmarks are written in the parent order with the pool of workers
+        """
+        calls = OutOfOrderCalls(get_conversation, expected_calls=10, workers=4)
+        mocked_client_get.side_effect = calls
+        state = self.sync_conversations({'conversation_parts_workers': 4})
+
+        self.assertEqual(mocked_client_get.call_count, 10)
+        self.assertEqual(calls.max_in_flight, 4)
+        # The conversations are fetched out of order
+        self.assertNotEqual([response['id'] for response in calls.returned], [record['id'] for record in PARENT_RECORDS])
+        written_parts = [args[1]['id'] for args, _ in mocked_write_record.call_args_list]
+        self.assertEqual(written_parts, ['part_{}'.format(i) for i in range(1, 11)])
+
+        child_bookmarks = [args[3] for args, _ in mocked_write_bookmark.call_args_list if args[1] == 'conversation_parts']
+        self.assertEqual(child_bookmarks, sorted(child_bookmarks))
+        self.assertEqual(state['bookmarks']['conversation_parts']['updated_at'], '2021-12-27T20:13:30.000000Z')
+
+    def test_without_workers(self, mocked_client_get, mocked_parent_records, mocked_write_record, mocked_write_bookmark, mocked_write_schema):
+        """
+            Verify that the output is same when the conversations are fetched one at a time
+        """
+        self.sync_conversations({})
+
+        written_parts = [args[1]['id'] for args, _ in mocked_write_record.call_args_list]
+        self.assertEqual(written_parts, ['part_{}'.format(i) for i in range(1, 11)])
+
+    @mock.patch("tap_intercom.streams.BaseStream.sync_substream", side_effect=lambda *args, **kwargs: args[4])
+    def test_prefetched_before_intermediate_bookmark(self, mocked_sync_substream, mocked_client_get, mocked_parent_records, mocked_write_record, mocked_write_bookmark, mocked_write_schema):
+        """
+            Verify that all pending child records are written before the conversations intermediate bookmark
+        """
+        with mock.patch("tap_intercom.streams.MAX_PAGE_SIZE", 5), \
+                mock.patch("tap_intercom.streams.Conversations.write_intermediate_bookmark") as mocked_intermediate_bookmark:
+            written_children = []
+            mocked_intermediate_bookmark.side_effect = lambda *args: written_children.append(mocked_sync_substream.call_count)
+            client = IntercomClient('dummy_token', None)
+            streams = ['conversations', 'conversation_parts']
+            conversations = Conversations(client=client, catalog=Catalog(streams), selected_streams=streams,
+                                          config={'conversation_parts_workers': 3})
+            conversations.sync({}, {}, {}, {'start_date': '2021-12-25T00:00:00Z'}, None)
+
+        self.assertEqual(written_children, [5, 10])
+        self.assertEqual(mocked_sync_substream.call_count, 10)
@@ -0,0 +1,169 @@
+import copy
+import unittest
+from unittest import mock
+
+import singer
+from tap_intercom.client import IntercomClient
+from tap_intercom.concurrency import PARTITION_DONE, merge_concurrently
+from tap_intercom.streams import Conversations, split_time_windows
+from test_conversation_part_bookmarks import Catalog
+
+DAY = 24 * 60 * 60
+START_DATE = '2021-01-01T00:00:00Z'
+START_EPOCH = 1609459200
+SYNC_STARTED_AT = '2021-01-31T00:00:00.000000Z'
+# Conversations updated once a day, with ids in the reverse order of the updates
+CONVERSATIONS = [{'id': str(1000 - day), 'updated_at': START_EPOCH + day * DAY + 10} for day in range(30)]
+
+
+def search_conversations(path, params, json):
+    """Mocked conversations search, filtering CONVERSATIONS by the window of the query, 2 records per page"""
+    conditions = json['query']['value']
+    last_processed = conditions[0]['value'][0]['value']
+    start = conditions[1]['value'][0]['value']
+    end = conditions[2]['value'] if len(conditions) > 2 else float('inf')
+    records = sorted([record for record in CONVERSATIONS
+                      if start <= record['updated_at'] < end and record['id'] >= last_processed],
+                     key=lambda record: record['id'])
+    offset = int(json['pagination'].get('starting_after') or 0)
+    response = {'conversations': [dict(record, updated_at=record['updated_at'] * 1000) for record in records[offset:offset + 2]], 'pages': {}}
+    if offset + 2 < len(records):
+        response['pages']['next'] = {'starting_after': str(offset + 2)}
+    return response
+
+
+def get_conversation(path, **kwargs):
+    """Mocked conversation of the conversation_parts stream, with one part"""
+    conversation_id = path.split('/')[-1]
+    updated_at = next(record['updated_at'] for record in CONVERSATIONS if record['id'] == conversation_id)
+    return {'id': conversation_id, 'created_at': START_EPOCH, 'updated_at': updated_at,
+            'conversation_parts': {'total_parts': 1, 'conversation_parts': [{'id': 'part_' + conversation_id}]}}
+
+
+def merge_in_turn(iterables, max_workers):
+    """Same as `merge_concurrently`, with the records of the windows interleaved one by one"""
+    iterators = list(enumerate(iterables))
+    while iterators:
+        for index, iterator in list(iterators):
+            item = next(iterator, PARTITION_DONE)
+            if item is PARTITION_DONE:
+                iterators.remove((index, iterator))
+            yield index, item
+
+
+class TestHelpers(unittest.TestCase):
+
+    def test_split_time_windows(self):
+        """Verify the windows are disjoint and cover the whole range"""
+        windows = split_time_windows(100, 1000, 3)
+        self.assertEqual(windows, [(100, 400), (400, 700), (700, 1000)])
+
+    def test_merge_concurrently(self):
+        """Verify the items of each iterable are yielded in order followed by the done marker"""
+        items = list(merge_concurrently([iter(range(100)), iter(range(50))], 2, buffer_size=5))
+        for index, count in [(0, 100), (1, 50)]:
+            self.assertEqual([item for i, item in items if i == index], list(range(count)) + [PARTITION_DONE])
+
+    def test_merge_concurrently_error(self):
+        """Verify the exception of an iterable is raised by the consumer"""
+        def failing():
+            yield 1
+            raise ValueError('failed')
+
+        with self.assertRaises(ValueError):
+            list(merge_concurrently([failing(), iter(range(1000))], 2, buffer_size=5))
+
+
+@mock.patch("singer.write_schema")
+@mock.patch("tap_intercom.streams.output.write_state")
+@mock.patch("tap_intercom.streams.transform", side_effect=lambda record, *args, **kwargs: record)
+@mock.patch("tap_intercom.streams.output.write_record")
+@mock.patch("tap_intercom.client.IntercomClient.post", side_effect=search_conversations)
+@mock.patch("tap_intercom.streams.MAX_PAGE_SIZE", 4)
+class TestConversationsBackfill(unittest.TestCase):
+    """
+        Test cases to verify the time-sliced parallel backfill of conversations
+    """
+
+    def sync_conversations(self, state, config, streams=('conversations',)):
+        client = IntercomClient('dummy_token', None)
+        conversations = Conversations(client, Catalog(list(streams)), list(streams), config)
+        config['start_date'] = START_DATE
+        with mock.patch('singer.utils.now', return_value=singer.utils.strptime_to_utc(SYNC_STARTED_AT)):
+            return conversations.sync(state, {}, {}, config, None)
+
+    def test_backfill_windows(self, mocked_post, mocked_write_record, mocked_transform, mocked_write_state, mocked_write_schema):
+        """
+            Verify each window is queried with its own cursor, all the records are written and the windows are
+            checkpointed in the intermediate bookmarks
+        """
+        intermediate_windows = []
+        mocked_write_state.side_effect = lambda state: intermediate_windows.append(
+            copy.deepcopy(state['bookmarks']['conversations']['backfill_windows']))
+        state = self.sync_conversations({}, {'conversations_backfill_windows': 3})
+
+        written_ids = sorted(args[1]['id'] for args, _ in mocked_write_record.call_args_list)
+        self.assertEqual(written_ids, sorted(record['id'] for record in CONVERSATIONS))
+
+        # 3 windows of 10 days each with 5 pages
+        queried_windows = {tuple(condition['value'] for condition in kwargs['json']['query']['value'][2:])
+                           for _, kwargs in mocked_post.call_args_list}
+        self.assertEqual(queried_windows, {(START_EPOCH + 10 * DAY,), (START_EPOCH + 20 * DAY,), ()})
+        self.assertEqual(mocked_post.call_count, 15)
+
+        self.assertTrue(any(window.get('last_processed') for windows in intermediate_windows for window in windows))
+        self.assertEqual(state, {'bookmarks': {'conversations': {'updated_at': SYNC_STARTED_AT}}})
+
+    def test_resume_backfill_windows(self, mocked_post, mocked_write_record, mocked_transform, mocked_write_state, mocked_write_schema):
+        """
+            Verify only the unfinished windows of the interrupted sync are resumed from their last processed id
+        """
+        windows = [{'start': START_EPOCH + 20 * DAY, 'end': None, 'last_processed': '975'}]
+        state = {'bookmarks': {'conversations': {'updated_at': START_DATE, 'backfill_windows': windows,
+                                                 'last_sync_started_at': SYNC_STARTED_AT}}}
+        self.sync_conversations(state, {'conversations_backfill_windows': 3})
+
+        written_ids = sorted(args[1]['id'] for args, _ in mocked_write_record.call_args_list)
+        self.assertEqual(written_ids, ['975', '976', '977', '978', '979', '980'])
+        # The window of the state is not updated before it is written
+        self.assertEqual(windows[0]['last_processed'], '975')
+
+    def test_short_range(self, mocked_post, mocked_write_record, mocked_transform, mocked_write_state, mocked_write_schema):
+        """
+            Verify a range shorter than a day is not split
+        """
+        state = {'bookmarks': {'conversations': {'updated_at': '2021-01-30T12:00:00.000000Z'}}}
+        self.sync_conversations(state, {'conversations_backfill_windows': 3})
+        self.assertEqual(len(mocked_post.call_args_list[0][1]['json']['query']['value']), 2)
+
+    @mock.patch("tap_intercom.streams.merge_concurrently", side_effect=merge_in_turn)
+    @mock.patch("tap_intercom.client.IntercomClient.get")
+    def test_resume_interleaved_windows_parts(self, mocked_get, mocked_merge, mocked_post, mocked_write_record, mocked_transform,
+                                              mocked_write_state, mocked_write_schema):
+        """
+            Verify the conversation_parts of the conversations of all the windows are synced when an interleaved
+            sync is interrupted and resumed, i.e. the child bookmark is not ahead of the unfinished windows
+        """
+        states = []
+        mocked_write_state.side_effect = lambda state: states.append(copy.deepcopy(state))
+
+        def get_conversation_until_interrupted(path, **kwargs):
+            if path == 'conversations/995':
+                raise RuntimeError('interrupted')
+            return get_conversation(path, **kwargs)
+
+        mocked_get.side_effect = get_conversation_until_interrupted
+        streams = ['conversations', 'conversation_parts']
+        with self.assertRaises(RuntimeError):
+            self.sync_conversations({}, {'conversations_backfill_windows': 3}, streams)
+
+        # The last window is ahead of the first one
+        self.assertEqual([window['last_processed'] for window in states[-1]['bookmarks']['conversations']['backfill_windows']],
+                         ['993', '984', '974'])
+        mocked_get.side_effect = get_conversation
+        state = self.sync_conversations(states[-1], {'conversations_backfill_windows': 3}, streams)
+
+        synced_parts = {args[1]['conversation_id'] for args, _ in mocked_write_record.call_args_list if args[0] == 'conversation_parts'}
+        self.assertEqual(synced_parts, {record['id'] for record in CONVERSATIONS})
+        # Once all the windows are synced, the child bookmark is the last update of the conversations of the resumed sync, 975
+        self.assertEqual(state['bookmarks']['conversation_parts']['updated_at'], '2021-01-26T00:00:10.000000Z')
@@ -0,0 +1,81 @@
+import json
+import os
+import unittest
+from copy import deepcopy
+
+from parameterized import parameterized
+from tap_intercom.transform import (apply_datetime_plan, compile_datetime_plan, find_datetimes_in_schema,
+                                    transform_times)
+from test_transform_times import CONVERSATION_SCHEMA_DATETIMES, RAW_CONVERSATION
+
+SCHEMAS_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'tap_intercom', 'schemas')
+
+DATETIME_VALUES = [None, 0, 1, -5, 999999999, 1000000000, 1659346509, 9999999999, 10000000000,
+                   1659346509000, 1659346509.5, 0.5, '2022-08-01T09:35:09Z', '2022-08-01T09:35:09.123+05:30']
+
+
+class TestDatetimePlan(unittest.TestCase):
+    """
+        Test cases to verify the compiled datetime plan transforms the records like `transform_times`
+    """
+
+    def assert_same_transform(self, record, schema_datetimes):
+        expected_record = deepcopy(record)
+        transform_times(expected_record, schema_datetimes)
+
+        apply_datetime_plan(record, compile_datetime_plan(schema_datetimes))
+        self.assertEqual(record, expected_record)
+
+    def test_conversation(self):
+        """
+            Verify the transform of the conversation of `test_transform_times`
+        """
+        self.assert_same_transform(deepcopy(RAW_CONVERSATION), CONVERSATION_SCHEMA_DATETIMES)
+
+    def test_field_values(self):
+        """
+            Verify the transform of the different types of values of the top level and nested fields
+        """
+        for value in DATETIME_VALUES:
+            with self.subTest(value=value):
+                record = {'created_at': value, 'statistics': {'first_close_at': value}}
+                self.assert_same_transform(record, [['created_at'], ['statistics', 'first_close_at']])
+
+    @parameterized.expand([
+        ['missing_field', {'id': 1}],
+        ['missing_parent', {'statistics': None}],
+        ['empty_parent', {'statistics': {}}],
+        ['empty_list', {'tags': []}],
+        ['missing_list_values', {'tags': [{'id': 1, 'applied_at': 1659346509}, {'id': 2}, {'id': 3, 'applied_at': -1}]}],
+    ])
+    def test_missing_values(self, name, record):
+        """
+            Verify that the missing values are left as they are
+        """
+        self.assert_same_transform(record, [['created_at'], ['statistics', 'first_close_at'], ['tags', ['applied_at']]])
+
+    @parameterized.expand([
+        ['conversations'],
+        ['contacts'],
+        ['companies'],
+        ['admins'],
+    ])
+    def test_stream_schema(self, stream):
+        """
+            Verify the transform of a record with all the date-time fields of the stream schema
+        """
+        with open(os.path.join(SCHEMAS_PATH, '{}.json'.format(stream))) as schema_file:
+            schema = json.load(schema_file)
+        schema_datetimes = find_datetimes_in_schema(schema)
+
+        record = {}
+        for index, datetime_path in enumerate(schema_datetimes):
+            value = DATETIME_VALUES[index % len(DATETIME_VALUES)]
+            parent = node = record
+            for key in datetime_path[:-1]:
+                parent, node = node, node.setdefault(key, {})
+            if isinstance(datetime_path[-1], list):
+                parent[datetime_path[-2]] = [{datetime_path[-1][0]: value}, {}]
+            else:
+                node[datetime_path[-1]] = value
+        self.assert_same_transform(record, schema_datetimes)
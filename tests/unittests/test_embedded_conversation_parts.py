@@ -0,0 +1,137 @@
+import unittest
+from unittest import mock
+
+import singer
+from parameterized import parameterized
+
+from tap_intercom.client import IntercomClient
+from tap_intercom.streams import ConversationParts, Conversations
+from test_conversation_part_bookmarks import Catalog
+
+
+def get_conversation(conversation_id, part_count=2):
+    """`conversations/{id}` response with `part_count` parts"""
+    return {
+        'id': conversation_id,
+        'created_at': 1640636000000,
+        'updated_at': 1640636000000 + int(conversation_id) * 1000,
+        'conversation_parts': {
+            'type': 'conversation_part.list',
+            'conversation_parts': [{'id': 'part_{}_{}'.format(conversation_id, i)} for i in range(part_count)],
+            'total_parts': part_count
+        }
+    }
+
+
+def get_search_record(conversation_id, embedded_parts):
+    """Conversation of the search results with its first `embedded_parts` parts, None for no parts"""
+    record = get_conversation(conversation_id)
+    if embedded_parts is None:
+        del record['conversation_parts']
+    else:
+        record['conversation_parts']['conversation_parts'] = record['conversation_parts']['conversation_parts'][:embedded_parts]
+    return record
+
+
+# Conversations 1, 4, 7 and 10 have all their parts, 2, 5 and 8 some of them and 3, 6 and 9 none
+def get_parent_records(*args, **kwargs):
+    return [get_search_record(str(i), [2, 1, None][(i - 1) % 3]) for i in range(1, 11)]
+
+
+@mock.patch("singer.write_schema")
+@mock.patch("tap_intercom.streams.singer.write_bookmark", side_effect=singer.write_bookmark)
+@mock.patch("tap_intercom.streams.singer.write_record")
+@mock.patch("tap_intercom.streams.Conversations.get_records", side_effect=get_parent_records)
+@mock.patch("tap_intercom.client.IntercomClient.get", side_effect=lambda path, params=None: get_conversation(path.split('/')[-1]))
+class TestEmbeddedConversationParts(unittest.TestCase):
+    """
+        Test cases to verify that the conversation parts of the search results are used when they are complete
+    """
+
+    def sync_conversations(self, config):
+        client = IntercomClient('dummy_token', None)
+        streams = ['conversation_parts']
+        conversations = Conversations(client=client, catalog=Catalog(streams), selected_streams=streams, config=config)
+        config['start_date'] = '2021-12-25T00:00:00Z'
+        return conversations.sync({}, {}, {}, config, None)
+
+    def assert_embedded_parts(self, config, mocked_client_get, mocked_write_record):
+        self.sync_conversations(dict(config))
+        expected_records = [args[1] for args, _ in mocked_write_record.call_args_list]
+        mocked_write_record.reset_mock()
+        mocked_client_get.reset_mock()
+
+        self.sync_conversations(dict(config, embedded_conversation_parts='true'))
+
+        self.assertEqual(len(expected_records), 20)
+        self.assertEqual([args[1] for args, _ in mocked_write_record.call_args_list], expected_records)
+        self.assertEqual(sorted(args[0] for args, _ in mocked_client_get.call_args_list),
+                         sorted('conversations/{}'.format(i) for i in [2, 3, 5, 6, 8, 9]))
+
+    def test_embedded_parts(self, mocked_client_get, mocked_parent_records, mocked_write_record, mocked_write_bookmark, mocked_write_schema):
+        """
+            Verify that only the conversations without all their parts are fetched and the records are the same
+        """
+        self.assert_embedded_parts({}, mocked_client_get, mocked_write_record)
+
+    def test_embedded_parts_with_workers(self, mocked_client_get, mocked_parent_records, mocked_write_record, mocked_write_bookmark, mocked_write_schema):
+        """
+            Verify that the embedded parts are written in the parent order with the pool of workers
+        """
+        self.assert_embedded_parts({'conversation_parts_workers': 3}, mocked_client_get, mocked_write_record)
+
+
+class TestGetEmbeddedResponse(unittest.TestCase):
+
+    @parameterized.expand([
+        ['complete', get_search_record('1', 2), get_conversation('1')],
+        ['truncated', get_search_record('1', 1), None],
+        ['no_parts', get_search_record('1', None), None],
+        ['no_total_parts', {'id': '1', 'conversation_parts': {'conversation_parts': []}}, None],
+        ['null_parts', {'id': '1', 'conversation_parts': None}, None],
+    ])
+    def test_get_embedded_response(self, name, record, expected_response):
+        stream = ConversationParts(None, None, ['conversation_parts'], {})
+
+        response = stream.get_embedded_response(record)
+
+        self.assertEqual(response, expected_response)
+
+
+def get_conversation_with_body(conversation_id, params):
+    """Conversation with a part whose body is HTML unless `display_as` is plaintext, as in the API"""
+    plaintext = (params or {}).get('display_as') == 'plaintext'
+    conversation = get_conversation(conversation_id, 1)
+    conversation['conversation_parts']['conversation_parts'][0]['body'] = 'Hello' if plaintext else '<p>Hello</p>'
+    return conversation
+
+
+@mock.patch("singer.write_schema")
+@mock.patch("tap_intercom.streams.singer.write_record")
+@mock.patch("tap_intercom.client.IntercomClient.get",
+            side_effect=lambda path, params=None: get_conversation_with_body(path.split('/')[-1], params))
+@mock.patch("tap_intercom.client.IntercomClient.post",
+            side_effect=lambda path, params, json: {'conversations': [get_conversation_with_body('1', params)], 'pages': {}})
+class TestEmbeddedPartsBody(unittest.TestCase):
+    """
+        Test cases to verify that the embedded parts have the same body format as the fetched parts
+    """
+
+    def sync_part_bodies(self, config, mocked_write_record):
+        mocked_write_record.reset_mock()
+        streams = ['conversation_parts']
+        config = dict(config, start_date='2021-12-25T00:00:00Z')
+        Conversations(IntercomClient('dummy_token', None), Catalog(streams), streams, config).sync({}, {}, {}, config, None)
+        return [args[1]['body'] for args, _ in mocked_write_record.call_args_list]
+
+    def test_same_body(self, mocked_post, mocked_get, mocked_write_record, mocked_write_schema):
+        """
+            Verify that the search is requested as plaintext with `embedded_conversation_parts`
+        """
+        fetched_bodies = self.sync_part_bodies({}, mocked_write_record)
+        embedded_bodies = self.sync_part_bodies({'embedded_conversation_parts': 'true'}, mocked_write_record)
+
+        self.assertEqual(fetched_bodies, ['Hello'])
+        self.assertEqual(embedded_bodies, fetched_bodies)
+        self.assertEqual(mocked_post.call_args[1]['params'], {'display_as': 'plaintext'})
+        self.assertEqual(mocked_get.call_count, 1)
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+
+import singer
+from parameterized import parameterized
+from tap_intercom.client import IntercomClient
+from tap_intercom.streams import (BaseStream, Conversations, datetime_to_epoch_microseconds,
+                                  epoch_microseconds_to_datetime, epoch_milliseconds_to_microseconds)
+from tap_intercom.transform import iso_to_epoch_milliseconds
+from test_conversation_part_bookmarks import Catalog
+
+
+class TestEpochReplicationKey(unittest.TestCase):
+    """
+        Test cases to verify the replication keys are compared as epoch integers
+    """
+
+    @parameterized.expand([
+        ['epoch_millis', 1609804800000],
+        ['epoch_millis_with_millis', 1609804800123],
+        ['float_epoch_millis', 1609804800123.0],
+        ['float_epoch_millis_with_micros', 1609804800123.456],
+        ['before_epoch', -86400000],
+    ])
+    def test_same_as_datetime_string(self, name, timestamp):
+        """
+            Verify that the epoch microseconds are the same as the datetime parsed from the record's datetime string
+        """
+        expected_datetime = singer.utils.strptime_to_utc(BaseStream.epoch_milliseconds_to_dt_str(timestamp))
+
+        timestamp = epoch_milliseconds_to_microseconds(timestamp)
+
+        self.assertEqual(timestamp, datetime_to_epoch_microseconds(expected_datetime))
+        self.assertEqual(epoch_microseconds_to_datetime(timestamp), expected_datetime)
+
+    @parameterized.expand([
+        ['before_bookmark', 1609804799999, 0, '2021-01-05T00:00:00.000000Z'],
+        ['equal_to_bookmark', 1609804800000, 1, '2021-01-05T00:00:00.000000Z'],
+        ['after_bookmark', 1609804800001, 1, '2021-01-05T00:00:00.001000Z'],
+    ])
+    @mock.patch('singer.write_schema')
+    @mock.patch('singer.write_state')
+    @mock.patch('tap_intercom.streams.singer.write_record')
+    @mock.patch('tap_intercom.streams.Conversations.get_records')
+    def test_records_compared_to_bookmark(self, name, updated_at, expected_records, expected_bookmark,
+                                          mocked_get_records, mocked_write_record, mocked_write_state, mocked_write_schema):
+        """
+            Verify the records are written from the bookmark and the bookmark is the max replication key
+        """
+        mocked_get_records.return_value = [{'id': '1', 'updated_at': updated_at}]
+        client = IntercomClient('test_access_token', 300)
+        conversations = Conversations(client=client, catalog=Catalog(['conversations']), selected_streams=['conversations'])
+        state = {'bookmarks': {'conversations': {'updated_at': '2021-01-05T00:00:00.000000Z'}}}
+
+        state = conversations.sync(state=state, stream_schema={}, stream_metadata={},
+                                   config={'start_date': '2021-01-01T00:00:00Z'}, transformer=None)
+
+        self.assertEqual(mocked_write_record.call_count, expected_records)
+        self.assertEqual(state['bookmarks']['conversations']['updated_at'], expected_bookmark)
+
+    def test_iso_datetime_parse_cache(self):
+        """
+            Verify the date-time strings are parsed once
+        """
+        iso_to_epoch_milliseconds.cache_clear()
+        for _ in range(3):
+            self.assertEqual(iso_to_epoch_milliseconds('2021-01-05T00:00:00.123Z'), 1609804800123)
+
+        self.assertEqual(iso_to_epoch_milliseconds.cache_info().misses, 1)
+        self.assertEqual(iso_to_epoch_milliseconds.cache_info().hits, 2)
@@ -0,0 +1,145 @@
+import decimal
+import io
+import json
+import unittest
+from unittest import mock
+
+import simplejson
+from parameterized import parameterized
+
+from tap_intercom import output
+from tap_intercom.client import IntercomBadResponseError, IntercomClient
+from tap_intercom.serialization import OrjsonBackend, StdlibJSONBackend, get_json_backend
+from tap_intercom.sync import sync
+from test_conversation_part_bookmarks import Catalog
+
+RECORD = {'id': '1', 'body': 'é "quoted" ☺', 'count': 2, 'ratio': 0.5, 'tags': [{'id': 't1'}], 'author': None}
+
+
+class TestGetJSONBackend(unittest.TestCase):
+    """
+        Test cases to verify the selection of the JSON backend by the `json_backend` config param
+    """
+
+    @parameterized.expand([[None], [''], ['simplejson']])
+    def test_default_backend(self, name):
+        """
+            Verify that the responses and messages are left to requests and singer-python by default
+        """
+        self.assertIsNone(get_json_backend(name))
+
+    @parameterized.expand([['json', StdlibJSONBackend], ['orjson', OrjsonBackend]])
+    def test_backend(self, name, expected_backend):
+        self.assertIs(get_json_backend(name), expected_backend)
+
+    @mock.patch('tap_intercom.serialization.orjson', None)
+    def test_orjson_not_installed(self):
+        """
+            Verify that the json module of the standard library is used when orjson is not installed
+        """
+        self.assertIs(get_json_backend('orjson'), StdlibJSONBackend)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_json_backend('ujson')
+
+
+class TestJSONBackends(unittest.TestCase):
+    """
+        Test cases to verify that the backends decode and encode the same values
+    """
+
+    @parameterized.expand([[StdlibJSONBackend], [OrjsonBackend]])
+    def test_decode_response(self, backend):
+        response = mock.Mock(content=json.dumps({'type': 'list', 'data': [RECORD]}).encode('utf-8'))
+
+        self.assertEqual(backend.decode_response(response), {'type': 'list', 'data': [RECORD]})
+
+    @parameterized.expand([[StdlibJSONBackend], [OrjsonBackend]])
+    def test_dumps(self, backend):
+        value = dict(RECORD, amount=decimal.Decimal('1.25'))
+
+        self.assertEqual(json.loads(backend.dumps(value)), dict(RECORD, amount=1.25))
+
+    @parameterized.expand([
+        ['json_big_int', StdlibJSONBackend, {'id': 2 ** 70}],
+        ['json_decimal', StdlibJSONBackend, {'amount': decimal.Decimal('1.123456789012345678901234567')}],
+        ['orjson_big_int', OrjsonBackend, {'id': 2 ** 70}],
+        ['orjson_decimal', OrjsonBackend, {'amount': decimal.Decimal('1.123456789012345678901234567')}],
+    ])
+    def test_dumps_full_precision(self, name, backend, value):
+        """
+            Verify that the big integers and the decimals are encoded as singer-python encodes them
+        """
+        self.assertEqual(backend.dumps(value), simplejson.dumps(value, use_decimal=True))
+
+    @parameterized.expand([[StdlibJSONBackend], [OrjsonBackend]])
+    def test_decode_big_int(self, backend):
+        """
+            Verify that the integers above 64 bits are decoded with full precision, as `requests` decodes them
+        """
+        response = mock.Mock(content=b'{"id": 123456789012345678901234567890, "count": 2}')
+
+        self.assertEqual(backend.decode_response(response), {'id': 123456789012345678901234567890, 'count': 2})
+
+    @parameterized.expand([[StdlibJSONBackend], [OrjsonBackend]])
+    @mock.patch('requests.Session.request')
+    def test_client_decodes_response(self, backend, mocked_request):
+        """
+            Verify that the client decodes the responses with the backend and raises an error for an empty response
+        """
+        mocked_request.return_value.status_code = 200
+        mocked_request.return_value.content = b'{"type": "list", "data": []}'
+        client = IntercomClient('test_access_token', 300, json_backend=backend)
+        client.check_access_token = mock.Mock(return_value=True)
+
+        self.assertEqual(client.get('tags'), {'type': 'list', 'data': []})
+        mocked_request.return_value.json.assert_not_called()
+
+        mocked_request.return_value.content = b''
+        with mock.patch('time.sleep'), self.assertRaises(IntercomBadResponseError):
+            client.get('tags')
+
+
+class TestMessageWriterBackend(unittest.TestCase):
+    """
+        Test cases to verify the messages encoded by the JSON backend of the writer
+    """
+
+    def setUp(self):
+        self.writer = output.MessageWriter()
+
+    def get_messages(self, backend):
+        self.writer.json_backend = backend
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            self.writer.write_record('conversations', RECORD)
+            self.writer.write_state({'bookmarks': {'conversations': {'updated_at': '2021-12-25T00:00:00.000000Z'}}})
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    @parameterized.expand([[StdlibJSONBackend], [OrjsonBackend]])
+    def test_same_messages(self, backend):
+        """
+            Verify that the messages of the backend are the messages of singer-python
+        """
+        self.assertEqual(self.get_messages(backend), self.get_messages(None))
+
+    @mock.patch('tap_intercom.output.singer.write_record')
+    def test_default_writer(self, mocked_write_record):
+        self.writer.write_record('conversations', RECORD)
+
+        mocked_write_record.assert_called_once_with('conversations', RECORD, time_extracted=None)
+
+
+class TestSyncJSONBackend(unittest.TestCase):
+
+    @mock.patch('tap_intercom.sync.IntercomClient')
+    def test_json_backend_config(self, mocked_client):
+        """
+            Verify that the sync passes the backend of the `json_backend` config param to the client and the writer
+        """
+        with mock.patch.object(output.WRITER, 'json_backend', None):
+            sync({'access_token': 'token', 'json_backend': 'json'}, {}, Catalog([]))
+
+            self.assertIs(mocked_client.call_args[0][5], StdlibJSONBackend)
+            self.assertIs(output.WRITER.json_backend, StdlibJSONBackend)
+        self.assertIsNone(output.WRITER.json_backend)
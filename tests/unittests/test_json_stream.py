@@ -0,0 +1,210 @@
+import json
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+
+from tap_intercom.client import IntercomClient, IntercomError, Server5xxError
+from tap_intercom.json_stream import StreamedJSON
+from tap_intercom.streams import ConversationParts, Conversations
+from tap_intercom.transform import transform_json
+from test_conversation_part_bookmarks import Catalog
+
+SEARCH_RESPONSE = {
+    'type': 'conversation.list',
+    'conversations': [
+        {'id': '1', 'updated_at': 1640636000, 'tags': {'type': 'tag.list', 'tags': [{'id': 't1', 'name': 'a "b" é'}]}},
+        {'id': '2', 'updated_at': 1640636001.5, 'tags': {'type': 'tag.list', 'tags': []}, 'custom': None},
+        {'id': '3', 'updated_at': 1640636002, 'title': '☺ {[,]}:', 'statistics': {'count': -12.5e-3}}
+    ],
+    'total_count': 3,
+    'pages': {'type': 'pages', 'page': 1, 'per_page': 3, 'total_pages': 1}
+}
+
+CONVERSATION = {
+    'type': 'conversation',
+    'id': '10',
+    'created_at': 1640636000,
+    'updated_at': 1640637000,
+    'conversation_parts': {
+        'type': 'conversation_part.list',
+        'conversation_parts': [{'id': 'p1', 'body': 'hello'}, {'id': 'p2', 'body': None}],
+        'total_parts': 2
+    }
+}
+
+
+def get_chunks(response, chunk_size):
+    content = json.dumps(response, ensure_ascii=False).encode('utf-8')
+    return [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+
+
+class TestStreamedJSON(unittest.TestCase):
+    """
+        Test cases to verify the incremental parsing of the JSON responses
+    """
+
+    @parameterized.expand([[1], [2], [7], [64], [1024 * 1024]])
+    def test_chunk_sizes(self, chunk_size):
+        """
+            Verify that the items and the envelope are parsed whatever the chunks the response is split into
+        """
+        response = StreamedJSON(get_chunks(SEARCH_RESPONSE, chunk_size), 'conversations')
+
+        self.assertEqual(list(response), SEARCH_RESPONSE['conversations'])
+        self.assertEqual(response.envelope, {key: value for key, value in SEARCH_RESPONSE.items() if key != 'conversations'})
+        self.assertTrue(response.is_complete)
+
+    def test_nested_path(self):
+        """
+            Verify that the items of a nested array are yielded and the envelope keeps the other values
+        """
+        response = StreamedJSON(get_chunks(CONVERSATION, 5), ['conversation_parts', 'conversation_parts'])
+
+        self.assertEqual(list(response), CONVERSATION['conversation_parts']['conversation_parts'])
+        self.assertEqual(response.envelope['conversation_parts'], {'type': 'conversation_part.list', 'total_parts': 2})
+        self.assertEqual(response.envelope['id'], '10')
+
+    def test_envelope_before_items(self):
+        """
+            Verify that the values before the array are in the envelope while the items are yielded
+        """
+        response = StreamedJSON(get_chunks(CONVERSATION, 3), ['conversation_parts', 'conversation_parts'])
+
+        next(iter(response))
+
+        self.assertEqual(response.envelope['created_at'], 1640636000)
+        self.assertNotIn('total_parts', response.envelope['conversation_parts'])
+
+    def test_number_split_across_chunks(self):
+        """
+            Verify that a number is not decoded before its last chunk is read
+        """
+        response = StreamedJSON([b'{"data": [12', b'.5', b'e1, 3', b'4]}'], 'data')
+
+        self.assertEqual(list(response), [125.0, 34])
+
+    def test_missing_array(self):
+        """
+            Verify that nothing is yielded when the array is null or missing
+        """
+        self.assertEqual(list(StreamedJSON([b'{"data": null, "pages": {}}'], 'data')), [])
+        self.assertEqual(list(StreamedJSON([b'{"type": "list"}'], 'data')), [])
+
+    @parameterized.expand([[b'{"data": [1, 2'], [b''], [b'{"data": [1 2]}']])
+    def test_invalid_response(self, content):
+        """
+            Verify that an error is raised for a truncated or invalid response and the response is closed
+        """
+        close = mock.Mock()
+        response = StreamedJSON([content], 'data', close=close)
+
+        with self.assertRaises(json.JSONDecodeError):
+            list(response)
+        self.assertFalse(response.is_complete)
+        close.assert_called_once_with()
+
+
+@mock.patch('requests.Session.request')
+class TestClientStream(unittest.TestCase):
+    """
+        Test cases to verify the streamed requests of the client
+    """
+
+    def get_client(self):
+        client = IntercomClient('test_access_token', 300)
+        client.check_access_token = mock.Mock(return_value=True)
+        return client
+
+    def test_stream(self, mocked_request):
+        """
+            Verify that the response is requested as a stream and its items are parsed
+        """
+        mocked_request.return_value.status_code = 200
+        mocked_request.return_value.iter_content.return_value = get_chunks(SEARCH_RESPONSE, 10)
+
+        response = self.get_client().stream('POST', 'conversations/search', data_key='conversations', json={})
+
+        self.assertEqual(list(response), SEARCH_RESPONSE['conversations'])
+        self.assertTrue(mocked_request.call_args[1]['stream'])
+        mocked_request.return_value.close.assert_called_once_with()
+
+    @mock.patch('time.sleep')
+    def test_stream_error_retried(self, mocked_sleep, mocked_request):
+        """
+            Verify that the status errors are raised and retried like the other requests
+        """
+        mocked_request.return_value.status_code = 500
+        mocked_request.return_value.json.return_value = {}
+
+        with self.assertRaises(Server5xxError):
+            self.get_client().stream('GET', 'conversations/1', data_key='conversation_parts')
+        self.assertEqual(mocked_request.call_count, 7)
+
+    def test_stream_client_error(self, mocked_request):
+        """
+            Verify that the client errors are raised without retrying
+        """
+        mocked_request.return_value.status_code = 404
+        mocked_request.return_value.json.return_value = {}
+
+        with self.assertRaises(IntercomError):
+            self.get_client().stream('GET', 'conversations/1', data_key='conversation_parts')
+        self.assertEqual(mocked_request.call_count, 1)
+
+
+class TestStreamedRecords(unittest.TestCase):
+    """
+        Test cases to verify that the streamed records are the same as the records of the JSON responses
+    """
+
+    def get_stream(self, stream_class, config):
+        client = IntercomClient('dummy_token', None)
+        client.stream = mock.Mock(side_effect=lambda method, path, data_key, **kwargs: StreamedJSON(
+            get_chunks(CONVERSATION if method == 'GET' else SEARCH_RESPONSE, 16), data_key))
+        client.post = mock.Mock(return_value=json.loads(json.dumps(SEARCH_RESPONSE)))
+        return stream_class(client, Catalog([stream_class.tap_stream_id]), [stream_class.tap_stream_id], config)
+
+    def test_search_records(self):
+        """
+            Verify that the streamed conversations are the same as the conversations of the search response
+        """
+        search_query = {'query': {}, 'pagination': {'per_page': 3}}
+        streamed = list(self.get_stream(Conversations, {'stream_json_responses': 'true'}).get_records_of_search(dict(search_query)))
+        expected = list(self.get_stream(Conversations, {}).get_records_of_search(dict(search_query)))
+
+        self.assertEqual(streamed, expected)
+        self.assertEqual(len(streamed), 3)
+
+    @parameterized.expand([
+        ['total_parts_after_parts', CONVERSATION],
+        ['total_parts_before_parts', dict(CONVERSATION, conversation_parts={'total_parts': 2, 'conversation_parts': [{'id': 'p1'}]})],
+        ['no_updated_at', {key: value for key, value in CONVERSATION.items() if key != 'updated_at'}],
+    ])
+    def test_conversation_parts(self, name, conversation):
+        """
+            Verify that the streamed parts have the same conversation fields as `transform_conversation_parts`
+        """
+        stream = self.get_stream(ConversationParts, {'stream_json_responses': True})
+        stream.client.stream.side_effect = lambda method, path, data_key, **kwargs: StreamedJSON(
+            get_chunks(conversation, 16), data_key)
+
+        streamed = list(stream.get_streamed_substream_records('10', stream.get_streamed_substream_response('10')))
+        expected = list(transform_json({'conversations': [json.loads(json.dumps(conversation))]}, 'conversation_parts', 'conversations'))
+
+        self.assertEqual(streamed, expected)
+
+    @mock.patch('tap_intercom.streams.ConversationParts.get_substream_response')
+    @mock.patch('tap_intercom.streams.output.write_record')
+    @mock.patch('tap_intercom.streams.output.write_state')
+    def test_sync_substream(self, mocked_write_state, mocked_write_record, mocked_get_substream_response):
+        """
+            Verify that the sub-stream is synced from the streamed response when `stream_json_responses` is set
+        """
+        stream = self.get_stream(ConversationParts, {'stream_json_responses': 'true'})
+        schema = {'type': 'object', 'properties': {'id': {'type': 'string'}}}
+
+        stream.sync_substream('10', schema, {}, 1640637000000, {})
+
+        self.assertEqual([args[1]['id'] for args, _ in mocked_write_record.call_args_list], ['p1', 'p2'])
+        self.assertEqual(mocked_get_substream_response.call_count, 0)
@@ -0,0 +1,142 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+import singer
+
+from tap_intercom import output
+from tap_intercom.serialization import OrjsonBackend
+from tap_intercom.sync import sync
+from test_conversation_part_bookmarks import Catalog
+
+
+class CountingStdout(io.StringIO):
+    """Stdout recording the number of flushes, i.e. of the writes to the pipe."""
+    def __init__(self):
+        super().__init__()
+        self.flush_count = 0
+
+    def flush(self):
+        self.flush_count += 1
+        super().flush()
+
+
+class TestBufferedWriter(unittest.TestCase):
+    """
+        Test cases to verify the buffered RECORD messages of the writer
+    """
+
+    def setUp(self):
+        self.writer = output.MessageWriter()
+        self.writer.buffer_size = 1000
+        self.writer.flush_interval = 60
+        self.stdout = CountingStdout()
+        patcher = mock.patch('sys.stdout', self.stdout)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_messages(self):
+        return [json.loads(line) for line in self.stdout.getvalue().splitlines()]
+
+    def test_records_buffered(self):
+        """
+            Verify that the records are written at once when the buffer is full
+        """
+        message = singer.RecordMessage(stream='tags', record={'id': '00', 'name': 'tag name'})
+        self.writer.buffer_size = 10 * len(singer.format_message(message) + '\n')
+        for i in range(25):
+            self.writer.write_record('tags', {'id': '{:02d}'.format(i), 'name': 'tag name'})
+
+        self.assertEqual(self.stdout.flush_count, 2)
+        self.assertEqual(len(self.get_messages()), 20)
+
+        self.writer.flush()
+
+        self.assertEqual([message['record']['id'] for message in self.get_messages()], ['{:02d}'.format(i) for i in range(25)])
+        self.assertEqual(self.stdout.flush_count, 3)
+
+    def test_flush_before_state(self):
+        """
+            Verify that the buffered records are written before the state
+        """
+        self.writer.write_record('tags', {'id': '1'})
+        self.writer.write_state({'bookmarks': {'tags': {'updated_at': '2021-12-25T00:00:00.000000Z'}}})
+        self.writer.write_record('tags', {'id': '2'})
+
+        self.assertEqual([message['type'] for message in self.get_messages()], ['RECORD', 'STATE'])
+
+    def test_flush_before_schema(self):
+        self.writer.write_record('tags', {'id': '1'})
+        self.writer.write_schema('teams', {'type': 'object'}, ['id'])
+
+        self.assertEqual([message['type'] for message in self.get_messages()], ['RECORD', 'SCHEMA'])
+
+    @mock.patch('tap_intercom.output.time.monotonic')
+    def test_flush_interval(self, mocked_monotonic):
+        """
+            Verify that the buffered records are written after `flush_interval` seconds
+        """
+        mocked_monotonic.return_value = 0
+        self.writer.flush()
+        self.writer.write_record('tags', {'id': '1'})
+        self.assertEqual(self.get_messages(), [])
+
+        mocked_monotonic.return_value = 60
+        self.writer.write_record('tags', {'id': '2'})
+
+        self.assertEqual(len(self.get_messages()), 2)
+
+    def test_flush_interval_without_records(self):
+        """
+            Verify that the buffered records are written after `flush_interval` seconds when no record is written after them
+        """
+        self.writer.flush_interval = 0.05
+        self.writer.flush()
+        self.writer.write_record('tags', {'id': '1'})
+        flush_timer = self.writer.flush_timer
+        self.assertEqual(self.get_messages(), [])
+
+        flush_timer.join(5)
+
+        self.assertEqual([message['record'] for message in self.get_messages()], [{'id': '1'}])
+        self.assertIsNone(self.writer.flush_timer)
+
+    def test_same_messages_as_singer(self):
+        """
+            Verify that the buffered messages are the messages of singer-python, with and without a JSON backend
+        """
+        record = {'id': '1', 'body': 'é ☺'}
+        for backend in [None, OrjsonBackend]:
+            self.writer.json_backend = backend
+            self.writer.write_record('conversations', record)
+            self.writer.write_state({'bookmarks': {}})
+        buffered_messages = self.get_messages()
+
+        self.stdout.truncate(0)
+        self.stdout.seek(0)
+        unbuffered_writer = output.MessageWriter()
+        for _ in range(2):
+            unbuffered_writer.write_record('conversations', record)
+            unbuffered_writer.write_state({'bookmarks': {}})
+
+        self.assertEqual(buffered_messages, self.get_messages())
+
+
+class TestSyncBuffer(unittest.TestCase):
+
+    @mock.patch('tap_intercom.sync.IntercomClient')
+    @mock.patch('tap_intercom.sync.sync_parallel', side_effect=Exception('sync error'))
+    @mock.patch('tap_intercom.sync.output.flush_state')
+    def test_flush_on_error(self, mocked_flush, mocked_sync_parallel, mocked_client):
+        """
+            Verify that the sync sets the buffer of the writer and writes the buffered records when it fails
+        """
+        config = {'access_token': 'token', 'max_parallel_streams': 2, 'output_buffer_size': '65536', 'output_flush_interval': 5}
+        with mock.patch.multiple(output.WRITER, buffer_size=0, flush_interval=1):
+            with self.assertRaises(Exception):
+                sync(config, {}, Catalog([]))
+
+            self.assertEqual(output.WRITER.buffer_size, 65536)
+            self.assertEqual(output.WRITER.flush_interval, 5)
+        mocked_flush.assert_called_once_with()
@@ -0,0 +1,122 @@
+import threading
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+from tap_intercom.client import IntercomClient, IntercomNotFoundError
+from tap_intercom.concurrency import prefetch
+from tap_intercom.streams import Companies, Contacts, Conversations, Tags
+
+
+def get_page(data_key, page, page_count=3, next_page=None):
+    """Page of 2 records without addressable lists to fetch, the last page has no next page"""
+    empty_list = {'type': 'list', 'data': [], 'total_count': 0, 'has_more': False}
+    records = [{'id': '{}_{}'.format(page, i), 'tags': empty_list, 'companies': empty_list} for i in range(2)]
+    response = {data_key: records, 'pages': {'page': page}}
+    if page < page_count:
+        response['pages']['next'] = next_page or 'https://api.intercom.io/next/{}'.format(page + 1)
+    return response
+
+
+EXPECTED_IDS = ['{}_{}'.format(page, i) for page in range(1, 4) for i in range(2)]
+
+
+class TestPrefetch(unittest.TestCase):
+    """
+        Test cases to verify the items prefetched by a background thread
+    """
+
+    def test_items_in_order(self):
+        self.assertEqual(list(prefetch(iter(range(100)), 3)), list(range(100)))
+
+    def test_without_depth(self):
+        """Verify that the iterable is consumed by the calling thread without depth"""
+        threads = []
+
+        def items():
+            threads.append(threading.current_thread())
+            yield 1
+
+        self.assertEqual(list(prefetch(items(), 0)), [1])
+        self.assertEqual(threads, [threading.current_thread()])
+
+    def test_prefetched_ahead(self):
+        """Verify that the next items are consumed while the consumer holds the current item"""
+        ahead = threading.Event()
+
+        def items():
+            for item in range(3):
+                if item == 2:
+                    ahead.set()
+                yield item
+
+        items_iterator = prefetch(items(), 2)
+        self.assertEqual(next(items_iterator), 0)
+
+        self.assertTrue(ahead.wait(5))
+        self.assertEqual(list(items_iterator), [1, 2])
+
+    def test_error(self):
+        """Verify that the exception of the iterable is raised by the consumer"""
+        def failing():
+            yield 1
+            raise IntercomNotFoundError('failed')
+
+        with self.assertRaises(IntercomNotFoundError):
+            list(prefetch(failing(), 2))
+
+
+class TestStreamsPrefetch(unittest.TestCase):
+    """
+        Test cases to verify the records of the paginated streams with the pages prefetched
+    """
+
+    @parameterized.expand([
+        ['without_prefetch', {}],
+        ['with_prefetch', {'page_prefetch_depth': 2}],
+    ])
+    def test_next_url_pages(self, name, config):
+        client = IntercomClient('test_access_token', 100, None)
+        pages = iter([get_page('data', page) for page in range(1, 4)])
+        with mock.patch.object(client, 'get', side_effect=lambda *args, **kwargs: next(pages)) as mocked_get:
+            records = list(Tags(client, None, ['tags'], config).get_records())
+
+        self.assertEqual([record['id'] for record in records], EXPECTED_IDS)
+        self.assertEqual([kwargs['url'] for _, kwargs in mocked_get.call_args_list],
+                         [None, 'https://api.intercom.io/next/2', 'https://api.intercom.io/next/3'])
+
+    @parameterized.expand([
+        ['without_prefetch', {}],
+        ['with_prefetch', {'page_prefetch_depth': 2}],
+    ])
+    def test_scroll_pages(self, name, config):
+        client = IntercomClient('test_access_token', 100, None)
+        pages = [dict(get_page('data', page), scroll_param=str(page)) for page in range(1, 4)] + [IntercomNotFoundError('done')]
+        with mock.patch.object(client, 'get', side_effect=pages) as mocked_get:
+            records = list(Companies(client, None, ['companies'], config).get_records())
+
+        self.assertEqual([record['id'] for record in records], EXPECTED_IDS)
+        self.assertEqual([kwargs['params'] for _, kwargs in mocked_get.call_args_list],
+                         [{}, {'scroll_param': '1'}, {'scroll_param': '2'}, {'scroll_param': '3'}])
+
+    @parameterized.expand([
+        ['conversations', Conversations, 'conversations', {}],
+        ['conversations_with_prefetch', Conversations, 'conversations', {'page_prefetch_depth': 2}],
+        ['contacts', Contacts, 'data', {}],
+        ['contacts_with_prefetch', Contacts, 'data', {'page_prefetch_depth': 2}],
+    ])
+    def test_search_pages(self, name, stream_class, data_key, config):
+        client = IntercomClient('test_access_token', 100, None)
+        starting_afters = []
+
+        def search(path, params, json):
+            starting_afters.append(json['pagination'].get('starting_after'))
+            page = len(starting_afters)
+            return get_page(data_key, page, next_page={'starting_after': 'cursor_{}'.format(page)})
+
+        stream = stream_class(client, None, [stream_class.tap_stream_id], config)
+        with mock.patch.object(client, 'post', side_effect=search):
+            records = list(stream.get_search_records({'pagination': {}}, *([{}] if stream_class is Contacts else [])))
+
+        self.assertEqual([record['id'] for record in records], EXPECTED_IDS)
+        self.assertEqual(starting_afters, [None, 'cursor_1', 'cursor_2'])
@@ -0,0 +1,167 @@
+import unittest
+from json import dumps
+from unittest import mock
+
+from tap_intercom.client import IntercomClient, IntercomNotFoundError, IntercomRateLimitError
+from tap_intercom.json_stream import StreamedJSON
+from tap_intercom.pagination import (PAGE_DURATION, NextUrlPaginator, ScrollPaginator, StartingAfterPaginator,
+                                     StreamedStartingAfterPaginator, paginate)
+from tap_intercom.streams import Contacts, Tags
+
+
+def get_page(page, next_page=None, **kwargs):
+    """Page of 2 records"""
+    response = {'data': [{'id': '{}_{}'.format(page, i)} for i in range(2)], 'pages': {'page': page}}
+    if next_page:
+        response['pages']['next'] = next_page
+    response.update(kwargs)
+    return response
+
+
+class TestNextUrlPaginator(unittest.TestCase):
+    """
+        Test cases to verify the pages of the `pages.next` URLs
+    """
+
+    @mock.patch('tap_intercom.client.IntercomClient.get',
+                side_effect=lambda path, url=None, **kwargs: get_page(2) if url else get_page(1, next_page='https://api.intercom.io/tags?page=2'))
+    def test_next_url(self, mocked_get):
+        pages = list(NextUrlPaginator(IntercomClient('dummy_token', None), 'tags', 'data', 'tags', params={'per_page': 2}, cache=True).get_pages())
+
+        self.assertEqual([page['pages']['page'] for page in pages], [1, 2])
+        self.assertEqual(mocked_get.call_args_list, [
+            mock.call('tags', url=None, params={'per_page': 2}, cache=True),
+            mock.call('tags', url='https://api.intercom.io/tags?page=2', params={'per_page': 2}, cache=True)
+        ])
+
+    @mock.patch('tap_intercom.client.IntercomClient.get',
+                side_effect=lambda path, url=None, **kwargs: get_page(2) if url else get_page(1, next_page='https://api.intercom.io/tags?page=2'))
+    def test_stream_path_unchanged(self, mocked_get):
+        """
+            Verify that the stream can be synced again, its path is not changed by the pagination
+        """
+        stream = Tags(IntercomClient('dummy_token', None), None, ['tags'], {})
+
+        first_records = list(stream.get_records())
+        second_records = list(stream.get_records())
+
+        self.assertEqual(stream.path, 'tags')
+        self.assertEqual(len(first_records), 4)
+        self.assertEqual(first_records, second_records)
+        self.assertEqual([args[0] for args, _ in mocked_get.call_args_list], ['tags'] * 4)
+
+
+class TestStartingAfterPaginator(unittest.TestCase):
+
+    @mock.patch('tap_intercom.client.IntercomClient.post')
+    def test_starting_after(self, mocked_post):
+        """
+            Verify that the query of each page has the cursor of the previous page
+        """
+        cursors = []
+
+        def search(path, params, json):
+            cursors.append(json['pagination'].get('starting_after'))
+            return get_page(len(cursors), next_page={'starting_after': 'cursor_1'} if len(cursors) == 1 else None)
+
+        mocked_post.side_effect = search
+        query = {'query': {}, 'pagination': {'per_page': 2}}
+
+        pages = list(StartingAfterPaginator(IntercomClient('dummy_token', None), 'conversations/search', 'data', 'conversations', query).get_pages())
+
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(cursors, [None, 'cursor_1'])
+
+
+class TestStreamedStartingAfterPaginator(unittest.TestCase):
+
+    @mock.patch('tap_intercom.client.IntercomClient.stream')
+    def test_cursor_read_after_records(self, mocked_stream):
+        """
+            Verify that the cursor of the next page is read once the records of the streamed page are synced,
+            with and without prefetch
+        """
+        for prefetch_depth in [0, 2]:
+            cursors = []
+
+            def search(method, path, data_key, params, json):
+                cursors.append(json['pagination'].get('starting_after'))
+                page = get_page(len(cursors), next_page={'starting_after': 'cursor_1'} if len(cursors) == 1 else None)
+                # The pages are after the records in the response
+                return StreamedJSON([dumps(page, sort_keys=True).encode('utf-8')], data_key)
+
+            mocked_stream.side_effect = search
+            query = {'query': {}, 'pagination': {'per_page': 2}}
+            paginator = StreamedStartingAfterPaginator(IntercomClient('dummy_token', None), 'conversations/search', 'data',
+                                                       'conversations', query)
+
+            records = [record['id'] for response in paginate(paginator, prefetch_depth) for record in response]
+
+            self.assertEqual(records, ['1_0', '1_1', '2_0', '2_1'])
+            self.assertEqual(cursors, [None, 'cursor_1'])
+            self.assertEqual(paginator.record_count, 2)
+
+
+class TestScrollPaginator(unittest.TestCase):
+
+    @mock.patch('tap_intercom.client.IntercomClient.get')
+    def test_scroll_until_not_found(self, mocked_get):
+        """
+            Verify that the pages are requested with the last scroll_param until the API returns a 404 error
+        """
+        mocked_get.side_effect = [get_page(1, scroll_param='scroll_1'), {'data': [], 'scroll_param': 'scroll_2'},
+                                  get_page(3, scroll_param='scroll_3'), IntercomNotFoundError('not found')]
+
+        pages = list(ScrollPaginator(IntercomClient('dummy_token', None), 'companies/scroll', 'data', 'companies').get_pages())
+
+        self.assertEqual(len(pages), 3)
+        self.assertEqual([kwargs['params'] for _, kwargs in mocked_get.call_args_list],
+                         [{}, {'scroll_param': 'scroll_1'}, {'scroll_param': 'scroll_1'}, {'scroll_param': 'scroll_3'}])
+
+    @mock.patch('tap_intercom.client.IntercomClient.get', side_effect=IntercomRateLimitError('rate limit'))
+    def test_other_errors_raised(self, mocked_get):
+        with self.assertRaises(IntercomRateLimitError):
+            list(ScrollPaginator(IntercomClient('dummy_token', None), 'companies/scroll', 'data', 'companies').get_pages())
+
+
+class TestPaginator(unittest.TestCase):
+
+    @mock.patch('tap_intercom.client.IntercomClient.get')
+    def test_process_page(self, mocked_get):
+        """
+            Verify that the pages are processed before they are yielded, with and without prefetch
+        """
+        for prefetch_depth in [0, 2]:
+            mocked_get.side_effect = [get_page(1, next_page='https://api.intercom.io/tags?page=2'), get_page(2)]
+            paginator = NextUrlPaginator(IntercomClient('dummy_token', None), 'tags', 'data', 'tags',
+                                         process_page=lambda response: dict(response, processed=True))
+
+            pages = list(paginate(paginator, prefetch_depth))
+
+            self.assertEqual([(page['pages']['page'], page['processed']) for page in pages], [(1, True), (2, True)])
+
+    @mock.patch('tap_intercom.pagination.metrics.Timer')
+    @mock.patch('tap_intercom.client.IntercomClient.get',
+                side_effect=[get_page(1, next_page='https://api.intercom.io/tags?page=2'), get_page(2)])
+    def test_page_duration(self, mocked_get, mocked_timer):
+        """
+            Verify that the duration of each page is reported
+        """
+        list(NextUrlPaginator(IntercomClient('dummy_token', None), 'tags', 'data', 'tags').get_pages())
+
+        self.assertEqual(mocked_timer.call_args_list, [mock.call(PAGE_DURATION, {'endpoint': 'tags'})] * 2)
+
+    @mock.patch('tap_intercom.pagination.metrics.Timer')
+    @mock.patch('tap_intercom.client.IntercomClient.get',
+                side_effect=[get_page(1, next_page='https://api.intercom.io/contacts/1/tags?page=2'), get_page(2)])
+    def test_addressable_list_pages(self, mocked_get, mocked_timer):
+        """
+            Verify that the pages of an addressable list are requested by the paginator
+        """
+        stream = Contacts(IntercomClient('dummy_token', None), None, ['contacts'], {})
+
+        values = stream.get_addressable_list_values('contacts/1/tags')
+
+        self.assertEqual([value['id'] for value in values], ['1_0', '1_1', '2_0', '2_1'])
+        self.assertEqual(mocked_get.call_args_list[1][1]['url'], 'https://api.intercom.io/contacts/1/tags?page=2')
+        self.assertEqual(mocked_timer.call_args_list, [mock.call(PAGE_DURATION, {'endpoint': 'contacts'})] * 2)
@@ -0,0 +1,143 @@
+import io
+import json
+import threading
+import unittest
+from unittest import mock
+
+import singer
+from parameterized import parameterized
+from tap_intercom import output
+from tap_intercom.sync import sync, get_max_connections, get_stream_state
+from test_conversation_part_bookmarks import Catalog
+
+STREAM_NAMES = ['tags', 'teams', 'segments', 'company_segments']
+
+
+def get_stream_sync(barrier):
+    """
+    Mocked stream sync writing records and bookmarks of its own stream, the syncs wait for each other at the barrier
+    before writing, i.e. the barrier is broken if the streams are not synced concurrently
+    """
+    def mocked_stream_sync(self, state, stream_schema, stream_metadata, config, transformer):
+        barrier.wait()
+        for i in range(50):
+            output.write_record(self.tap_stream_id, {'id': i, 'name': 'x' * 100})
+            if i % 10 == 0:
+                state = singer.write_bookmark(state, self.tap_stream_id, 'updated_at', '2022-01-0{}'.format(i // 10 + 1))
+                output.write_state(state)
+        return state
+    return mocked_stream_sync
+
+
+class TestParallelSync(unittest.TestCase):
+    """
+        Test cases to verify the streams synced in parallel
+    """
+
+    def run_sync(self, config, state, streams=STREAM_NAMES):
+        stdout = io.StringIO()
+        with mock.patch('sys.stdout', stdout):
+            sync(config, state, Catalog(streams))
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def test_parallel_sync_messages(self):
+        """
+            Verify every message is written on its own line and the bookmarks of all streams are in the final state
+        """
+        stream_sync = get_stream_sync(threading.Barrier(len(STREAM_NAMES), timeout=10))
+        with mock.patch('tap_intercom.streams.IncrementalStream.sync', stream_sync), \
+                mock.patch('tap_intercom.streams.FullTableStream.sync', stream_sync):
+            messages = self.run_sync({'max_parallel_streams': len(STREAM_NAMES)}, {})
+
+        self.assertEqual(len([message for message in messages if message['type'] == 'RECORD']), 50 * len(STREAM_NAMES))
+
+        final_state = messages[-1]['value']
+        self.assertIsNone(final_state['currently_syncing'])
+        self.assertEqual(sorted(final_state['bookmarks']), sorted(STREAM_NAMES))
+        for stream in STREAM_NAMES:
+            self.assertEqual(final_state['bookmarks'][stream], {'updated_at': '2022-01-05'})
+
+        # The streams in progress are written as a list, all the streams are in progress once they passed the barrier
+        currently_syncing = [message['value']['currently_syncing'] for message in messages if message['type'] == 'STATE']
+        self.assertIn(sorted(STREAM_NAMES), currently_syncing)
+
+    @mock.patch('tap_intercom.streams.FullTableStream.sync')
+    def test_parallel_sync_error(self, mocked_sync):
+        """
+            Verify the error of a stream is raised and the failed stream is left in currently_syncing
+        """
+        mocked_sync.side_effect = [{}, Exception('Sync failed')]
+        stdout = io.StringIO()
+        with mock.patch('sys.stdout', stdout), self.assertRaises(Exception):
+            sync({'max_parallel_streams': 1 + 1}, {}, Catalog(['tags', 'teams']))
+
+        messages = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        last_state = [message['value'] for message in messages if message['type'] == 'STATE'][-1]
+        self.assertEqual(len(last_state['currently_syncing']), 1)
+
+    @mock.patch('tap_intercom.streams.FullTableStream.sync', return_value={})
+    def test_resume_order(self, mocked_sync):
+        """
+            Verify the streams interrupted in the last parallel sync are synced first
+        """
+        self.run_sync({'max_parallel_streams': 1 + 1}, {'currently_syncing': ['teams']}, ['tags', 'teams'])
+        self.assertEqual(mocked_sync.call_args_list[0][0][1], {'stream': 'teams'})
+
+    @mock.patch('tap_intercom.streams.FullTableStream.sync', return_value={})
+    def test_sequential_resume_from_parallel_state(self, mocked_sync):
+        """
+            Verify the sequential sync reads the list of streams of a parallel sync state
+        """
+        messages = self.run_sync({}, {'currently_syncing': ['teams']}, ['tags', 'teams'])
+        self.assertIsNone(messages[-1]['value']['currently_syncing'])
+
+    def test_get_stream_state(self):
+        """
+            Verify the stream state has the bookmarks of the stream and its child stream only
+        """
+        state = {'currently_syncing': 'tags', 'bookmarks': {'conversations': {'updated_at': '1'},
+                                                            'conversation_parts': {'updated_at': '2'},
+                                                            'tags': {'updated_at': '3'}}}
+        stream_state = get_stream_state(state, 'conversations')
+        self.assertEqual(stream_state, {'bookmarks': {'conversations': {'updated_at': '1'}, 'conversation_parts': {'updated_at': '2'}}})
+        stream_state['bookmarks']['conversations']['updated_at'] = '4'
+        self.assertEqual(state['bookmarks']['conversations']['updated_at'], '1')
+
+
+class TestMaxConnections(unittest.TestCase):
+    """
+        Test cases to verify the connections pool is sized for all the requests sent at the same time
+    """
+
+    @parameterized.expand([
+        ['default', {}, 10],
+        ['parallel_streams', {'max_parallel_streams': 12}, 13],
+        ['conversations', {'conversations_backfill_windows': 8, 'conversation_parts_workers': 8}, 16],
+        ['contacts', {'contacts_backfill_windows': 4, 'addressable_list_workers': 5}, 20],
+        ['admins', {'admin_workers': 15}, 15],
+        ['streams_with_most_requests', {'max_parallel_streams': 3, 'conversations_backfill_windows': 4, 'conversation_parts_workers': 10,
+                                        'contacts_backfill_windows': 2, 'addressable_list_workers': 3, 'admin_workers': 12}, 32],
+        ['sequential_streams', {'conversations_backfill_windows': 4, 'conversation_parts_workers': 10, 'admin_workers': 12}, 14],
+    ])
+    def test_max_connections(self, name, config, expected_max_connections):
+        self.assertEqual(get_max_connections(config), expected_max_connections)
+
+
+class TestMessageWriter(unittest.TestCase):
+    """
+        Test cases to verify the state merge of the message writer
+    """
+
+    def test_merge_state(self):
+        writer = output.MessageWriter()
+        shared_state = {'currently_syncing': ['tags'], 'bookmarks': {'tags': {'updated_at': '1'}}}
+        writer.shared_state = shared_state
+
+        merged = writer.merge_state({'bookmarks': {'teams': {'updated_at': '2'}}})
+        self.assertIs(merged, shared_state)
+        self.assertEqual(merged, {'currently_syncing': ['tags'], 'bookmarks': {'tags': {'updated_at': '1'}, 'teams': {'updated_at': '2'}}})
+
+    def test_no_shared_state(self):
+        writer = output.MessageWriter()
+        state = {'bookmarks': {'teams': {'updated_at': '2'}}}
+        self.assertIs(writer.merge_state(state), state)
@@ -0,0 +1,152 @@
+import io
+import json
+import unittest
+from copy import deepcopy
+from unittest import mock
+
+from parameterized import parameterized
+from tap_intercom.client import IntercomClient
+from tap_intercom.compiled_transform import REMOVED
+from tap_intercom.schema import get_schemas
+from tap_intercom.streams import CompanyAttributes, ContactAttributes, ConversationParts, Conversations, Contacts
+from test_compiled_transform import get_selected_metadata
+from test_conversation_part_bookmarks import Catalog
+
+CONFIG = {'start_date': '2021-12-25T00:00:00Z', 'prune_deselected_fields': True}
+
+
+def get_metadata(stream_name, deselected_fields):
+    stream_metadata = get_selected_metadata(stream_name)
+    for field in deselected_fields:
+        stream_metadata[('properties', field)]['selected'] = False
+    return stream_metadata
+
+
+def get_conversation(index):
+    """Conversation of the search results, the date-times are epoch seconds"""
+    return {
+        'id': str(index),
+        'created_at': 1640636000 + index,
+        'updated_at': 1640636000 + index,
+        'source': {'id': str(index), 'body': 'body {}'.format(index), 'delivered_as': 'customer_initiated'},
+        'tags': {'type': 'tag.list', 'tags': [{'id': '1', 'name': 'tag', 'applied_at': 1640636000}]},
+        'contacts': {'type': 'contact.list', 'contacts': [{'id': '1', 'type': 'contact'}]},
+        'statistics': {'first_contact_reply_at': 1640636000, 'count_conversation_parts': 2},
+        'conversation_parts': {'total_count': 2}
+    }
+
+
+class TestFieldFilter(unittest.TestCase):
+    """
+        Test cases to verify the fields pruned from the records with `prune_deselected_fields`
+    """
+
+    def test_without_config(self):
+        stream = Conversations(IntercomClient('dummy_token', None), None, ['conversations'], {})
+        self.assertIsNone(stream.get_field_filter(get_metadata('conversations', ['source'])))
+
+    def test_nothing_deselected(self):
+        stream = Conversations(IntercomClient('dummy_token', None), None, ['conversations'], CONFIG)
+        self.assertIsNone(stream.get_field_filter(get_metadata('conversations', [])))
+
+    def test_required_fields_kept(self):
+        """
+            Verify that the key properties, the replication key and the fields used by the child stream are not pruned
+        """
+        stream = Conversations(IntercomClient('dummy_token', None), None, ['conversations'], CONFIG)
+        stream_metadata = get_metadata('conversations', ['source', 'tags', 'statistics', 'created_at'])
+        for breadcrumb in [('properties', 'id'), ('properties', 'updated_at')]:
+            stream_metadata[breadcrumb].update(selected=False, inclusion='available')
+
+        self.assertEqual(set(stream.get_field_filter(stream_metadata).fields), {'source', 'tags', 'statistics', 'created_at'})
+        self.assertEqual(set(stream.get_field_filter(stream_metadata, ConversationParts.parent_fields).fields), {'source', 'tags', 'statistics'})
+
+    @parameterized.expand([
+        ['conversation_parts', ConversationParts, ['body', 'conversation_total_parts'], {'body'}],
+        ['company_attributes', CompanyAttributes, ['name', 'description', 'label'], {'label'}],
+        ['contact_attributes', ContactAttributes, ['name', 'description', 'label'], {'label'}],
+    ])
+    def test_stream_required_fields(self, name, stream_class, deselected_fields, pruned_fields):
+        """
+            Verify that the fields of the parts index and of the hashed primary key are not pruned
+        """
+        stream = stream_class(IntercomClient('dummy_token', None), None, [stream_class.tap_stream_id], CONFIG)
+        field_filter = stream.get_field_filter(get_metadata(stream_class.tap_stream_id, deselected_fields))
+        self.assertEqual(set(field_filter.fields), pruned_fields)
+
+
+class TestPrunedRecords(unittest.TestCase):
+    """
+        Test cases to verify that the deselected fields are pruned before the records are de-nested
+    """
+
+    @mock.patch('tap_intercom.transform.denest_record')
+    def test_contacts_pruned_before_denest(self, mocked_denest_record):
+        client = IntercomClient('dummy_token', None)
+        stream = Contacts(client, None, ['contacts'], CONFIG)
+        stream_metadata = get_metadata('contacts', ['tags', 'signed_up_at'])
+        stream.field_filter = stream.get_field_filter(stream_metadata)
+        empty_list = {'type': 'list', 'data': [], 'total_count': 0, 'has_more': False}
+        response = {'data': [{'id': '1', 'updated_at': 1640636000, 'signed_up_at': 1640636000, 'tags': dict(empty_list),
+                              'companies': dict(empty_list)}]}
+
+        with mock.patch.object(client, 'post', return_value=response):
+            records = list(stream.get_search_records({'pagination': {}}, stream_metadata))
+
+        self.assertEqual(records, [{'id': '1', 'updated_at': 1640636000, 'companies': empty_list}])
+        self.assertEqual(mocked_denest_record.call_args[0][0], records[0])
+
+    def test_conversation_parts(self):
+        stream = ConversationParts(IntercomClient('dummy_token', None), None, ['conversation_parts'], CONFIG)
+        stream.field_filter = stream.get_field_filter(get_metadata('conversation_parts', ['body', 'conversation_created_at']))
+        conversation = {'id': '1', 'created_at': 1, 'updated_at': 2,
+                        'conversation_parts': {'total_parts': 1, 'conversation_parts': [{'id': '10', 'body': 'text', 'part_type': 'comment'}]}}
+
+        parts = list(stream.iter_page_records({'conversations': [conversation]}))
+
+        self.assertEqual(parts, [{'id': '10', 'part_type': 'comment', 'conversation_id': '1', 'conversation_total_parts': 1,
+                                  'conversation_updated_at': 2}])
+        self.assertEqual(stream.field_filter.fields, {'body': REMOVED, 'conversation_created_at': REMOVED})
+
+
+class TestSyncPrunedFields(unittest.TestCase):
+    """
+        Test cases to verify that the records written with `prune_deselected_fields` are the same
+    """
+
+    def sync(self, stream_class, config, stream_metadata, mocked_request, response):
+        stdout = io.StringIO()
+        client = IntercomClient('dummy_token', None)
+        stream = stream_class(client, Catalog([stream_class.tap_stream_id]), [stream_class.tap_stream_id], config)
+        schema = get_schemas()[0][stream_class.tap_stream_id]
+        with mock.patch('sys.stdout', stdout), mock.patch.object(client, mocked_request, return_value=deepcopy(response)):
+            stream.sync({}, schema, stream_metadata, config, None)
+        return [json.loads(line)['record'] for line in stdout.getvalue().splitlines() if json.loads(line)['type'] == 'RECORD']
+
+    @parameterized.expand([
+        ['singer_transform', {}],
+        ['compiled_transform', {'compiled_transform': True}],
+    ])
+    def test_conversations(self, name, config):
+        stream_metadata = get_metadata('conversations', ['source', 'tags', 'created_at', 'statistics'])
+        response = {'conversations': [get_conversation(index) for index in range(3)], 'pages': {}}
+
+        expected_records = self.sync(Conversations, dict(config, start_date=CONFIG['start_date']), stream_metadata, 'post', response)
+        records = self.sync(Conversations, dict(config, **CONFIG), stream_metadata, 'post', response)
+
+        self.assertEqual(records, expected_records)
+        self.assertEqual([record['id'] for record in records], ['0', '1', '2'])
+        self.assertTrue(all(not {'source', 'tags', 'created_at', 'statistics'} & set(record) for record in records))
+
+    def test_company_attributes_hash(self):
+        """
+            Verify that the primary key of the records is the hash of the fields, even if they are deselected
+        """
+        stream_metadata = get_metadata('company_attributes', ['name', 'description', 'label'])
+        response = {'data': [{'id': 1, 'name': 'plan', 'description': 'Plan of the company', 'label': 'Plan'}]}
+
+        expected_records = self.sync(CompanyAttributes, {'start_date': CONFIG['start_date']}, stream_metadata, 'get', response)
+        records = self.sync(CompanyAttributes, CONFIG, stream_metadata, 'get', response)
+
+        self.assertEqual(records, expected_records)
+        self.assertEqual(set(records[0]), {'id', '_sdc_record_hash'})
@@ -0,0 +1,119 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+from tap_intercom.client import IntercomClient, RateLimiter
+
+
+def get_headers(limit, remaining, reset_in):
+    return {
+        'X-RateLimit-Limit': str(limit),
+        'X-RateLimit-Remaining': str(remaining),
+        'X-RateLimit-Reset': str(int(time.time() + reset_in))
+    }
+
+
+class TestRateLimiter(unittest.TestCase):
+    """
+        Test cases to verify the rate limiter driven by the response headers
+    """
+
+    def test_no_headers(self):
+        """Verify we do not wait before the first rate limit headers are received"""
+        rate_limiter = RateLimiter()
+        rate_limiter.update({})
+        self.assertEqual([rate_limiter.reserve() for _ in range(100)], [0] * 100)
+
+    def test_headroom(self):
+        """Verify we do not wait while there is headroom in the rate limit"""
+        rate_limiter = RateLimiter()
+        rate_limiter.update(get_headers(1000, 900, 10))
+        self.assertEqual([rate_limiter.reserve() for _ in range(100)], [0] * 100)
+
+    def test_slowdown_near_limit(self):
+        """Verify the remaining requests are spread until the reset time"""
+        rate_limiter = RateLimiter()
+        rate_limiter.update(get_headers(1000, 10, 10))
+        delays = [rate_limiter.reserve() for _ in range(10)]
+
+        self.assertEqual(delays[0], 0)
+        # Delays increase smoothly and do not exceed the reset time
+        self.assertEqual(delays, sorted(delays))
+        self.assertLessEqual(delays[-1], 10)
+        self.assertGreater(delays[-1], 5)
+
+    def test_wait_for_reset(self):
+        """Verify we wait until the reset time when no request is remaining"""
+        rate_limiter = RateLimiter()
+        rate_limiter.update(get_headers(1000, 0, 5))
+        self.assertAlmostEqual(rate_limiter.reserve(), 5, delta=1)
+
+    @mock.patch("time.time")
+    def test_local_reset(self, mocked_time):
+        """Verify the requests are not paced from the slots of the previous window once the reset time has passed"""
+        mocked_time.return_value = 1000
+        rate_limiter = RateLimiter()
+        rate_limiter.update({'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '5', 'X-RateLimit-Reset': '1010'})
+        delays = [rate_limiter.reserve() for _ in range(5)]
+        self.assertGreater(delays[-1], 5)
+
+        # After a long backoff
+        mocked_time.return_value = 1100
+        self.assertEqual([rate_limiter.reserve() for _ in range(95)], [0] * 95)
+        # The reset time is only taken from the response headers
+        self.assertIsNone(rate_limiter.reset_at)
+
+        rate_limiter.update({'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '5', 'X-RateLimit-Reset': '1110'})
+        self.assertEqual(rate_limiter.reset_at, 1110)
+        self.assertEqual(rate_limiter.reserve(), 0)
+        self.assertLess(rate_limiter.reserve(), 10 / 4)
+
+    def test_previous_window_update(self):
+        """Verify a late response of the previous window does not replace the current one"""
+        rate_limiter = RateLimiter()
+        rate_limiter.update(get_headers(1000, 900, 20))
+        rate_limiter.update(get_headers(1000, 5, -5))
+        self.assertEqual(rate_limiter.remaining, 900)
+
+    def test_out_of_order_updates(self):
+        """Verify an older response of the same window does not raise the remaining count"""
+        rate_limiter = RateLimiter()
+        headers = get_headers(1000, 50, 10)
+        rate_limiter.update(headers)
+        rate_limiter.update(dict(headers, **{'X-RateLimit-Remaining': '80'}))
+        self.assertEqual(rate_limiter.remaining, 50)
+
+    def test_shared_by_threads(self):
+        """Verify every token is taken once when the limiter is shared by threads"""
+        rate_limiter = RateLimiter()
+        rate_limiter.update(get_headers(100000, 50000, 60))
+
+        threads = [threading.Thread(target=lambda: [rate_limiter.reserve() for _ in range(1000)]) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(rate_limiter.remaining, 42000)
+
+    @mock.patch("time.sleep")
+    @mock.patch("requests.Session.request")
+    @mock.patch("tap_intercom.client.IntercomClient.check_access_token")
+    def test_client_reads_headers(self, mocked_check_access_token, mocked_request, mocked_sleep):
+        """Verify the client updates the limiter from the response headers and waits near the limit"""
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"type": "list"}'
+        response.headers.update(get_headers(1000, 1, 30))
+        mocked_request.return_value = response
+
+        client = IntercomClient('dummy_token', None)
+        client.get('tags')
+        self.assertEqual(client.rate_limiter.remaining, 1)
+        mocked_sleep.assert_not_called()
+
+        client.get('tags')
+        client.get('tags')
+        self.assertEqual(mocked_sleep.call_count, 1)
@@ -0,0 +1,226 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from tap_intercom.client import IntercomClient
+from tap_intercom.response_cache import ResponseCache
+from tap_intercom.streams import Tags
+from tap_intercom.sync import sync
+from test_conversation_part_bookmarks import Catalog
+
+TAGS_RESPONSE = {'type': 'list', 'data': [{'id': '1', 'name': 'tag'}]}
+
+
+class TemporaryCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+
+class TestResponseCache(TemporaryCacheTestCase):
+    """
+        Test cases to verify the on-disk cache of the responses
+    """
+
+    def test_get_put(self):
+        cache = ResponseCache(self.directory)
+        key = cache.get_key('https://api.intercom.io/tags')
+        self.assertIsNone(cache.get(key))
+
+        cache.put(key, TAGS_RESPONSE, '"etag"')
+
+        entry = ResponseCache(self.directory).get(key)
+        self.assertEqual(entry['body'], TAGS_RESPONSE)
+        self.assertEqual(entry['etag'], '"etag"')
+
+    def test_key(self):
+        """
+            Verify that the responses are keyed by the API version, the access token, the URL and the params
+        """
+        key = ResponseCache.get_key('https://api.intercom.io/segments', {'type': 'company', 'include_count': 'true'})
+        self.assertNotEqual(key, ResponseCache.get_key('https://api.intercom.io/segments', {'type': 'company', 'include_count': 'true'},
+                                                       'other_access_token'))
+
+        self.assertEqual(key, ResponseCache.get_key('https://api.intercom.io/segments', {'include_count': 'true', 'type': 'company'}))
+        self.assertNotEqual(key, ResponseCache.get_key('https://api.intercom.io/segments', {'type': 'contact', 'include_count': 'true'}))
+        self.assertNotEqual(key, ResponseCache.get_key('https://api.intercom.io/segments'))
+        with mock.patch('tap_intercom.response_cache.API_VERSION', '3.0'):
+            self.assertNotEqual(key, ResponseCache.get_key('https://api.intercom.io/segments', {'type': 'company', 'include_count': 'true'}))
+
+    def test_ttl(self):
+        cache = ResponseCache(self.directory, ttl=60)
+        key = cache.get_key('https://api.intercom.io/tags')
+        cache.put(key, TAGS_RESPONSE)
+        entry = cache.get(key)
+
+        self.assertTrue(cache.is_fresh(entry))
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertFalse(cache.is_fresh(entry))
+
+    def test_corrupted_response(self):
+        """
+            Verify that a cached response not matching its content hash is removed
+        """
+        cache = ResponseCache(self.directory)
+        key = cache.get_key('https://api.intercom.io/tags')
+        cache.put(key, TAGS_RESPONSE)
+        with open(cache.get_path(key)) as cache_file:
+            entry = json.load(cache_file)
+        entry['body']['data'] = []
+        with open(cache.get_path(key), 'w') as cache_file:
+            json.dump(entry, cache_file)
+
+        self.assertIsNone(cache.get(key))
+        self.assertFalse(os.path.exists(cache.get_path(key)))
+
+    def test_evict_least_recently_used(self):
+        """
+            Verify that the least recently used responses are removed when the cache is over its maximum size
+        """
+        cache = ResponseCache(self.directory)
+        keys = [cache.get_key('https://api.intercom.io/tags/{}'.format(i)) for i in range(3)]
+        cache.put(keys[0], TAGS_RESPONSE)
+        # Room for 3 responses, their sizes differ by a few bytes of `validated_at`
+        cache.max_size = int(3.5 * os.path.getsize(cache.get_path(keys[0])))
+        cache.put(keys[1], TAGS_RESPONSE)
+        cache.put(keys[2], TAGS_RESPONSE)
+        os.utime(cache.get_path(keys[0]), (0, 0))
+        os.utime(cache.get_path(keys[1]), (1, 1))
+        cache.get(keys[0])
+
+        cache.put(cache.get_key('https://api.intercom.io/tags/3'), TAGS_RESPONSE)
+
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+
+
+@mock.patch('requests.Session.request')
+class TestClientCache(TemporaryCacheTestCase):
+    """
+        Test cases to verify the GET requests served from the cache
+    """
+
+    def get_client(self, ttl=0):
+        client = IntercomClient('test_access_token', 300, response_cache=ResponseCache(self.directory, ttl=ttl))
+        client.check_access_token = mock.Mock(return_value=True)
+        return client
+
+    @staticmethod
+    def set_response(mocked_request, status_code, etag='"v1"'):
+        mocked_request.return_value.status_code = status_code
+        mocked_request.return_value.headers = {'ETag': etag}
+        mocked_request.return_value.json.return_value = json.loads(json.dumps(TAGS_RESPONSE))
+
+    def test_not_modified(self, mocked_request):
+        """
+            Verify that the cached response is validated with its ETag and served when it is not modified
+        """
+        self.set_response(mocked_request, 200)
+        client = self.get_client()
+        self.assertEqual(client.get('tags', cache=True), TAGS_RESPONSE)
+
+        self.set_response(mocked_request, 304)
+        mocked_request.return_value.json.side_effect = ValueError
+
+        self.assertEqual(client.get('tags', cache=True), TAGS_RESPONSE)
+        self.assertEqual(mocked_request.call_args[1]['headers']['If-None-Match'], '"v1"')
+
+    def test_modified(self, mocked_request):
+        """
+            Verify that the new response replaces the cached response
+        """
+        self.set_response(mocked_request, 200)
+        client = self.get_client()
+        client.get('tags', cache=True)
+        modified_response = {'type': 'list', 'data': []}
+        mocked_request.return_value.json.return_value = modified_response
+        mocked_request.return_value.headers = {'ETag': '"v2"'}
+
+        self.assertEqual(client.get('tags', cache=True), modified_response)
+        entry = client.response_cache.get(client.response_cache.get_key('https://api.intercom.io/tags', access_token='test_access_token'))
+        self.assertEqual((entry['body'], entry['etag']), (modified_response, '"v2"'))
+
+    def test_fresh_response(self, mocked_request):
+        """
+            Verify that no request is sent while the cached response is fresh
+        """
+        self.set_response(mocked_request, 200)
+        client = self.get_client(ttl=3600)
+        client.get('tags', cache=True)
+
+        self.assertEqual(client.get('tags', cache=True), TAGS_RESPONSE)
+        self.assertEqual(mocked_request.call_count, 1)
+
+    def test_without_etag(self, mocked_request):
+        """
+            Verify that the responses without an ETag are only cached with a TTL
+        """
+        self.set_response(mocked_request, 200, etag=None)
+        client = self.get_client()
+        client.get('tags', cache=True)
+        self.assertEqual(os.listdir(self.directory), [])
+
+        client = self.get_client(ttl=3600)
+        client.get('tags', cache=True)
+        self.assertEqual(client.get('tags', cache=True), TAGS_RESPONSE)
+        self.assertEqual(mocked_request.call_count, 2)
+
+    def test_access_tokens_not_shared(self, mocked_request):
+        """
+            Verify that the clients of different access tokens do not share the responses of the same directory
+        """
+        self.set_response(mocked_request, 200)
+        self.get_client(ttl=3600).get('tags', cache=True)
+        other_response = {'type': 'list', 'data': [{'id': '2', 'name': 'other workspace tag'}]}
+        mocked_request.return_value.json.return_value = other_response
+        other_client = IntercomClient('other_access_token', 300, response_cache=ResponseCache(self.directory, ttl=3600))
+        other_client.check_access_token = mock.Mock(return_value=True)
+
+        self.assertEqual(other_client.get('tags', cache=True), other_response)
+        self.assertEqual(self.get_client(ttl=3600).get('tags', cache=True), TAGS_RESPONSE)
+        self.assertEqual(mocked_request.call_count, 2)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_not_cached(self, mocked_request):
+        """
+            Verify that the requests without `cache` and the clients without a cache are not cached
+        """
+        self.set_response(mocked_request, 200)
+        client = self.get_client(ttl=3600)
+        client.get('tags')
+        client.get('tags')
+        client_without_cache = IntercomClient('test_access_token', 300)
+        client_without_cache.check_access_token = mock.Mock(return_value=True)
+        client_without_cache.get('tags', cache=True)
+
+        self.assertEqual(mocked_request.call_count, 3)
+        self.assertNotIn('If-None-Match', mocked_request.call_args[1]['headers'])
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class TestStreamsCache(TemporaryCacheTestCase):
+
+    @mock.patch('tap_intercom.client.IntercomClient.get', return_value=TAGS_RESPONSE)
+    def test_reference_stream_cached(self, mocked_client_get):
+        """
+            Verify that the reference streams request the cached responses
+        """
+        list(Tags(IntercomClient('dummy_token', None), None, ['tags'], {}).get_records())
+
+        self.assertTrue(mocked_client_get.call_args[1]['cache'])
+
+    @mock.patch('tap_intercom.sync.IntercomClient')
+    def test_cache_config(self, mocked_client):
+        """
+            Verify that the sync passes the cache of the `response_cache_dir` config param to the client
+        """
+        sync({'access_token': 'token', 'response_cache_dir': self.directory, 'response_cache_ttl': '600'}, {}, Catalog([]))
+
+        response_cache = mocked_client.call_args[0][6]
+        self.assertEqual((response_cache.directory, response_cache.ttl), (self.directory, 600))
@@ -0,0 +1,129 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+from tap_intercom import output
+from tap_intercom.sync import sync
+from test_conversation_part_bookmarks import Catalog
+
+
+def get_state(updated_at):
+    return {'bookmarks': {'conversations': {'updated_at': updated_at}}}
+
+
+class TestStateCoalescing(unittest.TestCase):
+    """
+        Test cases to verify the coalesced STATE messages of the writer
+    """
+
+    def setUp(self):
+        self.writer = output.MessageWriter()
+        self.stdout = io.StringIO()
+        patcher = mock.patch('sys.stdout', self.stdout)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_messages(self):
+        return [json.loads(line) for line in self.stdout.getvalue().splitlines()]
+
+    def get_written_states(self):
+        return [message['value']['bookmarks']['conversations']['updated_at']
+                for message in self.get_messages() if message['type'] == 'STATE']
+
+    def test_state_record_count(self):
+        """
+            Verify that the state is written once `state_record_count` records are written since the last state
+        """
+        self.writer.state_record_count = 3
+        for i in range(10):
+            self.writer.write_record('conversations', {'id': str(i)})
+            self.writer.write_state(get_state(str(i)))
+
+        self.assertEqual(self.get_written_states(), ['2', '5', '8'])
+
+    @mock.patch('tap_intercom.output.time.monotonic')
+    def test_state_interval(self, mocked_monotonic):
+        """
+            Verify that the state is written once `state_interval` seconds have passed since the last state
+        """
+        mocked_monotonic.return_value = 0
+        self.writer.state_interval = 10
+        self.writer.state_written_at = 0
+        for i in range(6):
+            mocked_monotonic.return_value = i * 4
+            self.writer.write_state(get_state(str(i)))
+
+        self.assertEqual(self.get_written_states(), ['3'])
+
+    def test_unchanged_state(self):
+        """
+            Verify that a state is not written again when it did not change
+        """
+        self.writer.state_record_count = 1
+        state = get_state('1')
+        self.writer.write_record('conversations', {'id': '1'})
+        self.writer.write_state(state)
+        self.writer.write_record('conversations', {'id': '2'})
+        self.writer.write_state(state)
+        self.writer.write_state(state, force=True)
+
+        self.assertEqual(self.get_written_states(), ['1'])
+
+    def test_force(self):
+        """
+            Verify that the last state is written at the stream boundaries
+        """
+        self.writer.state_record_count = 100
+        self.writer.write_record('conversations', {'id': '1'})
+        self.writer.write_state(get_state('1'))
+        self.writer.write_state(get_state('2'))
+        self.assertEqual(self.get_written_states(), [])
+
+        self.writer.write_state(get_state('3'), force=True)
+
+        self.assertEqual(self.get_written_states(), ['3'])
+
+    def test_flush_state(self):
+        """
+            Verify that the buffered records are written before the pending state
+        """
+        self.writer.state_record_count = 100
+        self.writer.buffer_size = 10000
+        self.writer.write_record('conversations', {'id': '1'})
+        self.writer.write_state(get_state('1'))
+
+        self.writer.flush_state()
+
+        self.assertEqual([message['type'] for message in self.get_messages()], ['RECORD', 'STATE'])
+
+    @mock.patch('tap_intercom.output.singer.write_state')
+    def test_default_every_state(self, mocked_write_state):
+        """
+            Verify that every state is written when the states are not coalesced
+        """
+        for i in range(3):
+            self.writer.write_state(get_state(str(i)))
+
+        self.assertEqual(mocked_write_state.call_count, 3)
+
+
+class TestSyncStateCoalescing(unittest.TestCase):
+
+    @mock.patch('tap_intercom.sync.IntercomClient')
+    @mock.patch('tap_intercom.sync.sync_parallel', side_effect=Exception('sync error'))
+    def test_state_written_on_error(self, mocked_sync_parallel, mocked_client):
+        """
+            Verify that the sync sets the coalescing of the writer and writes the pending state when it fails
+        """
+        config = {'access_token': 'token', 'max_parallel_streams': 2, 'state_interval': '30', 'state_record_count': 500}
+        with mock.patch.multiple(output.WRITER, state_interval=0, state_record_count=0, pending_state=None), \
+                mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            output.WRITER.pending_state = get_state('1')
+            with self.assertRaises(Exception):
+                sync(config, {}, Catalog([]))
+
+            self.assertEqual(output.WRITER.state_interval, 30)
+            self.assertEqual(output.WRITER.state_record_count, 500)
+            self.assertIsNone(output.WRITER.pending_state)
+        self.assertEqual(json.loads(stdout.getvalue())['value'], get_state('1'))
@@ -1,6 +1,7 @@
+import copy
 import unittest
 from singer.transform import unix_milliseconds_to_datetime
-from tap_intercom.transform import get_integer_places, transform_json, find_datetimes_in_schema
+from tap_intercom.transform import get_integer_places, iter_transform_json, transform_json, find_datetimes_in_schema
 from parameterized import parameterized
 
 
@@ -62,3 +63,57 @@ class TestTransform(unittest.TestCase):
         # Call the datetime function
         path = find_datetimes_in_schema(test_schema)
         self.assertEqual(path,exp)
+
+
+def get_response(stream_name):
+    """Page of 3 records with the list nodes de-nested by `transform_json`"""
+    records = []
+    for i in range(3):
+        records.append({
+            'id': str(i),
+            'tags': {'type': 'tag.list', 'tags': [{'id': 'tag_{}'.format(i)}]},
+            'segments': {'type': 'segment.list', 'segments': []},
+            'companies': {'type': 'list', 'data': [{'id': 'company_{}'.format(i)}], 'companies': []},
+            'conversation_parts': {'conversation_parts': [{'id': 'part_{}_{}'.format(i, j)} for j in range(i)],
+                                   'total_parts': i}
+        })
+    return {'type': 'list', 'data': records, 'pages': {'page': 1}}
+
+
+class TestIterTransform(unittest.TestCase):
+
+    @parameterized.expand([
+        ['stream_users', 'users'],
+        ['stream_companies', 'companies'],
+        ['stream_conversations', 'conversations'],
+        ['stream_conversation_parts', 'conversation_parts'],
+        ['stream_contacts', 'contacts'],
+        ['stream_tags', 'tags'],
+    ])
+    def test_same_records(self, test_name, stream_name):
+        """Test that the records yielded one at a time are the records of `transform_json`"""
+        response = get_response(stream_name)
+        expected_records = list(transform_json(copy.deepcopy(response), stream_name, 'data'))
+
+        records = list(iter_transform_json(response, stream_name, 'data'))
+
+        self.assertEqual(records, expected_records)
+
+    def test_records_released(self):
+        """Test that the yielded records are removed from the response"""
+        response = get_response('conversations')
+        records = iter_transform_json(response, 'conversations', 'data')
+
+        self.assertEqual(next(records)['id'], '0')
+        self.assertEqual([record['id'] for record in response['data']], ['2', '1'])
+        self.assertEqual(response['pages'], {'page': 1})
+
+    def test_conversation_parts_yielded(self):
+        """Test that the parts of a conversation are yielded before the next conversation is de-nested"""
+        response = get_response('conversation_parts')
+        response['data'].append(None)
+        records = transform_json(response, 'conversation_parts', 'data')
+
+        self.assertEqual([next(records)['id'] for _ in range(3)], ['part_1_0', 'part_2_0', 'part_2_1'])
+        with self.assertRaises(AttributeError):
+            next(records)
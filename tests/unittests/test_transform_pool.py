@@ -0,0 +1,106 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+from tap_intercom.client import IntercomClient
+from tap_intercom.streams import Conversations
+from tap_intercom.transform_pool import BATCH_SIZE, TransformPool, transform_pool
+from test_conversation_part_bookmarks import Catalog
+
+SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'id': {'type': ['null', 'string']},
+        'name': {'type': ['null', 'string']},
+        'updated_at': {'type': ['null', 'integer']}
+    }
+}
+
+
+def get_records(count):
+    return [{'id': str(i), 'name': 'company {}'.format(i), 'updated_at': 1640636000000 + i * 1000} for i in range(count)]
+
+
+class TransformPoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.stdout = io.StringIO()
+        patcher = mock.patch('sys.stdout', self.stdout)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_messages(self):
+        return [json.loads(line) for line in self.stdout.getvalue().splitlines()]
+
+
+class TestTransformPool(TransformPoolTestCase):
+    """
+        Test cases to verify the RECORD messages of the records transformed by the pool of processes
+    """
+
+    def test_same_messages(self):
+        """
+            Verify that the messages are the messages of `write_record` in the order of the records
+        """
+        records = get_records(2 * BATCH_SIZE + 50)
+        with transform_pool('companies', SCHEMA, {}, 2) as pool:
+            for record in records:
+                pool.submit(dict(record))
+            self.assertIsNotNone(pool.executor)
+        messages = self.get_messages()
+
+        self.assertEqual([message['record'] for message in messages], records)
+        self.assertTrue(all(message['type'] == 'RECORD' and message['stream'] == 'companies' and 'time_extracted' in message
+                            for message in messages))
+
+    def test_version(self):
+        with transform_pool('company_attributes', SCHEMA, {}, 2, version=1640636000000) as pool:
+            for record in get_records(BATCH_SIZE):
+                pool.submit(record)
+
+        self.assertEqual({message['version'] for message in self.get_messages()}, {1640636000000})
+
+    def test_small_stream_not_started(self):
+        """
+            Verify that the records of a stream with less than a batch are transformed without starting the processes
+        """
+        pool = TransformPool('companies', SCHEMA, {}, 2)
+        for record in get_records(BATCH_SIZE - 1):
+            pool.submit(record)
+
+        pool.flush()
+
+        self.assertIsNone(pool.executor)
+        self.assertEqual(len(self.get_messages()), BATCH_SIZE - 1)
+
+    def test_without_workers(self):
+        with transform_pool('companies', SCHEMA, {}, 1) as pool:
+            self.assertIsNone(pool)
+
+
+@mock.patch('tap_intercom.streams.MAX_PAGE_SIZE', 100)
+class TestSyncTransformPool(TransformPoolTestCase):
+
+    def test_records_before_bookmarks(self):
+        """
+            Verify that the records transformed by the pool are written before the bookmarks covering them
+        """
+        records = get_records(350)
+        config = {'start_date': '2021-12-25T00:00:00Z', 'transform_workers': 2}
+        conversations = Conversations(IntercomClient('dummy_token', None), Catalog(['conversations']), ['conversations'], config)
+        with mock.patch('tap_intercom.streams.Conversations.get_records', return_value=[dict(record) for record in records]):
+            conversations.sync({}, SCHEMA, {}, config, None)
+
+        messages = self.get_messages()
+        self.assertEqual([message['record'] for message in messages if message['type'] == 'RECORD'], records)
+        last_processed = [message['value']['bookmarks']['conversations']['last_processed']
+                          for message in messages if message['type'] == 'STATE']
+        self.assertEqual(last_processed, ['99', '199', '299'])
+        written_records = 0
+        for message in messages:
+            if message['type'] == 'RECORD':
+                written_records += 1
+            else:
+                # All the records up to the last processed conversation are written
+                self.assertEqual(written_records, int(message['value']['bookmarks']['conversations']['last_processed']) + 1)